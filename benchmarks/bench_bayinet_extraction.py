@@ -0,0 +1,60 @@
+# Bayinet ürün gridi için sayfa başına ayrıştırma süresi karşılaştırması:
+# "locator" (kart başına çok sayıda Playwright çağrısı) vs "evaluate" (tek çağrı).
+#
+# Kullanım:
+#   python -m benchmarks.bench_bayinet_extraction [--runs 20] [--fixture yol.html]
+import argparse
+import os
+import statistics
+import time
+from playwright.sync_api import sync_playwright
+
+from scripts.bayinet.extraction import extract_products
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "bayinet", "product_index.html")
+
+
+def time_mode(page, mode, runs):
+    timings = []
+    products = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        _, products = extract_products(page, "01", 0, mode=mode)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, products
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bayinet kart ayrıştırma benchmark'ı")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--fixture", default=FIXTURE)
+    args = parser.parse_args()
+
+    with open(args.fixture, encoding="utf-8") as f:
+        html = f.read()
+
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        page.set_content(html, wait_until="domcontentloaded")
+
+        results = {}
+        for mode in ("locator", "evaluate"):
+            timings, products = time_mode(page, mode, args.runs)
+            results[mode] = (timings, products)
+        browser.close()
+
+    # İki yöntem de aynı ürünleri üretmeli (last_updated hariç)
+    strip = lambda items: [{k: v for k, v in p.items() if k != "last_updated"} for p in items]
+    if strip(results["locator"][1]) != strip(results["evaluate"][1]):
+        print("⚠️ Uyarı: locator ve evaluate çıktıları farklı!")
+
+    print(f"📄 Fixture: {args.fixture} ({len(results['evaluate'][1])} kart, {args.runs} tekrar)")
+    for mode, (timings, _) in results.items():
+        print(f"   {mode:<9} medyan {statistics.median(timings):8.2f} ms/sayfa | min {min(timings):8.2f} ms | max {max(timings):8.2f} ms")
+    speedup = statistics.median(results["locator"][0]) / statistics.median(results["evaluate"][0])
+    print(f"⚡ evaluate, locator'a göre {speedup:.1f}x daha hızlı.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+# Canlı siteye ve canlı Supabase'e dokunmadan uçtan uca scraper + yazıcı benchmark'ı.
+#
+# Fixture'lardan üretilen lokal siteler (benchmarks/stand_in.py) ve yazılan satırları
+# kaydeden sahte bir PostgREST ayağa kaldırılır; her scraper ayrı bir alt süreçte bu
+# sunuculara yönlendirilerek çalıştırılır (tepe RSS scraper başına ölçülsün diye).
+# Sonuçlar commit bilgisiyle birlikte JSONL dosyasına eklenir ve aynı parametrelerle
+# yapılmış bir önceki ölçümle karşılaştırılır.
+#
+# Ölçülenler: sayfa/sn, sayfa başına ayrıştırma süresi (ms), DB'ye yazılan ürün/sn, tepe RSS.
+# Notlar:
+#   - Bayinet HTTP modunda çalışır; giriş (Playwright + OTP) offline ölçülemediği için atlanır.
+#   - Denge yalnızca tarayıcıyla çalıştığından Chromium kurulu değilse atlanır.
+#   - Hız sınırlayıcı yüksek bir başlangıç hızıyla çalıştırılır (RATE_LIMIT_* ile değiştirilebilir);
+#     ölçülen şey sitenin değil kodun hızıdır.
+#
+# Kullanım:
+#   python -m benchmarks.bench_offline [--scrapers oksid,bayinet,denge] [--pages 3] [--categories 10]
+#                                      [--repeat 1] [--db-latency-ms 0] [--output .cache/bench/offline.jsonl]
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import statistics
+import subprocess
+import tempfile
+
+from benchmarks import stand_in
+
+SCRAPERS = ["oksid", "bayinet", "denge"]
+OUTPUT = os.path.join(".cache", "bench", "offline.jsonl")
+PARSE_RUNS = 20
+METRICS = ["pages_per_sec", "parse_ms", "written_per_sec", "peak_rss_mb"]
+
+
+# --- Alt süreç tarafı ---
+def _median_ms(fn, runs=PARSE_RUNS):
+    fn()  # ısınma
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def child_oksid(args):
+    from scripts.oksid import update_oksid as oksid
+    html = stand_in._read("oksid", "listing.html")
+    parse_ms = _median_ms(lambda: oksid.PARSER.parse(html, "Bench", oksid.BASE_URL))
+    start = time.perf_counter()
+    oksid.crawl_from_homepage(refresh_tree=True)
+    return {"parse_ms": parse_ms, "seconds": time.perf_counter() - start, "parser": oksid.PARSER.name}
+
+
+def child_bayinet(args):
+    from scripts.bayinet import update_bayinet as bayinet
+    from scripts.bayinet.extraction import extract_raw_cards_from_html, parse_cards
+    html = stand_in._read("bayinet", "product_index.html")
+    parse_ms = _median_ms(lambda: parse_cards(extract_raw_cards_from_html(html), "01", 0))
+    bayinet.CATEGORY_IDS = bayinet.CATEGORY_IDS[:args.categories]
+    # Giriş adımı offline ölçülemez; lokal site çerez beklemez
+    bayinet.login_and_export_cookies = lambda force_login=False: []
+    start = time.perf_counter()
+    bayinet.run_scraper(fetch_mode="http")
+    return {"parse_ms": parse_ms, "seconds": time.perf_counter() - start}
+
+
+def child_denge(args):
+    from playwright.sync_api import sync_playwright
+    from scripts.denge import update_denge as denge
+    from scripts.shared.pipeline import BackgroundWriter, StreamingSink
+    with sync_playwright() as p:
+        try:
+            browser = p.chromium.launch(headless=True)
+        except Exception as e:
+            return {"skipped": f"Chromium açılamadı ({str(e).splitlines()[0]})"}
+        page = browser.new_page()
+        page.set_content(stand_in._read("denge", "category.html"))
+        parse_ms = _median_ms(lambda: denge.extract_rows(page, "Bench"), runs=5)
+        start = time.perf_counter()
+        # update_denge.run_scraper'ın kategori döngüsüyle aynı akış (giriş hariç)
+        with BackgroundWriter(denge.save_products_to_supabase, name="denge-writer") as writer:
+            for i in range(args.categories):
+                name = f"k{i}"
+                page.goto(f"{denge.BASE_URL}/kategori/{name}", wait_until="networkidle")
+                with StreamingSink(writer.submit, key="product_id") as sink:
+                    for page_products in denge.iter_category_pages(page, name):
+                        sink.add(page_products)
+        seconds = time.perf_counter() - start
+        browser.close()
+    return {"parse_ms": parse_ms, "seconds": seconds}
+
+
+def run_child(args):
+    result = globals()[f"child_{args.child}"](args)
+    # Linux'ta ru_maxrss KB cinsindendir; Chromium süreçleri dahil değildir
+    result["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    with open(args.result_path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+
+# --- Ana süreç tarafı ---
+def child_env(site, db, workdir):
+    env = dict(os.environ)
+    env.pop("TR_PROXY_URL", None)
+    env.update({
+        "SUPABASE_URL": db.url,
+        "SUPABASE_KEY": "bench.bench.bench",
+        "OKSID_BASE_URL": site.url,
+        "BAYINET_BASE_URL": site.url + "/",
+        "DENGE_BASE_URL": site.url,
+        "DENGE_EMAIL": env.get("DENGE_EMAIL", "bench"),
+        "DENGE_PASSWORD": env.get("DENGE_PASSWORD", "bench"),
+        # Her ölçüm soğuk başlar ve repo'nun .cache dizinine dokunmaz: önbellek, snapshot,
+        # checkpoint, ağaç, metrikler ve oturumlar geçici dizinde
+        "HTTP_CACHE": "0",
+        "HTTP_CACHE_PATH": os.path.join(workdir, "http_cache.sqlite"),
+        "METRICS_DIR": os.path.join(workdir, "metrics"),
+        "SESSION_STORE": "file",
+        "SESSION_STORE_DIR": os.path.join(workdir, "sessions"),
+        "MATCH_STATE_PATH": os.path.join(workdir, "matching.sqlite"),
+        "SYNC_SNAPSHOT_PATH": os.path.join(workdir, "sync_state.sqlite"),
+        "WRITE_DEAD_LETTER_PATH": os.path.join(workdir, "dead_letter.jsonl"),
+        "CHECKPOINT_STORE": "file",
+        "CHECKPOINT_DIR": os.path.join(workdir, "checkpoints"),
+        "OKSID_TREE_PATH": os.path.join(workdir, "oksid_tree.json"),
+        # Kur servislerine çıkılmaz; snapshot yoksa FX kolonları yazılmaz
+        "FX_OFFLINE": "1",
+        "FX_CACHE_PATH": os.path.join(workdir, "fx_snapshot.json"),
+        "RATE_LIMIT_INITIAL": env.get("RATE_LIMIT_INITIAL", "500"),
+        "RATE_LIMIT_MAX": env.get("RATE_LIMIT_MAX", "500"),
+        "RATE_LIMIT_LOG_EVERY": "0",
+    })
+    return env
+
+
+def start_site(name, args):
+    if name == "oksid":
+        return stand_in.oksid_site(pages_per_listing=args.pages)
+    if name == "bayinet":
+        return stand_in.bayinet_site(pages_per_category=args.pages)
+    return stand_in.denge_site(pages_per_category=args.pages)
+
+
+def measure(name, args):
+    site = start_site(name, args)
+    db = stand_in.fake_postgrest(latency_ms=args.db_latency_ms)
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            result_path = os.path.join(workdir, "result.json")
+            cmd = [sys.executable, "-m", "benchmarks.bench_offline", "--child", name, "--result-path", result_path,
+                   "--categories", str(args.categories)]
+            output = None if args.verbose else subprocess.DEVNULL
+            proc = subprocess.run(cmd, env=child_env(site, db, workdir), stdout=output, stderr=output, timeout=args.timeout)
+            if proc.returncode != 0 or not os.path.exists(result_path):
+                return {"skipped": f"alt süreç {proc.returncode} koduyla çıktı (--verbose ile ayrıntı)"}
+            with open(result_path, encoding="utf-8") as f:
+                result = json.load(f)
+    finally:
+        site.close()
+        db.close()
+    if "skipped" in result:
+        return result
+    seconds = result.pop("seconds")
+    result.update({
+        "pages": site.stats["requests"],
+        "products_written": db.written["rows"],
+        "seconds": seconds,
+        "pages_per_sec": site.stats["requests"] / seconds if seconds else 0,
+        "written_per_sec": db.written["rows"] / seconds if seconds else 0,
+        "db_requests": db.stats["requests"],
+    })
+    return result
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+        return commit + ("+dirty" if dirty else "")
+    except OSError:
+        return None
+
+
+def previous_record(path, params):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    same = [r for r in records if r.get("params") == params]
+    return same[-1] if same else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline scraper + yazıcı benchmark'ı")
+    parser.add_argument("--scrapers", default=",".join(SCRAPERS))
+    parser.add_argument("--pages", type=int, default=3, help="Liste/kategori başına sayfa sayısı")
+    parser.add_argument("--categories", type=int, default=10, help="Bayinet/Denge için kategori sayısı")
+    parser.add_argument("--repeat", type=int, default=1, help="Her scraper için tekrar; metriklerin medyanı alınır")
+    parser.add_argument("--db-latency-ms", type=float, default=0, help="Sahte PostgREST'e eklenen istek başı gecikme")
+    parser.add_argument("--output", default=OUTPUT)
+    parser.add_argument("--timeout", type=int, default=600)
+    parser.add_argument("--verbose", action="store_true", help="Scraper çıktılarını göster")
+    parser.add_argument("--child", choices=SCRAPERS, help=argparse.SUPPRESS)
+    parser.add_argument("--result-path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    params = {"pages": args.pages, "categories": args.categories, "db_latency_ms": args.db_latency_ms}
+    previous = previous_record(args.output, params)
+    results = {}
+    for name in args.scrapers.split(","):
+        runs = [measure(name, args) for _ in range(max(1, args.repeat))]
+        ok = [r for r in runs if "skipped" not in r]
+        if not ok:
+            print(f"⚠️ {name}: atlandı — {runs[0]['skipped']}")
+            results[name] = runs[0]
+            continue
+        result = dict(ok[-1])
+        for metric in METRICS + ["seconds"]:
+            result[metric] = statistics.median(r[metric] for r in ok)
+        results[name] = result
+
+    print(f"📊 Offline benchmark ({params}, commit {git_commit()})")
+    for name, r in results.items():
+        if "skipped" in r:
+            continue
+        print(
+            f"   {name:<8} {r['pages']:5d} sayfa {r['seconds']:6.1f} sn | {r['pages_per_sec']:7.1f} sayfa/sn | "
+            f"ayrıştırma {r['parse_ms']:6.2f} ms/sayfa | {r['products_written']:6d} ürün, {r['written_per_sec']:8.0f} ürün/sn yazıldı | "
+            f"tepe RSS {r['peak_rss_mb']:6.1f} MB"
+        )
+        before = (previous or {}).get("results", {}).get(name)
+        if before and "skipped" not in before:
+            changes = ", ".join(
+                f"{metric} {100 * (r[metric] - before[metric]) / before[metric]:+.0f}%"
+                for metric in METRICS if before.get(metric)
+            )
+            print(f"            önceki ölçüme göre ({previous['commit']}): {changes}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "a", encoding="utf-8") as f:
+        f.write(json.dumps({
+            "commit": git_commit(),
+            "measured_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": sys.version.split()[0],
+            "params": params,
+            "results": results,
+        }, ensure_ascii=False) + "\n")
+    print(f"💾 Sonuçlar eklendi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
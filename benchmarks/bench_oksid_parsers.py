@@ -0,0 +1,77 @@
+# Oksid sayfaları için HTML ayrıştırıcı backend'lerinin sayfa başına süre ve
+# bellek karşılaştırması (bs4, bs4-strainer, lxml, selectolax).
+#
+# Bellek tracemalloc ile ölçülür; yalnızca Python heap'ini görür, lxml/selectolax'ın
+# C tarafındaki ağaçları sayılmaz. Yine de bs4 ağacının maliyetini göstermeye yeter.
+#
+# Kullanım:
+#   python -m benchmarks.bench_oksid_parsers [--runs 20] [--fixtures-dir yol] [--backends bs4,lxml]
+import argparse
+import os
+import statistics
+import time
+import tracemalloc
+
+from scripts.oksid.parsing import BACKENDS, AUTO_ORDER
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "oksid")
+BASE_URL = "https://www.oksid.com.tr"
+
+
+def run_backend(backend, name, html, runs):
+    parse = (lambda: backend.menu(html, BASE_URL)) if name == "home" else (lambda: backend.parse(html, "Bench", BASE_URL))
+    result = parse()  # ısınma
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        parse()
+        timings.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    parse()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return timings, peak / 1024, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Oksid HTML ayrıştırıcı benchmark'ı")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--fixtures-dir", default=FIXTURES_DIR)
+    parser.add_argument("--backends", default=",".join(reversed(AUTO_ORDER)), help="Virgülle ayrılmış backend listesi")
+    args = parser.parse_args()
+
+    backends = {}
+    for name in args.backends.split(","):
+        try:
+            backends[name] = BACKENDS[name]()
+        except ImportError:
+            print(f"⚠️ '{name}' kurulu değil, atlanıyor.")
+
+    fixtures = sorted(f for f in os.listdir(args.fixtures_dir) if f.endswith(".html"))
+    medians = {name: [] for name in backends}
+    for fixture in fixtures:
+        with open(os.path.join(args.fixtures_dir, fixture), encoding="utf-8") as f:
+            html = f.read()
+        page_name = fixture[:-5]
+        print(f"📄 {fixture} ({len(html) / 1024:.0f} KB, {args.runs} tekrar)")
+        reference = None
+        for name, backend in backends.items():
+            timings, peak_kb, result = run_backend(backend, page_name, html, args.runs)
+            medians[name].append(statistics.median(timings))
+            # Tüm backend'ler ilk backend'le (varsayılan olarak bs4) aynı sonucu üretmeli
+            if reference is None:
+                reference = result
+            elif result != reference:
+                print(f"⚠️ Uyarı: {name} çıktısı {next(iter(backends))} ile farklı!")
+            print(f"   {name:<12} medyan {statistics.median(timings):7.2f} ms/sayfa | min {min(timings):7.2f} ms | tepe bellek {peak_kb:8.0f} KB")
+
+    if len(backends) > 1:
+        baseline = next(iter(backends))
+        base_total = sum(medians[baseline])
+        print(f"⚡ Toplam medyan süre, {baseline}'e göre:")
+        for name in list(backends)[1:]:
+            print(f"   {name:<12} {base_total / sum(medians[name]):5.1f}x daha hızlı")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# Ürün araması: `name ilike '%terim%'` taraması ile search_vector (GIN) indeksinin karşılaştırması.
+#
+# Sentetik bir ürün tablosu (varsayılan 500k satır) üretilir; search_text kolonu ingest'teki
+# gibi Python'da (scripts/shared/text.py::search_text) hesaplanıp COPY ile yüklenir,
+# search_vector + GIN indeksi migration'daki tanımla kurulur. Frontend'in her aramada
+# gönderdiği iki sorgu (count=exact ve ilk sayfa) her iki yöntemle EXPLAIN ANALYZE ile
+# ölçülür; terim başına medyan süre ve bulunan satır sayısı raporlanır. Satır sayıları
+# farklıysa ilike'ın bulup search_vector'ün kaçırdığı satır sayısı da gösterilir.
+#
+# Bağlantı: --dsn / BENCH_DATABASE_URL ile verilen Postgres'e `psql` ile bağlanılır
+# (tablo ayrı bir şemada kurulur, sonunda silinir). DSN yoksa ve pgserver paketi
+# kuruluysa geçici bir lokal Postgres açılır.
+#
+# Kullanım:
+#   python -m benchmarks.bench_search [--rows 500000] [--runs 5] [--dsn postgresql://...]
+#                                     [--output .cache/bench/search.jsonl]
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+from benchmarks.bench_offline import git_commit, previous_record
+from scripts.shared.text import fold, search_text
+
+OUTPUT = os.path.join(".cache", "bench", "search.jsonl")
+SCHEMA = "bench_search"
+PAGE_SIZE = 50
+# Kullanıcıların yazdığı türden terimler: marka, model kodu, Türkçe kelime (farklı yazımlarla), birim
+TERMS = [
+    "kingston", "SA400S37", "sa400s37/480g", "İŞLEMCİ", "islemci", "ekran karti", "rtx 4060", "480gb",
+    "logitech kablosuz", "27\" monitör", "ddr4 3200", "samsung 870", "çanta", "xyzzy-yok",
+    # ilike'ın bulduğu ama kelime öneki aramasının kaçırabileceği yazımlar: bitişik / kodun ortasından
+    "rtx4060", "a400", "400s37", "mz-77e500",
+]
+
+BRANDS = ["Kingston", "Samsung", "Asus", "MSI", "Logitech", "HP", "Lenovo", "Corsair", "Intel", "AMD", "Gigabyte", "Seagate"]
+KINDS = [
+    "SSD", "Harddisk", "Monitör", "Kablosuz Mouse", "Oyuncu Klavye", "Anakart", "Ekran Kartı", "DDR4 Bellek",
+    "İşlemci", "Notebook Çantası", "Güç Kaynağı", "Kasa Fanı", "USB Bellek", "Yazıcı Toneri",
+]
+# Model kodu terimlerinin de sonuç bulması için araya serpiştirilen gerçek adlar
+REAL_NAMES = [
+    'KINGSTON 480GB A400 SA400S37/480G 2.5" SATA3 SSD',
+    "Kingston A400 480 GB 2.5'' SATA 3 SSD Disk (SA400S37/480G)",
+    "MSI RTX-4060 VENTUS 2X BLACK 8GB GDDR6 Ekran Kartı",
+    "Samsung 870 EVO 500GB MZ-77E500BW SSD",
+    "İNTEL CORE İ5-12400F 2.5GHZ İŞLEMCİ",
+]
+EXTRAS = ["Siyah", "Beyaz", "RGB", "Gaming", "Pro", "Sessiz", "Kutulu", "2.5\"", "27\"", "3200MHz", "650W", "SATA3"]
+
+
+def synthetic_names(rows, seed=42):
+    """Gerçek adlara benzeyen, model kodu ve birim içeren deterministik ürün adları."""
+    rng = random.Random(seed)
+    for i in range(rows):
+        if i % 997 == 0:
+            yield REAL_NAMES[(i // 997) % len(REAL_NAMES)]
+            continue
+        code = f"{rng.choice('ABCDKLMSTX')}{rng.choice('ABCDKLMSTX')}{rng.randint(100, 9999)}{rng.choice(['', 'S37', 'F', 'X', 'K'])}"
+        if rng.random() < 0.4:
+            code += f"/{rng.choice([120, 240, 480, 960])}G"
+        capacity = f"{rng.choice([4, 8, 16, 32, 128, 256, 480, 512, 1000])}{rng.choice(['GB', ' GB', 'gb'])}"
+        rest = [capacity, code, rng.choice(KINDS), *rng.sample(EXTRAS, rng.randint(0, 3))]
+        rng.shuffle(rest)
+        yield " ".join([rng.choice(BRANDS), *rest])
+
+
+def search_query(term):
+    """Frontend'deki toSearchQuery (utils/search.ts) ile aynı çıktı."""
+    clauses = []
+    for token in dict.fromkeys(re.findall(r"[a-z0-9]+", fold(term))):
+        parts = re.findall(r"[a-z]+|[0-9]+", token)
+        if len(parts) < 2:
+            clauses.append(f"{token}:*")
+        else:
+            clauses.append(f"({token}:* | ({' & '.join(f'{p}:*' for p in parts)}))")
+    return " & ".join(clauses)
+
+
+# --- Postgres ---
+class Psql:
+    def __init__(self, psql, dsn):
+        self.psql = psql
+        self.dsn = dsn
+
+    def run(self, sql, stdin=None):
+        proc = subprocess.run(
+            [self.psql, self.dsn, "-X", "-q", "-A", "-t", "-v", "ON_ERROR_STOP=1", "-c", sql],
+            input=stdin, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"psql hatası: {proc.stderr.strip()}")
+        return proc.stdout.strip()
+
+    def explain_ms(self, sql):
+        plan = json.loads(self.run(f"explain (analyze, format json) {sql}"))
+        return plan[0]["Execution Time"]
+
+
+def connect(args):
+    """(Psql, kapatma fonksiyonu) döndürür."""
+    if args.dsn:
+        psql = shutil.which("psql")
+        if not psql:
+            sys.exit("❌ psql bulunamadı (PostgreSQL istemcisi kurulu olmalı).")
+        return Psql(psql, args.dsn), lambda: None
+    try:
+        import pgserver
+        from pgserver._commands import POSTGRES_BIN_PATH
+    except ImportError:
+        sys.exit("❌ --dsn / BENCH_DATABASE_URL verilmedi ve pgserver kurulu değil.")
+    workdir = tempfile.mkdtemp(prefix="bench-search-")
+    server = pgserver.get_server(workdir, cleanup_mode="delete")
+    print(f"🐘 Geçici lokal Postgres: {workdir}")
+    return Psql(str(POSTGRES_BIN_PATH / "psql"), server.get_uri()), server.cleanup
+
+
+def load(db, rows):
+    db.run(f"drop schema if exists {SCHEMA} cascade; create schema {SCHEMA};"
+           f"create table {SCHEMA}.products (id bigint generated always as identity primary key, name text, search_text text);")
+    start = time.perf_counter()
+    lines = []
+    for name in synthetic_names(rows):
+        lines.append(f"{name}\t{search_text(name)}")
+    ingest_seconds = time.perf_counter() - start
+    db.run(f"\\copy {SCHEMA}.products (name, search_text) from stdin", stdin="\n".join(lines) + "\n")
+
+    start = time.perf_counter()
+    # supabase/migrations/20261018090700_product_search.sql ile aynı tanım
+    db.run(f"alter table {SCHEMA}.products add column search_vector tsvector "
+           f"generated always as (to_tsvector('simple', coalesce(search_text, ''))) stored;"
+           f"create index on {SCHEMA}.products using gin (search_vector); analyze {SCHEMA}.products;")
+    index_seconds = time.perf_counter() - start
+    size = db.run(f"select pg_size_pretty(pg_relation_size('{SCHEMA}.products')) || ' / ' || "
+                  f"pg_size_pretty(pg_indexes_size('{SCHEMA}.products'))")
+    return {"ingest_us_per_row": 1e6 * ingest_seconds / rows, "index_build_seconds": index_seconds, "table_index_size": size}
+
+
+def measure(db, term, runs):
+    """Terim için (yöntem → medyan ms, bulunan satır) ölçümü."""
+    escaped = term.replace("'", "''")
+    filters = {
+        "ilike": f"name ilike '%{escaped}%'",
+        "search_vector": f"search_vector @@ to_tsquery('simple', '{search_query(term)}')",
+    }
+    result = {}
+    for method, where in filters.items():
+        if method == "search_vector" and not search_query(term):
+            continue
+        count_sql = f"select count(*) from {SCHEMA}.products where {where}"
+        page_sql = f"select * from {SCHEMA}.products where {where} limit {PAGE_SIZE}"
+        timings = []
+        for _ in range(runs):
+            timings.append(db.explain_ms(count_sql) + db.explain_ms(page_sql))
+        result[method] = {"ms": statistics.median(timings), "rows": int(db.run(count_sql))}
+    if "search_vector" in result:
+        # ilike'ın bulup search_vector'ün kaçırdığı satırlar (fazladan bulunanlar yazım farkı / kelime sırasıdır)
+        result["search_vector"]["missed"] = int(db.run(
+            f"select count(*) from {SCHEMA}.products where {filters['ilike']} and not ({filters['search_vector']})"))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ilike taraması ile search_vector indeksinin arama gecikmesi karşılaştırması")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--runs", type=int, default=5, help="Terim başına tekrar; medyan alınır")
+    parser.add_argument("--dsn", default=os.getenv("BENCH_DATABASE_URL"))
+    parser.add_argument("--output", default=OUTPUT)
+    args = parser.parse_args()
+
+    db, close = connect(args)
+    try:
+        print(f"📦 {args.rows} sentetik ürün yükleniyor...")
+        setup = load(db, args.rows)
+        print(f"   search_text: {setup['ingest_us_per_row']:.1f} µs/satır, indeks kurulumu {setup['index_build_seconds']:.1f} sn, "
+              f"tablo / indeks boyutu {setup['table_index_size']}")
+        results = {term: measure(db, term, args.runs) for term in TERMS}
+        db.run(f"drop schema if exists {SCHEMA} cascade")
+    finally:
+        close()
+
+    params = {"rows": args.rows, "runs": args.runs}
+    previous = previous_record(args.output, params)
+    print(f"📊 Arama benchmark'ı ({params}, commit {git_commit()}) — count + ilk {PAGE_SIZE} satır, medyan")
+    for term, r in results.items():
+        old, new = r["ilike"], r.get("search_vector")
+        line = f"   {term!r:<24} ilike {old['ms']:8.1f} ms ({old['rows']:6d} satır)"
+        if new:
+            line += f" | search_vector {new['ms']:7.1f} ms ({new['rows']:6d} satır) | x{old['ms'] / max(new['ms'], 0.001):.0f}"
+            if new["rows"] != old["rows"]:
+                line += f" | ⚠️ satır sayısı farklı ({new['rows'] - old['rows']:+d}, {new['missed']} kaçırılan)"
+        print(line)
+    totals = {m: sum(r[m]["ms"] for r in results.values() if m in r) for m in ("ilike", "search_vector")}
+    mismatched = [term for term, r in results.items() if "search_vector" in r and r["search_vector"]["rows"] != r["ilike"]["rows"]]
+    if mismatched:
+        print(f"   ⚠️ {len(mismatched)} terimde iki yöntemin bulduğu satır sayısı farklı: {', '.join(map(repr, mismatched))}")
+    missed = {term: r["search_vector"]["missed"] for term, r in results.items() if r.get("search_vector", {}).get("missed")}
+    if missed:
+        print(f"   ❗ search_vector'ün kaçırdığı satırlar: {', '.join(f'{t!r} {n}' for t, n in missed.items())}")
+    print(f"   toplam: ilike {totals['ilike']:.0f} ms, search_vector {totals['search_vector']:.0f} ms")
+    if previous:
+        before = previous["totals"]
+        print(f"   önceki ölçüm ({previous['commit']}): ilike {before['ilike']:.0f} ms, search_vector {before['search_vector']:.0f} ms")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "a", encoding="utf-8") as f:
+        f.write(json.dumps({
+            "commit": git_commit(),
+            "measured_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "params": params,
+            "setup": setup,
+            "totals": totals,
+            "row_count_mismatches": mismatched,
+            "results": results,
+        }, ensure_ascii=False) + "\n")
+    print(f"💾 Sonuçlar eklendi: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
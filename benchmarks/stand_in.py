@@ -0,0 +1,197 @@
+# Offline benchmark'lar için lokal sunucular:
+#   - Kaydedilmiş fixture'lardan üretilen Oksid / Bayinet / Denge siteleri
+#   - Yazılan satırları kaydeden sahte bir PostgREST (Supabase) endpoint'i
+#
+# Siteler fixture HTML'ini yol ve sayfa numarasına göre yeniden yazar (benzersiz ürün
+# anahtarları, sonraki sayfa linkleri, toplam ürün sayısı); böylece tek bir kayıtlı
+# sayfadan istenen büyüklükte deterministik bir site elde edilir.
+import os
+import re
+import csv
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _read(*parts):
+    with open(os.path.join(FIXTURES_DIR, *parts), encoding="utf-8") as f:
+        return f.read()
+
+
+class _Server:
+    """Arka plan thread'inde çalışan küçük HTTP sunucusu; istek ve byte sayaçlarını tutar."""
+
+    def __init__(self, handle):
+        self.stats = {"requests": 0, "bytes": 0}
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, payload, content_type = handle(self.command, self.path, self.headers, body)
+                data = payload.encode("utf-8") if isinstance(payload, str) else payload
+                with server._lock:
+                    server.stats["requests"] += 1
+                    server.stats["bytes"] += len(data) + len(body)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = _respond
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {"requests": 0, "bytes": 0}
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+HTML = "text/html; charset=utf-8"
+NOT_FOUND = (404, "not found", "text/plain")
+
+
+# --- Oksid ---
+def oksid_site(pages_per_listing=3):
+    """
+    Ana sayfa menüsü -> ara kategori (product45 blokları) -> liste sayfaları.
+    /kategori/<a> ara kategori, /kategori/<a>-<b> yaprak liste sayfasıdır.
+    """
+    home, category, listing = _read("oksid", "home.html"), _read("oksid", "category.html"), _read("oksid", "listing.html")
+    next_link = re.compile(r'<a class="next"[^>]*>.*?</a>')
+
+    def handle(method, path, headers, body):
+        parsed = urlparse(path)
+        if parsed.path == "/":
+            return 200, home, HTML
+        match = re.fullmatch(r"/kategori/([\w-]+)", parsed.path)
+        if not match:
+            return NOT_FOUND
+        slug = match.group(1)
+        if "-" not in slug:
+            return 200, category.replace('href="/kategori/1-', f'href="/kategori/{slug}-'), HTML
+        page = int(parse_qs(parsed.query).get("page", ["1"])[0])
+        html = listing.replace('href="/urun/', f'href="/urun/{slug}-p{page}-')
+        nxt = f'<a class="next" href="{parsed.path}?page={page + 1}">Sonraki</a>' if page < pages_per_listing else ""
+        return 200, next_link.sub(nxt, html), HTML
+    return _Server(handle)
+
+
+# --- Bayinet ---
+def bayinet_site(pages_per_category=5):
+    """Product/Index?searchModel=... isteğine kategori/sayfaya özel ürün kimlikleriyle cevap verir."""
+    fixture = _read("bayinet", "product_index.html")
+    cards_per_page = fixture.count('class="product-list__item grid-item"')
+    total = cards_per_page * pages_per_category
+
+    def handle(method, path, headers, body):
+        parsed = urlparse(path)
+        if parsed.path != "/Product/Index":
+            return NOT_FOUND
+        model = json.loads(parse_qs(parsed.query)["searchModel"][0])
+        category_id, page = model["Categories"][0], int(model["PageNumber"])
+        if page >= pages_per_category:
+            return 200, f'<div class="product-list grid" data-total-count="{total}"></div>', HTML
+        html = fixture.replace("ProductId=", f"ProductId={category_id}{page:03d}")
+        html = html.replace('<div class="product-list grid">', f'<div class="product-list grid" data-total-count="{total}">', 1)
+        return 200, html, HTML
+    return _Server(handle)
+
+
+# --- Denge ---
+def denge_site(pages_per_category=3):
+    """/kategori/<ad>?page=N; son sayfaya kadar rel=next linki verilir."""
+    fixture = _read("denge", "category.html")
+    next_link = re.compile(r'<a class="js_pagelink" rel="next"[^>]*>.*?</a>')
+
+    def handle(method, path, headers, body):
+        parsed = urlparse(path)
+        match = re.fullmatch(r"/kategori/(\w+)", parsed.path)
+        if not match:
+            return NOT_FOUND
+        name = match.group(1)
+        page = int(parse_qs(parsed.query).get("page", ["1"])[0])
+        html = fixture.replace('data-pid="', f'data-pid="{name}{page:03d}')
+        nxt = f'<a class="js_pagelink" rel="next" href="?page={page + 1}">Sonraki</a>' if page < pages_per_category else ""
+        return 200, next_link.sub(nxt, html), HTML
+    return _Server(handle)
+
+
+# --- Sahte PostgREST ---
+TABLE_KEYS = {"oksid_products": "url", "bayinet_products": "product_id", "denge_products": "product_id"}
+
+
+def fake_postgrest(latency_ms=0):
+    """
+    sync_engine'in kullandığı üç çağrıyı taklit eder: merge_products RPC'si, upsert
+    (POST ?on_conflict=) ve anahtar listesiyle select (GET ?<key>=in.(...)).
+    Satırlar bellekte tutulur; latency_ms her isteğe sabit ağ gecikmesi ekler.
+    """
+    tables = {}
+    written = {"rows": 0, "changed": 0}
+    lock = threading.Lock()
+
+    def store(table, key, rows):
+        changed = 0
+        with lock:
+            current = tables.setdefault(table, {})
+            for row in rows:
+                old = current.get(row.get(key))
+                if old is None or old.get("fingerprint") != row.get("fingerprint"):
+                    changed += 1
+                current[row.get(key)] = row
+            written["rows"] += len(rows)
+            written["changed"] += changed
+        return changed
+
+    def handle(method, path, headers, body):
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+        parsed = urlparse(path)
+        query = parse_qs(parsed.query)
+        name = parsed.path.rsplit("/", 1)[-1]
+        if method == "POST" and parsed.path.endswith("/rpc/merge_products"):
+            payload = json.loads(body)
+            return 200, json.dumps(store(payload["p_table"], TABLE_KEYS[payload["p_table"]], payload["p_rows"])), "application/json"
+        if method == "POST":
+            rows = json.loads(body)
+            rows = rows if isinstance(rows, list) else [rows]
+            store(name, query.get("on_conflict", [TABLE_KEYS.get(name)])[0], rows)
+            return 201, json.dumps(rows), "application/json"
+        if method == "GET":
+            key = TABLE_KEYS.get(name)
+            wanted = query.get(key, [""])[0]
+            if not wanted.startswith("in.("):
+                return 200, "[]", "application/json"
+            values = next(csv.reader([wanted[4:-1]], quotechar='"'))
+            columns = query.get("select", ["*"])[0].split(",")
+            with lock:
+                current = tables.get(name, {})
+                found = [current[v] for v in values if v in current]
+            if columns != ["*"]:
+                found = [{c: row.get(c) for c in columns} for row in found]
+            return 200, json.dumps(found), "application/json"
+        return NOT_FOUND
+
+    server = _Server(handle)
+    server.written = written
+    server.tables = tables
+    return server
@@ -462,6 +462,7 @@ function App() {
                       {[
                         { value: "price-low", label: "Fiyat ↑" },
                         { value: "price-high", label: "Fiyat ↓" },
+                        { value: "stock-high", label: "Stok ↓" },
                       ].map((option) => (
                         <button
                           key={option.value}
@@ -5,78 +5,7 @@ import { Search, BarChart3, ExternalLink, Globe, Copy, X } from "lucide-react";
 import { supabase } from "../lib/supabase";
 import WebSearchResultsModal from "./WebSearchResultsModal";
 import { ShoppingResult } from "../types"; // <-- Ortak tipler dosyasından import edildi
-
-// Stok kontrol fonksiyonları (products.ts ile aynı)
-function toBoolStock(val: any): boolean {
-  const s = String(val ?? "")
-    .trim()
-    .toLowerCase();
-
-  if (!s) return true;
-
-  const falsy = new Set([
-    "0",
-    "false",
-    "no",
-    "hayir",
-    "yok",
-    "out",
-    "stok yok",
-    "stokta yok",
-    "yoktur",
-    "stok bulunmamaktadır",
-    "mevcut değil",
-  ]);
-
-  return !falsy.has(s);
-}
-
-function toBoolStockBayinet(val: any): boolean {
-  const s = String(val ?? "").trim();
-
-  if (!s) return true;
-
-  const depots = s.split("|").map((d) => d.trim());
-  let totalStock = 0;
-
-  for (const depot of depots) {
-    const match = depot.match(/[(\(](\d+)[)\)]/);
-    if (match && match[1]) {
-      totalStock += parseInt(match[1], 10);
-    }
-  }
-
-  return totalStock > 0;
-}
-
-function toBoolStockDenge(val: any): boolean {
-  if (val === null || val === undefined) return false;
-
-  const stockNum = Number(val);
-
-  if (!isNaN(stockNum)) {
-    return stockNum > 0;
-  }
-
-  const s = String(val).trim().toLowerCase();
-  if (!s) return false;
-
-  const falsy = new Set([
-    "0",
-    "false",
-    "no",
-    "hayir",
-    "yok",
-    "out",
-    "stok yok",
-    "stokta yok",
-    "yoktur",
-    "stok bulunmamaktadır",
-    "mevcut değil",
-  ]);
-
-  return !falsy.has(s);
-}
+import { toSearchQuery } from "../utils/search";
 
 // Tipler ve Interface'ler
 interface ComparisonResult {
@@ -129,15 +58,19 @@ const ComparisonTab: React.FC = () => {
     setIsSearching(true);
     try {
       const searchTerm = searchQuery.trim();
+      // İndeksli arama kolonu (search_vector) üzerinden kelime öneki araması;
+      // sonuçlar para biriminden bağımsız olarak TL karşılığına (price_try) göre ucuzdan pahalıya gelir
+      const tsQuery = toSearchQuery(searchTerm);
+      if (!tsQuery) return;
 
       const { data: oksidData } = await supabase
         .from("oksid_products")
-        .select("name, price_2, price_1, currency, url, stock")
-        .ilike("name", `%${searchTerm}%`);
+        .select("name, price_2, price_1, currency, url, in_stock")
+        .textSearch("search_vector", tsQuery, { config: "simple" })
+        .order("price_try", { ascending: true, nullsFirst: false });
 
       const oksidResults: ComparisonResult[] = (oksidData || []).map((item) => {
-        // Oksid stok kontrolü: toBoolStock fonksiyonu ile
-        const available = toBoolStock(item.stock);
+        const available = Boolean(item.in_stock);
 
         return {
           marketplace: "Oksid",
@@ -151,12 +84,12 @@ const ComparisonTab: React.FC = () => {
 
       const { data: pentaData } = await supabase
         .from("bayinet_products")
-        .select("name, price, currency, url, stock_info")
-        .ilike("name", `%${searchTerm}%`);
+        .select("name, price, currency, url, in_stock")
+        .textSearch("search_vector", tsQuery, { config: "simple" })
+        .order("price_try", { ascending: true, nullsFirst: false });
 
       const pentaResults: ComparisonResult[] = (pentaData || []).map((item) => {
-        // Bayinet stok kontrolü: toBoolStockBayinet fonksiyonu ile
-        const available = toBoolStockBayinet(item.stock_info);
+        const available = Boolean(item.in_stock);
 
         return {
           marketplace: "Penta",
@@ -175,12 +108,12 @@ const ComparisonTab: React.FC = () => {
 
       const { data: dengeData } = await supabase
         .from("denge_products")
-        .select("name, special_price, list_price, currency, stock_info, url")
-        .ilike("name", `%${searchTerm}%`);
+        .select("name, special_price, list_price, currency, in_stock, url")
+        .textSearch("search_vector", tsQuery, { config: "simple" })
+        .order("price_try", { ascending: true, nullsFirst: false });
 
       const dengeResults: ComparisonResult[] = (dengeData || []).map((item) => {
-        // Denge stok kontrolü: toBoolStockDenge fonksiyonu ile
-        const available = toBoolStockDenge(item.stock_info);
+        const available = Boolean(item.in_stock);
 
         return {
           marketplace: "Denge",
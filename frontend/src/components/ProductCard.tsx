@@ -8,6 +8,42 @@ interface ProductCardProps {
   tabType: string;
 }
 
+// Günlük kapanış fiyatlarından küçük bir çizgi grafik (pencere başındaki fiyattan başlar)
+const PriceSparkline: React.FC<{
+  points: { day: string; price: number }[];
+  startPrice?: number;
+}> = ({ points, startPrice }) => {
+  const prices = [
+    ...(startPrice !== undefined ? [startPrice] : []),
+    ...points.map((p) => p.price),
+  ];
+  if (prices.length < 2) return null;
+
+  const width = 64;
+  const height = 18;
+  const min = Math.min(...prices);
+  const range = Math.max(...prices) - min || 1;
+  const path = prices
+    .map((price, i) => {
+      const x = (i / (prices.length - 1)) * width;
+      const y = height - ((price - min) / range) * height;
+      return `${i === 0 ? "M" : "L"}${x.toFixed(1)},${y.toFixed(1)}`;
+    })
+    .join(" ");
+  const falling = prices[prices.length - 1] < prices[0];
+
+  return (
+    <svg width={width} height={height} className="overflow-visible">
+      <path
+        d={path}
+        fill="none"
+        strokeWidth={1.5}
+        className={falling ? "stroke-green-400" : "stroke-orange-400"}
+      />
+    </svg>
+  );
+};
+
 const ProductCard: React.FC<ProductCardProps> = ({ product, tabType }) => {
   const [isHovered, setIsHovered] = useState(false);
   const [isFavorited, setIsFavorited] = useState(false);
@@ -189,7 +225,13 @@ const ProductCard: React.FC<ProductCardProps> = ({ product, tabType }) => {
             ) : (
               <X className="w-3 h-3" />
             )}
-            <span>{product.inStock ? "Stokta" : "Stok Yok"}</span>
+            <span>
+              {product.inStock
+                ? product.stockQty != null
+                  ? `Stokta (${product.stockQty})`
+                  : "Stokta"
+                : "Stok Yok"}
+            </span>
           </div>
 
           {/* Quick Actions */}
@@ -283,8 +325,8 @@ const ProductCard: React.FC<ProductCardProps> = ({ product, tabType }) => {
                 </p>
               )}
 
-              {/* USD conversion for TRY prices */}
-              {tryToUsd &&
+              {/* USD conversion for TRY prices (ETL'in yazdığı price_usd, yoksa güncel kur) */}
+              {(product.priceUsd != null || tryToUsd) &&
                 (isTRYCurrency(product.currency) ||
                   (product.priceText && /₺|tl/i.test(product.priceText))) && (
                   <div className="text-sm text-gray-400 mt-1">
@@ -292,7 +334,7 @@ const ProductCard: React.FC<ProductCardProps> = ({ product, tabType }) => {
                       ? Intl.NumberFormat("en-US", {
                           style: "currency",
                           currency: "USD",
-                        }).format(product.price * tryToUsd)
+                        }).format(product.priceUsd ?? product.price * (tryToUsd ?? 0))
                       : ""}
                   </div>
                 )}
@@ -340,6 +382,33 @@ const ProductCard: React.FC<ProductCardProps> = ({ product, tabType }) => {
                     </div>
                   </div>
                 )}
+
+              {/* 30 günlük fiyat seyri (price_history_daily) */}
+              {product.priceTrend && product.priceTrend.changes > 0 && (
+                <div className="flex items-center space-x-2 mt-2 text-xs text-gray-400">
+                  <PriceSparkline
+                    points={product.priceTrend.points}
+                    startPrice={product.priceTrend.startPrice}
+                  />
+                  <span>
+                    30 gün: en düşük{" "}
+                    {product.priceTrend.low.toLocaleString("tr-TR", {
+                      minimumFractionDigits: 2,
+                    })}
+                    {" · "}en yüksek{" "}
+                    {product.priceTrend.high.toLocaleString("tr-TR", {
+                      minimumFractionDigits: 2,
+                    })}{" "}
+                    {product.currency || "₺"}
+                  </span>
+                  {product.price <= product.priceTrend.low &&
+                    product.priceTrend.low < product.priceTrend.high && (
+                      <span className="text-green-400 font-semibold">
+                        En düşük seviyede
+                      </span>
+                    )}
+                </div>
+              )}
             </div>
           </div>
 
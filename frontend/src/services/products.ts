@@ -1,90 +1,6 @@
 import { supabase } from "../lib/supabase";
 import type { Product, TabType } from "../types";
-
-// Oksid ve Denge için stok kontrolü
-function toBoolStock(val: any): boolean {
-  const s = String(val ?? "")
-    .trim()
-    .toLowerCase();
-  
-  // Boş değer → stokta var kabul et
-  if (!s) return true;
-  
-  // "Stokta Yok" veya benzer ifadeleri kontrol et
-  const falsy = new Set([
-    "0",
-    "false",
-    "no",
-    "hayir",
-    "yok",
-    "out",
-    "stok yok",
-    "stokta yok",
-    "yoktur",
-    "stok bulunmamaktadır",
-    "mevcut değil",
-  ]);
-  
-  return !falsy.has(s);
-}
-
-// Bayinet/Penta için özel stok kontrolü
-function toBoolStockBayinet(val: any): boolean {
-  const s = String(val ?? "").trim();
-  
-  // Boş değer → stokta var kabul et
-  if (!s) return true;
-  
-  // Tüm depoları ayır ("|" ile ayrılmış)
-  const depots = s.split("|").map(d => d.trim());
-  
-  // Her depodaki stok miktarını topla
-  let totalStock = 0;
-  
-  for (const depot of depots) {
-    // "Merkez (0)" veya "Dış depo (13)" gibi formatlardan sayıyı çıkar
-    // Hem büyük hem küçük parantez destekle: (0) veya （0）
-    const match = depot.match(/[(\(](\d+)[)\)]/);
-    if (match && match[1]) {
-      totalStock += parseInt(match[1], 10);
-    }
-  }
-  
-  // Toplam stok 0'dan büyükse stokta var
-  return totalStock > 0;
-}
-
-// Denge için sayısal stok kontrolü
-function toBoolStockDenge(val: any): boolean {
-  // Null veya undefined → stokta yok
-  if (val === null || val === undefined) return false;
-  
-  // Sayıya çevir
-  const stockNum = Number(val);
-  
-  // NaN değilse ve 0'dan büyükse stokta var
-  if (!isNaN(stockNum)) {
-    return stockNum > 0;
-  }
-  
-  // Sayı değilse string kontrolü yap (eski veriler için)
-  const s = String(val).trim().toLowerCase();
-  if (!s) return false;
-  
-  const falsy = new Set([
-    "0",
-    "false",
-    "no",
-    "hayir",
-    "yok",
-    "out",
-    "stok yok",
-    "stokta yok",
-    "yoktur",
-  ]);
-  
-  return !falsy.has(s);
-}
+import { toSearchQuery } from "../utils/search";
 
 // Bayinet category code mapping
 const BAYINET_CATEGORY_MAP: Record<string, string> = {
@@ -135,11 +51,13 @@ const oksidMapper = (row: any): Product => ({
   rating: 0,
   reviews: 0,
   description: "",
-  inStock: toBoolStock(row.stock),
+  inStock: Boolean(row.in_stock),
   url: row.url ?? undefined,
   currency: row.currency ?? undefined,
   priceText: undefined,
   lastPrice: row.last_price ? Number(row.last_price) : undefined,
+  priceTry: row.price_try != null ? Number(row.price_try) : undefined,
+  priceUsd: row.price_usd != null ? Number(row.price_usd) : undefined,
   marketplace: "oksid",
 });
 
@@ -155,7 +73,9 @@ const bayinetMapper = (row: any): Product => ({
   rating: 0,
   reviews: 0,
   description: "",
-  inStock: toBoolStockBayinet(row.stock_info),
+  inStock: Boolean(row.in_stock),
+  stockQty: row.stock_qty ?? undefined,
+  stockDepots: row.stock_depots ?? undefined,
   url: row.url ?? undefined,
   currency: row.currency ?? undefined,
   priceText:
@@ -163,6 +83,8 @@ const bayinetMapper = (row: any): Product => ({
       ? `${Number(row.price).toLocaleString("tr-TR", { minimumFractionDigits: 2 })} ${row.currency ?? ""}`
       : undefined,
   lastPrice: row.last_price ? Number(row.last_price) : undefined,
+  priceTry: row.price_try != null ? Number(row.price_try) : undefined,
+  priceUsd: row.price_usd != null ? Number(row.price_usd) : undefined,
   marketplace: "penta",
 });
 
@@ -176,18 +98,78 @@ const dengeMapper = (row: any): Product => ({
   rating: 0,
   reviews: 0,
   description: "",
-  inStock: toBoolStockDenge(row.stock_info),
+  inStock: Boolean(row.in_stock),
+  stockQty: row.stock_qty ?? undefined,
   url: row.url ?? undefined,
   currency: row.currency ?? undefined,
   priceText: row.special_price
     ? `${row.special_price} ${row.currency ?? ""}`
     : undefined,
   lastPrice: row.last_price ? Number(row.last_price) : undefined,
+  priceTry: row.price_try != null ? Number(row.price_try) : undefined,
+  priceUsd: row.price_usd != null ? Number(row.price_usd) : undefined,
   marketplace: "denge",
 });
 
+// 📊 marketplace_stats: her scraper çalıştırmasının sonunda yazılan kategori / stok özetleri.
+// category = "*" satırı pazaryerinin toplamıdır. Aynı sekme için kategori listesi ve
+// "son güncelleme" aynı isteği paylaşsın diye sonuç kısa süre bellekte tutulur.
+export interface MarketplaceStatsRow {
+  category: string;
+  product_count: number;
+  in_stock_count: number;
+  run_started_at: string | null;
+  run_finished_at: string;
+}
+
+const STATS_TTL = 1000 * 60; // 1 dakika
+const statsCache = new Map<string, { ts: number; rows: Promise<MarketplaceStatsRow[]> }>();
+
+export function fetchMarketplaceStats(tab: TabType): Promise<MarketplaceStatsRow[]> {
+  const marketplace = DB_MARKETPLACE[tab];
+  if (!marketplace) return Promise.resolve([]);
+
+  const cached = statsCache.get(marketplace);
+  if (cached && Date.now() - cached.ts < STATS_TTL) return cached.rows;
+
+  const rows = (async () => {
+    const { data, error } = await supabase
+      .from("marketplace_stats")
+      .select("category,product_count,in_stock_count,run_started_at,run_finished_at")
+      .eq("marketplace", marketplace);
+    if (error) {
+      // Tablo henüz yoksa çağıranlar eski yönteme döner
+      console.warn("[fetchMarketplaceStats] marketplace_stats okunamadı:", error.message);
+      statsCache.delete(marketplace);
+      return [];
+    }
+    return (data || []) as MarketplaceStatsRow[];
+  })();
+  statsCache.set(marketplace, { ts: Date.now(), rows });
+  return rows;
+}
+
+const formatLastUpdated = (date: Date): string =>
+  date.toLocaleString("tr-TR", {
+    year: "numeric",
+    month: "2-digit",
+    day: "2-digit",
+    hour: "2-digit",
+    minute: "2-digit",
+  });
+
 // Fetch last updated date for a specific marketplace
 export async function fetchLastUpdatedDate(tabType: TabType): Promise<string | null> {
+  const total = (await fetchMarketplaceStats(tabType)).find((r) => r.category === "*");
+  if (total?.run_finished_at) {
+    // timestamptz olduğu için saat dilimi düzeltmesi gerekmez
+    return formatLastUpdated(new Date(total.run_finished_at));
+  }
+  return fetchLastUpdatedFromTable(tabType);
+}
+
+// Özet henüz yazılmamışsa: ürün tablosundaki en yeni last_updated
+async function fetchLastUpdatedFromTable(tabType: TabType): Promise<string | null> {
   const tableConfig = TABLES[tabType];
   if (!tableConfig) {
     console.log(`[fetchLastUpdatedDate] No table config for ${tabType}`);
@@ -247,13 +229,7 @@ export async function fetchLastUpdatedDate(tabType: TabType): Promise<string | n
     }
     
     // Format the date to Turkish locale
-    const formatted = date.toLocaleString("tr-TR", {
-      year: "numeric",
-      month: "2-digit",
-      day: "2-digit",
-      hour: "2-digit",
-      minute: "2-digit",
-    });
+    const formatted = formatLastUpdated(date);
     
     console.log(`[fetchLastUpdatedDate] Formatted date for ${tabType}:`, formatted);
     return formatted;
@@ -271,24 +247,80 @@ const TABLES: Record<
   oksid: {
     table: "oksid_products",
     select:
-      "id,name,url,price_1,price_2,currency,stock,category,last_updated,last_price",
+      "id,name,url,price_1,price_2,price_try,price_usd,currency,stock,in_stock,category,last_updated,last_price",
     mapper: oksidMapper,
   },
   penta: {
     table: "bayinet_products",
     select:
-      "product_id,name,url,category_id,price,currency,stock_info,last_updated,last_price",
+      "product_id,name,url,category_id,price,price_try,price_usd,currency,stock_info,in_stock,stock_qty,stock_depots,last_updated,last_price",
     mapper: bayinetMapper,
   },
   denge: {
     table: "denge_products",
     select:
-      "id,product_id,name,category,special_price,list_price,currency,stock_info,last_updated,url,last_price",
+      "id,product_id,name,category,special_price,list_price,price_try,price_usd,currency,stock_info,in_stock,stock_qty,last_updated,url,last_price",
     mapper: dengeMapper,
   },
   comparison: null,
 };
 
+// 📈 price_history / marketplace_stats tablolarındaki marketplace adları ve ürün anahtarları
+const DB_MARKETPLACE: Partial<Record<TabType, string>> = {
+  oksid: "oksid",
+  penta: "bayinet",
+  denge: "denge",
+};
+
+const historyKey = (tab: TabType, product: Product): string | undefined =>
+  tab === "oksid" ? product.url : product.id;
+
+// Sayfadaki ürünlerin son `days` gündeki fiyat seyrini tek RPC çağrısıyla ekler.
+// Ham geçmiş taranmaz; price_trends fonksiyonu günlük özet tablosundan okur.
+export async function attachPriceTrends(
+  tab: TabType,
+  items: Product[],
+  days = 30
+): Promise<Product[]> {
+  const marketplace = DB_MARKETPLACE[tab];
+  const keys = items
+    .map((p) => historyKey(tab, p))
+    .filter((k): k is string => !!k);
+  if (!marketplace || keys.length === 0) return items;
+
+  const { data, error } = await supabase.rpc("price_trends", {
+    p_marketplace: marketplace,
+    p_keys: keys,
+    p_days: days,
+  });
+  if (error) {
+    // Geçmiş tablosu henüz yoksa ürünler trend bilgisi olmadan gösterilir
+    console.warn("[attachPriceTrends] price_trends çağrısı başarısız:", error.message);
+    return items;
+  }
+
+  const byKey = new Map<string, any>(
+    ((data || []) as any[]).map((row) => [String(row.product_key), row])
+  );
+  return items.map((p) => {
+    const row = byKey.get(historyKey(tab, p) ?? "");
+    if (!row || row.min_price == null) return p;
+    return {
+      ...p,
+      priceTrend: {
+        low: Number(row.min_price),
+        high: Number(row.max_price),
+        startPrice: row.start_price != null ? Number(row.start_price) : undefined,
+        changes: Number(row.changes ?? 0),
+        points: ((row.points || []) as any[]).map((pt) => ({
+          day: String(pt.day),
+          price: Number(pt.price),
+        })),
+      },
+    };
+  });
+}
+
 // 🔑 Ana fetch fonksiyonu
 const BAYINET_LABEL_TO_CODE: Record<string, string> = Object.fromEntries(
   Object.entries(BAYINET_CATEGORY_MAP).map(([code, label]) => [label, code])
@@ -322,22 +354,18 @@ export async function fetchProductsByTab(
   const from = (page - 1) * pageSize;
   const to = from + pageSize - 1;
 
-  // Penta için özel durum: onlyInStock aktifse daha fazla veri çek (client-side filtreleme için)
-  const isPentaWithStockFilter = tab === "penta" && opts?.onlyInStock;
-  const fetchMultiplier = isPentaWithStockFilter ? 10 : 1; // 10x daha fazla veri çek (min 50 stoklu ürün garantisi için)
-  const adjustedTo = isPentaWithStockFilter ? from + (pageSize * fetchMultiplier) - 1 : to;
-
   // Primary fetch with exact count and range
   let query = supabase.from(cfg.table).select(cfg.select, { count: "exact" });
 
   // Apply filters
-  const search = opts?.search?.trim();
+  // Arama ad üzerinde ilike ile değil, indeksli search_vector kolonunda kelime öneki olarak yapılır
+  const search = toSearchQuery(opts?.search ?? "");
   const category = opts?.category;
   const sort = opts?.sort;
   const onlyInStock = opts?.onlyInStock;
 
   if (search) {
-    query = query.ilike("name", `%${search}%`);
+    query = query.textSearch("search_vector", search, { config: "simple" });
   }
   if (category && category !== "all") {
     if (tab === "penta") {
@@ -348,29 +376,29 @@ export async function fetchProductsByTab(
     }
   }
 
-  // Server-side stock filtering (Penta hariç - o client-side yapılacak)
-  if (onlyInStock && tab !== "penta") {
-    if (tab === "oksid") {
-      // Oksid: stock NOT IN ('Stokta Yok', 'yok', etc.)
-      query = query.not("stock", "ilike", "%stokta yok%").not("stock", "ilike", "%yok%");
-    } else if (tab === "denge") {
-      // Denge: stock_info > 0
-      query = query.gt("stock_info", 0);
-    }
+  // Stok filtresi: in_stock ingest sırasında doldurulur (scripts/shared/stock.py), tüm sekmelerde sunucu tarafında
+  if (onlyInStock) {
+    query = query.eq("in_stock", true);
   }
 
-  // Apply sorting
-  if (sort === "price-low") {
+  // Apply sorting: farklı para birimlerindeki fiyatlar TL karşılığına (price_try) göre sıralanır;
+  // kur snapshot'ı henüz uygulanmamış satırlar için pazaryerinin kendi fiyat kolonu ikinci sıralamadır
+  if (sort === "price-low" || sort === "price-high") {
+    const ascending = sort === "price-low";
     const priceCol =
       tab === "oksid" ? "price_2" : tab === "penta" ? "price" : "special_price";
-    query = query.order(priceCol, { ascending: true });
-  } else if (sort === "price-high") {
-    const priceCol =
-      tab === "oksid" ? "price_2" : tab === "penta" ? "price" : "special_price";
-    query = query.order(priceCol, { ascending: false });
+    query = query
+      .order("price_try", { ascending, nullsFirst: false })
+      .order(priceCol, { ascending });
+  } else if (sort === "stock-high") {
+    // Oksid stok adedi vermez (stock_qty hep boş); orada stoktakiler öne alınır
+    query =
+      tab === "oksid"
+        ? query.order("in_stock", { ascending: false, nullsFirst: false })
+        : query.order("stock_qty", { ascending: false, nullsFirst: false });
   }
 
-  let { data, error, count } = await query.range(from, adjustedTo);
+  let { data, error, count } = await query.range(from, to);
 
   // Fallback for Penta/Bayinet in case of column mismatch
   if (error && tab === "penta") {
@@ -381,7 +409,7 @@ export async function fetchProductsByTab(
     );
     let altQuery = supabase.from(cfg.table).select("*", { count: "exact" });
     if (search) {
-      altQuery = altQuery.ilike("name", `%${search}%`);
+      altQuery = altQuery.textSearch("search_vector", search, { config: "simple" });
     }
     if (category && category !== "all") {
       if (tab === "penta") {
@@ -391,11 +419,17 @@ export async function fetchProductsByTab(
         altQuery = altQuery.eq("category", category);
       }
     }
+    if (onlyInStock) {
+      altQuery = altQuery.eq("in_stock", true);
+    }
     // Apply sorting to fallback (penta only in this block)
-    if (sort === "price-low") {
-      altQuery = altQuery.order("price", { ascending: true });
-    } else if (sort === "price-high") {
-      altQuery = altQuery.order("price", { ascending: false });
+    if (sort === "price-low" || sort === "price-high") {
+      const ascending = sort === "price-low";
+      altQuery = altQuery
+        .order("price_try", { ascending, nullsFirst: false })
+        .order("price", { ascending });
+    } else if (sort === "stock-high") {
+      altQuery = altQuery.order("stock_qty", { ascending: false, nullsFirst: false });
     }
     const alt = await altQuery.range(from, to);
     data = alt.data as any[] | null;
@@ -405,56 +439,29 @@ export async function fetchProductsByTab(
 
   if (error) throw error;
 
-  // Map products
   let items = (data || []).map(cfg.mapper);
-  
-  // Client-side filtering for Penta (depot parsing server-side yapılamıyor)
-  if (onlyInStock && tab === "penta") {
-    items = items.filter(product => product.inStock);
-    
-    // Eğer yeterli stoklu ürün yoksa, daha fazla veri çek
-    let currentOffset = adjustedTo + 1;
-    const maxAttempts = 5; // Maksimum 5 ek batch
-    let attempts = 0;
-    
-    while (items.length < pageSize && attempts < maxAttempts && currentOffset < (count ?? 0)) {
-      attempts++;
-      const batchSize = pageSize * 10;
-      const batchTo = currentOffset + batchSize - 1;
-      
-      let extraQuery = supabase.from(cfg.table).select(cfg.select);
-      
-      // Aynı filtreleri uygula
-      if (search) {
-        extraQuery = extraQuery.ilike("name", `%${search}%`);
-      }
-      if (category && category !== "all") {
-        const code = resolvePentaCategoryCodeFromDisplay(category);
-        if (code) extraQuery = extraQuery.eq("category_id", code);
-      }
-      if (sort === "price-low") {
-        extraQuery = extraQuery.order("price", { ascending: true });
-      } else if (sort === "price-high") {
-        extraQuery = extraQuery.order("price", { ascending: false });
-      }
-      
-      const { data: extraData } = await extraQuery.range(currentOffset, batchTo);
-      if (!extraData || extraData.length === 0) break;
-      
-      const extraItems = extraData.map(cfg.mapper).filter(product => product.inStock);
-      items = items.concat(extraItems);
-      currentOffset = batchTo + 1;
-    }
-    
-    // İstenen sayıda ürün al
-    items = items.slice(0, pageSize);
-  }
+
+  items = await attachPriceTrends(tab, items);
 
   return { items, total: count ?? 0 };
 }
 
-// 🔎 Kategori listesi: tüm veritabanını sayfalayarak kategorileri toplayıp eşsiz hale getirir
+// 🔎 Kategori listesi: marketplace_stats özetinden tek sorguyla okunur
 export async function fetchCategoriesByTab(tab: TabType): Promise<string[]> {
+  const rows = (await fetchMarketplaceStats(tab)).filter((r) => r.category !== "*");
+  if (rows.length === 0) return fetchCategoriesByScan(tab);
+
+  const set = new Set(
+    rows.map((r) =>
+      // Bayinet: bilinmeyen kodları ayırt etmek için "Diğer (XX)" olarak göster
+      tab === "penta" ? formatBayinetCategoryDisplay(r.category) : r.category
+    )
+  );
+  return Array.from(set).sort((a, b) => a.localeCompare(b, "tr"));
+}
+
+// Özet henüz yazılmamışsa: tüm veritabanını sayfalayarak kategorileri toplayıp eşsiz hale getirir
+async function fetchCategoriesByScan(tab: TabType): Promise<string[]> {
   const cfg = TABLES[tab];
   if (!cfg) return [];
 
@@ -11,6 +11,15 @@ export interface BaseProduct {
   marketplace?: string; // Ürünün hangi marketplace'den geldiği (oksid, penta, denge)
 }
 
+// Fiyat geçmişi özeti (price_history_daily → price_trends RPC, son 30 gün)
+export interface PriceTrend {
+  low: number; // Pencere içindeki en düşük fiyat
+  high: number; // Pencere içindeki en yüksek fiyat
+  startPrice?: number; // Pencere başındaki fiyat
+  changes: number; // Pencere içindeki fiyat/stok değişikliği sayısı
+  points: { day: string; price: number }[]; // Günlük kapanış fiyatları
+}
+
 // Opsiyonel alanlar (her tabloda yok)
 export interface ExtraProductFields {
   image?: string;
@@ -18,6 +27,11 @@ export interface ExtraProductFields {
   reviews?: number;
   description?: string;
   priceText?: string;
+  priceTrend?: PriceTrend;
+  stockQty?: number; // biliniyorsa toplam stok adedi
+  stockDepots?: Record<string, number>; // bayinet: depo → adet
+  priceTry?: number; // fiyatın son kur snapshot'ıyla TL karşılığı
+  priceUsd?: number; // aynı snapshot'la USD karşılığı
 }
 
 // Final tip = core + opsiyonel
@@ -1,3 +1,5 @@
+import { supabase } from "../lib/supabase";
+
 const CACHE_KEY = "exchange_try_usd";
 const CACHE_TTL = 1000 * 60 * 30; // 30 minutes
 
@@ -9,30 +11,36 @@ export async function getTryToUsdRate(): Promise<number | null> {
       return cached.rate;
     }
 
-    // Try multiple free APIs in order
+    // Try sources in order
     const apis = [
-      // 1. Frankfurter (free, no key, maintained by ECB)
+      // 1. Son scraper çalıştırmasının kur snapshot'ı (fx_snapshots; price_try / price_usd de bununla hesaplandı)
+      async () => {
+        const { data, error } = await supabase
+          .from("fx_snapshots")
+          .select("rates")
+          .order("captured_at", { ascending: false })
+          .limit(1);
+        if (error) return null;
+        const usd = Number(data?.[0]?.rates?.USD); // 1 USD'nin TL karşılığı
+        return usd > 0 ? 1 / usd : null;
+      },
+      // 2. Frankfurter (free, no key, maintained by ECB)
       async () => {
         const res = await fetch("https://api.frankfurter.app/latest?from=TRY&to=USD");
         if (!res.ok) return null;
         const data = await res.json();
         return data?.rates?.USD ? Number(data.rates.USD) : null;
       },
-      // 2. ExchangeRate-API (free tier, no key needed for basic)
+      // 3. ExchangeRate-API (free tier, no key needed for basic)
       async () => {
         const res = await fetch("https://open.er-api.com/v6/latest/TRY");
         if (!res.ok) return null;
         const data = await res.json();
         return data?.rates?.USD ? Number(data.rates.USD) : null;
       },
-      // 3. Fallback: use approximate rate (1 USD ≈ 32-34 TRY as of Oct 2024)
-      async () => {
-        // This is a fallback static rate, not ideal but better than nothing
-        return 0.031; // approximately 1 TRY = 0.031 USD
-      }
     ];
 
-    // Try each API in sequence until one works
+    // Try each source in sequence until one works; no rate → USD karşılığı gösterilmez
     for (const apiFn of apis) {
       try {
         const rate = await apiFn();
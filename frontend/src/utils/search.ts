@@ -0,0 +1,37 @@
+// Arama terimini ürün tablolarındaki search_vector kolonuna uygun tsquery'ye çevirir.
+// Katlama kuralları scripts/shared/text.py::fold ile aynıdır (İ/I → i, ş → s, ğ → g ...);
+// biri değişirse diğeri de güncellenmeli.
+const ASCII_FOLD: Record<string, string> = {
+  ı: "i",
+  ş: "s",
+  ğ: "g",
+  ü: "u",
+  ö: "o",
+  ç: "c",
+  â: "a",
+  î: "i",
+  û: "u",
+};
+
+export function foldSearch(text: string): string {
+  return text
+    .replace(/I/g, "ı")
+    .replace(/İ/g, "i")
+    .toLowerCase()
+    .replace(/[ışğüöçâîû]/g, (ch) => ASCII_FOLD[ch] ?? ch);
+}
+
+// "Kingston SA400S37/480G" → "kingston:* & sa400s37:* & 480g:*" (her kelime önek olarak aranır).
+// Harf ve rakam içeren kelimeler, search_text'teki gibi harf/rakam sınırından bölünmüş hâliyle de
+// aranır: "rtx4060" → "(rtx4060:* | (rtx:* & 4060:*))" ("RTX 4060" adını da bulur).
+export function toSearchQuery(input: string): string | null {
+  const tokens = foldSearch(input).match(/[a-z0-9]+/g);
+  if (!tokens || tokens.length === 0) return null;
+  return Array.from(new Set(tokens))
+    .map((t) => {
+      const parts = t.match(/[a-z]+|[0-9]+/g) ?? [];
+      if (parts.length < 2) return `${t}:*`;
+      return `(${t}:* | (${parts.map((p) => `${p}:*`).join(" & ")}))`;
+    })
+    .join(" & ");
+}
@@ -7,6 +7,8 @@ from dotenv import load_dotenv
 from playwright.sync_api import sync_playwright
 # scripts.shared.supabase_client dosyasının var olduğunu varsayıyoruz
 from scripts.shared.supabase_client import supabase 
+from scripts.shared.otp import wait_for_otp
+from scripts.shared.session_store import open_stored_session, save_storage_state
 
 # Ortam değişkenlerini yükle
 load_dotenv()
@@ -17,6 +19,9 @@ PASSWORD = os.getenv("DENGE_PASSWORD")
 OTP_TABLE = "sms_codes"
 BASE_URL = "https://www.edenge.com.tr"
 TIMEOUT_SECONDS = 180
+SESSION_NAME = "denge"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+WEBDRIVER_INIT_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => false})"
 
 if not EMAIL or not PASSWORD:
     raise RuntimeError("🚨 .env dosyasında DENGE_EMAIL ve DENGE_PASSWORD tanımlı olmalı!")
@@ -38,21 +43,8 @@ def clean_price(price_str):
 # ... (Bu fonksiyonların kodunu buraya ekleyin) ...
 # --- Supabase OTP Yönetimi ---
 def get_and_clear_otp(timeout=TIMEOUT_SECONDS, poll_interval=5):
-    start_time = time.time()
-    print(f"⏳ {timeout} saniye boyunca DB'den OTP bekleniyor (Tablo: {OTP_TABLE})...")
-    while time.time() - start_time < timeout:
-        try:
-            response = supabase.table(OTP_TABLE).select("otp_code").order("created_at", desc=True).limit(1).execute()
-            if response.data and response.data[0] and response.data[0].get("otp_code"):
-                otp_code = response.data[0]["otp_code"]
-                print(f"✅ OTP bulundu. ({int(time.time() - start_time)} saniye bekleme)")
-                delete_response = supabase.table(OTP_TABLE).delete().eq("otp_code", otp_code).execute()
-                print(f"🗑️ OTP veritabanından silindi. Silinen satır sayısı: {len(delete_response.data)}")
-                return otp_code
-        except Exception as e:
-            print(f"⚠️ Supabase OTP sorgu/silme hatası: {e}")
-        time.sleep(poll_interval)
-    raise TimeoutError(f"🚨 OTP {timeout} saniye içinde Supabase'e yazılmadı, işlem iptal edildi.")
+    # En yeni kod tercih edilir; Realtime aboneliği kurulamazsa polling'e düşülür
+    return wait_for_otp(OTP_TABLE, timeout=timeout, order_column="created_at", max_poll_interval=poll_interval)
 
 # --- Supabase kayıt ---
 def save_products_to_supabase(products, batch_size=50):
@@ -70,12 +62,25 @@ def save_products_to_supabase(products, batch_size=50):
                 print(f"⚠️ Supabase error (chunk {i//batch_size+1}), retry {attempt+1}/3: {e}")
                 time.sleep(5)
 
+# --- Kayıtlı Oturum Doğrulama ---
+def is_session_valid(page):
+    """Kayıtlı oturumla ana sayfada kategori menüsünün göründüğünü kontrol eder."""
+    page.goto(BASE_URL, wait_until="domcontentloaded", timeout=60000)
+    page.wait_for_selector("a.navigation-categories-item-title", timeout=20000)
+    return True
+
 # --- Login + Otomatik OTP ---
 def eden_login(p):
     browser = p.chromium.launch(headless=False, slow_mo=50) 
-    context = browser.new_context(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36")
+
+    # Kayıtlı oturum geçerliyse login ve OTP adımları atlanır
+    stored = open_stored_session(browser, SESSION_NAME, is_session_valid, init_script=WEBDRIVER_INIT_SCRIPT, user_agent=USER_AGENT)
+    if stored:
+        return stored[1], browser
+
+    context = browser.new_context(user_agent=USER_AGENT)
     page = context.new_page()
-    page.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => false})")
+    page.add_init_script(WEBDRIVER_INIT_SCRIPT)
     page.goto(f"{BASE_URL}/Account/Login")
     page.wait_for_selector("#username_", timeout=20000)
     page.fill("#username_", EMAIL)
@@ -111,6 +116,7 @@ def eden_login(p):
             raise
     page.wait_for_selector("a.navigation-categories-item-title", timeout=60000)
     print("🏁 Ana sayfa yüklendi, oturum hazır:", page.url)
+    save_storage_state(SESSION_NAME, context.storage_state())
     return page, browser
 
 # --- YENİ ANA SCRAPER FONKSİYONU ---
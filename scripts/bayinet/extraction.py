@@ -0,0 +1,193 @@
+# Bayinet ürün gridinden kart ayrıştırma.
+# Supabase'e bağımlı olmadığı için benchmark'lar tarafından da doğrudan kullanılabilir.
+import os
+import re
+import time
+import json
+import urllib.parse
+from urllib.parse import urljoin, urlparse, parse_qs
+from bs4 import BeautifulSoup
+
+BASE_URL = os.getenv("BAYINET_BASE_URL", "https://www.bayinet.com.tr/")
+# Kart ayrıştırma yöntemi: "evaluate" (sayfa başına tek çağrı) veya "locator" (eski, kart başına çok çağrı)
+EXTRACTION_MODE = os.getenv("BAYINET_EXTRACTION", "evaluate")
+
+# --- Liste URL'si ---
+def build_search_url(category_id, page_num, visible_count="36"):
+    search_model = {
+        "SelectedProperties": [], "SelectedPropertyGroups": [], "AllProp": False, "PageNumber": page_num,
+        "VisibleProductCount": visible_count, "SearchTextInProducts": "", "Categories": [category_id],
+        "CategoriesLevel4": [], "CategoriesLevel2": [], "Brands": [], "PropertyGroups": [], "Properties": [],
+        "StoragePlace": "2001", "Sorting": "en-dusuk-fiyat", "IsStockOnly": False, "AllStoragePlaces": False,
+        "WithPropertiesAggregation": False, "WithPropertyGroupAggregation": False, "SearchCategoryId": category_id,
+        "MaxPrice": {"Price": 0, "SelectedPrice": 0, "Currency": ""},
+        "MinPrice": {"Price": 0, "SelectedPrice": 0, "Currency": ""},
+        "IsSubscription": "false", "IsN11": False
+    }
+    return f"{BASE_URL}Product/Index?searchModel={urllib.parse.quote(json.dumps(search_model, ensure_ascii=False))}"
+
+# --- Ürün Kartı Ayrıştırma ---
+# Sayfadaki tüm kartları tek bir page.evaluate çağrısıyla ham JSON olarak alır;
+# fiyat, para birimi ve stok ayrıştırması Python tarafında yapılır.
+CARD_EXTRACTION_JS = """
+() => Array.from(document.querySelectorAll("div.product-list__item.grid-item")).map(card => {
+    const link = card.querySelector("h5 a");
+    const price = card.querySelector("strong.fiyatTooltip.pointer");
+    return {
+        name: link ? link.innerText : null,
+        href: link ? link.getAttribute("href") : null,
+        price: price ? price.getAttribute("data-price") : null,
+        currency: price ? price.getAttribute("data-currency") : null,
+        stocks: Array.from(card.querySelectorAll("span.stock-status")).map(s => s.innerText),
+    };
+})
+"""
+
+def parse_card(raw, category_id):
+    """CARD_EXTRACTION_JS'in döndürdüğü ham kartı ürün sözlüğüne çevirir."""
+    if raw.get("name") is None or raw.get("href") is None:
+        raise ValueError("Kartta 'h5 a' linki bulunamadı")
+    product_url_absolute = urljoin(BASE_URL, raw["href"])
+    product_id = parse_qs(urlparse(product_url_absolute).query).get("ProductId", [None])[0]
+
+    price_value = 0.0
+    if raw.get("price"):
+        price_value = float(raw["price"].replace(",", "."))
+
+    stock_texts = [s.strip() for s in raw.get("stocks") or []]
+    stock_info = " | ".join(stock_texts) if stock_texts else "Belirtilmemiş"
+
+    return {
+        "product_id": product_id,
+        "name": raw["name"].strip(),
+        "url": product_url_absolute,
+        "category_id": category_id,
+        "price": price_value,            # Karşılaştırma için sayısal fiyat
+        "currency": raw.get("currency"),
+        "stock_info": stock_info,
+        "last_updated": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+def parse_cards(raw_cards, category_id, page_num):
+    products_on_page = []
+    for raw in raw_cards:
+        try:
+            products_on_page.append(parse_card(raw, category_id))
+        except Exception as e:
+            print(f"⚠️ Ürün ayrıştırma hatası (Kategori {category_id}, Sayfa {page_num}): {e}")
+    return products_on_page
+
+def extract_products_evaluate(page, category_id, page_num):
+    raw_cards = page.evaluate(CARD_EXTRACTION_JS)
+    return len(raw_cards), parse_cards(raw_cards, category_id, page_num)
+
+def extract_products_locator(page, category_id, page_num):
+    """Eski yöntem: her kart için ayrı Playwright çağrıları (karşılaştırma için tutuluyor)."""
+    product_divs = page.locator("div.product-list__item.grid-item")
+    count = product_divs.count()
+
+    products_on_page = []
+    for i in range(count):
+        try:
+            link_tag = product_divs.nth(i).locator("h5 a")
+            product_name = link_tag.inner_text().strip()
+            product_url_absolute = urljoin(BASE_URL, link_tag.get_attribute("href"))
+            product_id = parse_qs(urlparse(product_url_absolute).query).get("ProductId", [None])[0]
+
+            price_value = 0.0
+            currency = None
+            
+            price_tag = product_divs.nth(i).locator("strong.fiyatTooltip.pointer")
+            if price_tag.count() > 0:
+                data_price = price_tag.first.get_attribute("data-price")
+                if data_price:
+                    price_value = float(data_price.replace(",", "."))
+                currency = price_tag.first.get_attribute("data-currency")
+
+            stock_divs = product_divs.nth(i).locator("span.stock-status")
+            stock_info = " | ".join([
+                stock_divs.nth(j).inner_text().strip() for j in range(stock_divs.count())
+            ]) if stock_divs.count() > 0 else "Belirtilmemiş"
+
+            products_on_page.append({
+                "product_id": product_id,
+                "name": product_name,
+                "url": product_url_absolute,
+                "category_id": category_id,
+                "price": price_value,
+                "currency": currency,
+                "stock_info": stock_info,
+                "last_updated": time.strftime("%Y-%m-%d %H:%M:%S"),
+            })
+        except Exception as e:
+            print(f"⚠️ Ürün ayrıştırma hatası (Kategori {category_id}, Sayfa {page_num}): {e}")
+    return count, products_on_page
+
+def extract_products(page, category_id, page_num, mode=None):
+    if (mode or EXTRACTION_MODE) == "locator":
+        return extract_products_locator(page, category_id, page_num)
+    return extract_products_evaluate(page, category_id, page_num)
+
+async def extract_products_async(page, category_id, page_num):
+    """extract_products'ın async API karşılığı."""
+    if EXTRACTION_MODE != "locator":
+        raw_cards = await page.evaluate(CARD_EXTRACTION_JS)
+        return len(raw_cards), parse_cards(raw_cards, category_id, page_num)
+
+    product_divs = page.locator("div.product-list__item.grid-item")
+    count = await product_divs.count()
+    products_on_page = []
+    for i in range(count):
+        try:
+            link_tag = product_divs.nth(i).locator("h5 a")
+            price_tag = product_divs.nth(i).locator("strong.fiyatTooltip.pointer")
+            has_price = await price_tag.count() > 0
+            raw = {
+                "name": await link_tag.inner_text(),
+                "href": await link_tag.get_attribute("href"),
+                "price": await price_tag.first.get_attribute("data-price") if has_price else None,
+                "currency": await price_tag.first.get_attribute("data-currency") if has_price else None,
+                "stocks": await product_divs.nth(i).locator("span.stock-status").all_inner_texts(),
+            }
+            products_on_page.append(parse_card(raw, category_id))
+        except Exception as e:
+            print(f"⚠️ Ürün ayrıştırma hatası (Kategori {category_id}, Sayfa {page_num}): {e}")
+    return count, products_on_page
+
+
+# --- Tarayıcısız (HTTP) ayrıştırma ---
+# CARD_EXTRACTION_JS ile aynı ham kart yapısını BeautifulSoup ile üretir.
+def _inner_text(tag):
+    return " ".join(tag.get_text(" ").split())
+
+def extract_raw_cards_from_html(html):
+    soup = BeautifulSoup(html, "html.parser")
+    raw_cards = []
+    for card in soup.select("div.product-list__item.grid-item"):
+        link = card.select_one("h5 a")
+        price = card.select_one("strong.fiyatTooltip.pointer")
+        raw_cards.append({
+            "name": _inner_text(link) if link else None,
+            "href": link.get("href") if link else None,
+            "price": price.get("data-price") if price else None,
+            "currency": price.get("data-currency") if price else None,
+            "stocks": [_inner_text(s) for s in card.select("span.stock-status")],
+        })
+    return raw_cards
+
+# Sayfadaki toplam ürün sayısı: önce data-* öznitelikleri, sonra "1.234 ürün" gibi metinler denenir.
+TOTAL_COUNT_PATTERNS = [
+    re.compile(r'data-total(?:-product)?-?count="(\d+)"', re.I),
+    re.compile(r'"TotalCount"\s*:\s*(\d+)'),
+    re.compile(r'(\d{1,3}(?:\.\d{3})*|\d+)\s*(?:adet\s*)?ürün\s*(?:bulundu|listeleniyor|listelendi)', re.I),
+]
+
+def parse_total_count(html):
+    for pattern in TOTAL_COUNT_PATTERNS:
+        match = pattern.search(html)
+        if match:
+            return int(match.group(1).replace(".", ""))
+    return None
+
+def is_login_page(html, final_url=""):
+    return "/Login" in final_url or 'placeholder="Müşteri Kodu"' in html
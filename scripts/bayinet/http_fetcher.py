@@ -0,0 +1,82 @@
+# Bayinet liste sayfalarını tarayıcı açmadan, Playwright oturumunun çerezleriyle
+# düz HTTP üzerinden çeker. Oturum düşerse SessionExpired fırlatılır; yeniden
+# giriş kararı çağıran tarafa (update_bayinet) aittir. İstekler host'un
+# uyarlanabilir hız sınırlayıcısından geçer.
+import math
+import os
+import requests
+from requests.adapters import HTTPAdapter
+
+from scripts.shared.rate_limit import get_limiter
+from scripts.shared import metrics
+from scripts.bayinet.extraction import (
+    BASE_URL,
+    build_search_url,
+    extract_raw_cards_from_html,
+    parse_total_count,
+    is_login_page,
+)
+
+DEFAULT_VISIBLE_COUNT = "36"
+# Sitenin kabul ettiği en büyük sayfa boyutu ilk kategoride bu adaylar denenerek bulunur.
+VISIBLE_COUNT_CANDIDATES = os.getenv("BAYINET_VISIBLE_COUNTS", "96,72,48,36").split(",")
+
+
+class SessionExpired(Exception):
+    pass
+
+
+def build_http_session(cookies, user_agent, pool_size=8):
+    """Playwright context.cookies() çıktısından bağlantı havuzlu bir requests.Session kurar."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": user_agent,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "tr-TR,tr;q=0.9,en-US;q=0.8,en;q=0.7",
+    })
+    for cookie in cookies:
+        session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"), path=cookie.get("path", "/"))
+    return session
+
+
+def fetch_listing(session, category_id, page_num, visible_count=DEFAULT_VISIBLE_COUNT, timeout=60):
+    """Bir liste sayfasını çeker; (ham kartlar, toplam ürün sayısı veya None) döndürür."""
+    with get_limiter(BASE_URL).slot() as slot, metrics.timer("page_load", category=category_id):
+        res = session.get(build_search_url(category_id, page_num, visible_count), timeout=timeout)
+        slot.observe(res.status_code, res.headers, res.text)
+    metrics.inc("bytes", len(res.content), category=category_id)
+    if res.status_code in (401, 403) or is_login_page(res.text, res.url):
+        raise SessionExpired(f"Oturum geçersiz (HTTP {res.status_code}, URL: {res.url})")
+    res.raise_for_status()
+    with metrics.timer("parse", category=category_id):
+        return extract_raw_cards_from_html(res.text), parse_total_count(res.text)
+
+
+def probe_visible_count(session, category_id):
+    """
+    Adayları büyükten küçüğe dener. Bir aday yalnızca kategoride adaydan fazla ürün varken
+    site tam aday sayısı kadar kart döndürürse kabul edilir; adaydan küçük (ya da toplamı
+    okunamayan) bir kategori sitenin sayfa sınırı hakkında bir şey kanıtlamaz.
+    (kabul edilen boyut veya None, (ham kartlar, toplam, çekildiği boyut)) döndürür ki
+    ilk sayfa aynı boyutla kullanılacaksa tekrar çekilmesin.
+    """
+    result = None
+    for candidate in VISIBLE_COUNT_CANDIDATES:
+        candidate = candidate.strip()
+        raw_cards, total = fetch_listing(session, category_id, 0, candidate)
+        result = (raw_cards, total, candidate)
+        if not raw_cards or total is None or total <= int(candidate):
+            return None, result
+        if len(raw_cards) == int(candidate):
+            return candidate, result
+    return None, result
+
+
+def remaining_pages(total, visible_count, first_page_count):
+    """Toplam sayı biliniyorsa ilk sayfadan sonra çekilecek sayfa numaraları."""
+    if total is None or first_page_count == 0:
+        return None
+    return list(range(1, math.ceil(total / int(visible_count))))
@@ -1,163 +1,80 @@
 import time
-import urllib.parse
-import json
 import os
-from urllib.parse import urljoin, urlparse, parse_qs
+import asyncio
+import argparse
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from playwright.sync_api import sync_playwright
-# Lütfen projenizde scripts/shared/supabase_client.py dosyasının
-# doğru şekilde ayarlandığından emin olun.
-from scripts.shared.supabase_client import supabase 
+from playwright.async_api import async_playwright
+from scripts.shared.otp import wait_for_otp
+from scripts.shared import sync_engine
+from scripts.shared.sync_engine import sync_products
+from scripts.shared.pipeline import BackgroundWriter, StreamingSink
+from scripts.shared.rate_limit import get_limiter, log_summaries
+from scripts.shared.checkpoint import Checkpoint
+from scripts.shared import metrics
+from scripts.shared.session_store import open_stored_session, save_storage_state, clear_storage_state
+from scripts.bayinet.extraction import BASE_URL, build_search_url, extract_products, extract_products_async, parse_cards
+from scripts.bayinet.http_fetcher import DEFAULT_VISIBLE_COUNT, SessionExpired, build_http_session, fetch_listing, probe_visible_count, remaining_pages
 
 # --- Sabitler ---
-BASE_URL = "https://www.bayinet.com.tr/"
 OTP_TABLE = "otp_codes" 
+CATEGORY_IDS = [f"{i:02d}" for i in range(1, 52)]  # 01'den 51'e
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+LAUNCH_ARGS = ['--no-sandbox', '--disable-setuid-sandbox', '--disable-blink-features=AutomationControlled']
+# Aynı oturumdan açılacak paralel sekme sayısı (1 → eski seri davranış)
+WORKERS = int(os.getenv("BAYINET_WORKERS", "4"))
+# "browser": her sayfa Chromium'da açılır; "http": login sonrası sayfalar çerezlerle düz HTTP ile çekilir
+FETCH_MODE = os.getenv("BAYINET_FETCH_MODE", "browser")
+HTTP_WORKERS = int(os.getenv("BAYINET_HTTP_WORKERS", "8"))
+MAX_RELOGINS = 2
+SESSION_NAME = "bayinet"
+WEBDRIVER_INIT_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => false})"
 
 # --- Supabase OTP Yönetimi ---
 def get_and_clear_otp(timeout=180, poll_interval=5):
     """
-    Supabase'den OTP'yi bekleyerek çeker ve veritabanından siler (Polling).
+    OTP'yi Realtime aboneliğiyle bekler ve atomik olarak sahiplenir
+    (abonelik kurulamazsa üstel geri çekilmeli polling).
     """
-    start_time = time.time()
-    
-    print(f"⏳ {timeout} saniye boyunca DB'den OTP bekleniyor...")
-
-    while time.time() - start_time < timeout:
-        try:
-            response = supabase.table(OTP_TABLE).select("otp_code").limit(1).execute()
-            
-            if response.data and response.data[0] and response.data[0].get("otp_code"):
-                otp_code = response.data[0]["otp_code"]
-                print(f"✅ OTP bulundu. ({int(time.time() - start_time)} saniye bekleme)")
-
-                delete_response = supabase.table(OTP_TABLE).delete().eq("otp_code", otp_code).execute()
-                print(f"🗑️ OTP veritabanından silindi. Silinen satır sayısı: {len(delete_response.data)}")
-
-                return otp_code
-            
-        except Exception as e:
-            print(f"⚠️ Supabase OTP sorgu/silme hatası: {e}")
-            
-        time.sleep(poll_interval)
-        
-    raise TimeoutError(f"🚨 OTP {timeout} saniye içinde girilmedi, işlem iptal edildi.")
+    with metrics.timer("otp_wait"):
+        return wait_for_otp(OTP_TABLE, timeout=timeout, max_poll_interval=poll_interval)
 
-# --- Supabase Ürün Kaydı (Fiyat Geçmişi ile) ---
-# GÜNCELLENDİ: Bu fonksiyon artık sadece yeni veya fiyatı değişen ürünleri DB'ye yazar.
-# --- GÜNCELLENMİŞ SUPABASE ÜRÜN KAYDI (FİYAT VE STOK KONTROLÜ İLE) ---
+# --- Supabase Ürün Kaydı (Fiyat ve Stok Kontrolü ile) ---
 def save_products_to_supabase(products, batch_size=50):
     """
     Sadece yeni veya fiyatı/stok durumu değişen ürünleri DB'ye yazar.
     """
-    if not products or not supabase:
-        print("❌ Supabase client eksik veya ürün listesi boş. Kayıt atlandı.")
-        return
-
-    product_ids = [p["product_id"] for p in products if p.get("product_id")]
-    existing_products = {}
-    
-    # Adım 1: Mevcut ürünleri DB'den verimli şekilde çek
-    SELECT_CHUNK_SIZE = 900 
-    if product_ids:
-        print(f"📊 DB'den {len(product_ids)} ürünün mevcut durumu sorgulanacak...")
-        for i in range(0, len(product_ids), SELECT_CHUNK_SIZE):
-            id_chunk = product_ids[i:i + SELECT_CHUNK_SIZE]
-            try:
-                # DEĞİŞİKLİK 1: Veritabanından artık 'stock_info' bilgisini de çekiyoruz.
-                response = supabase.table("bayinet_products").select("product_id, price, stock_info").in_("product_id", id_chunk).execute()
-                for item in response.data:
-                    existing_products[item["product_id"]] = item
-                print(f"   -> {len(response.data)} mevcut ürün bilgisi alındı (grup {i//SELECT_CHUNK_SIZE + 1}).")
-            except Exception as e:
-                print(f"⚠️ Mevcut ürünler çekilirken hata (grup {i//SELECT_CHUNK_SIZE + 1}): {e}")
-        print(f"✅ Toplam {len(existing_products)} mevcut ürün bilgisi başarıyla alındı.")
-
-    # Adım 2: Sadece güncellenecek veya eklenecek ürünleri belirle
-    products_to_upsert = []
-    print("\n🔍 Değişiklikler kontrol ediliyor...")
-    for p in products:
-        product_id = p.get("product_id")
-        if not product_id:
-            continue
-
-        # Durum 1: Yeni ürün
-        if product_id not in existing_products:
-            print(f"✨ Yeni ürün bulundu: {p['name'][:60]}...")
-            # 'All object keys must match' hatasını önlemek için last_price ekliyoruz.
-            p['last_price'] = None
-            products_to_upsert.append(p)
-            continue
-        
-        # DEĞİŞİKLİK 2: Artık hem fiyat hem de stok durumu karşılaştırılıyor.
-        existing_product = existing_products[product_id]
-        
-        # Fiyatları al
-        old_price = existing_product.get("price")
-        new_price = p.get("price")
-        
-        # Stok durumlarını al (alan adı 'stock_info')
-        old_stock = existing_product.get("stock_info")
-        new_stock = p.get("stock_info")
-
-        # Değişiklik olup olmadığını kontrol et
-        price_has_changed = (old_price is not None and new_price is not None and old_price != new_price)
-        stock_has_changed = (old_stock is not None and new_stock is not None and old_stock != new_stock)
-
-        # Eğer fiyat VEYA stok durumu değişmişse, ürünü güncelleme listesine ekle
-        if price_has_changed or stock_has_changed:
-            change_reasons = []
-            
-            if price_has_changed:
-                p['last_price'] = old_price
-                change_reasons.append(f"Fiyat: {old_price} -> {new_price}")
-            else:
-                p['last_price'] = old_price
-            
-            if stock_has_changed:
-                change_reasons.append(f"Stok: '{old_stock}' -> '{new_stock}'")
-
-            log_message = " | ".join(change_reasons)
-            print(f"🔄 Güncelleme: {p['name'][:50]}... | {log_message}")
-            
-            products_to_upsert.append(p)
-
-    # Adım 3: Sadece filtrelenmiş listeyi veritabanına yaz
-    if not products_to_upsert:
-        print("\n✅ Veritabanı güncel. Değişiklik veya yeni ürün bulunamadı.")
-        return
-        
-    print(f"\n💾 Toplam {len(products_to_upsert)} üründe değişiklik tespit edildi. Veritabanı güncelleniyor...")
-    for i in range(0, len(products_to_upsert), batch_size):
-        chunk = products_to_upsert[i:i+batch_size]
-        for attempt in range(3):
-            try:
-                data = (
-                    supabase.table("bayinet_products")
-                    .upsert(chunk, on_conflict="product_id")
-                    .execute()
-                )
-                print(f"✅ DB'ye {len(data.data)} ürün yazıldı (chunk {i//batch_size+1})")
-                break
-            except Exception as e:
-                print(f"⚠️ Supabase error (chunk {i//batch_size+1}), retry {attempt+1}/3: {e}")
-                time.sleep(5)
+    return sync_products(sync_engine.BAYINET, products, batch_size=batch_size)
 
 # --- Playwright ile Oturum Açma ---
-def manual_login_and_get_session(p):
+def is_session_valid(page):
+    """Kayıtlı oturumla ana sayfaya gidip kategori menüsünün geldiğini kontrol eder."""
+    page.goto(BASE_URL, wait_until="domcontentloaded", timeout=60000)
+    page.wait_for_selector(".menu-categories__toggle.collapsed.js_collapsed.hidden-xs", timeout=20000)
+    return True
+
+def manual_login_and_get_session(p, force_login=False):
+    browser = p.chromium.launch(headless=True, slow_mo=50, args=LAUNCH_ARGS)
+    context_options = {"user_agent": USER_AGENT, "viewport": {"width": 1366, "height": 768}}
+
+    # Önce kayıtlı oturumu dene; geçerliyse login ve OTP beklemesi tamamen atlanır
+    if not force_login:
+        stored = open_stored_session(browser, SESSION_NAME, is_session_valid, init_script=WEBDRIVER_INIT_SCRIPT, **context_options)
+        if stored:
+            return stored[1]
+
     CUSTOMER_CODE = os.getenv("BAYINET_CUSTOMER_CODE")
     EMAIL = os.getenv("BAYINET_EMAIL")
     PASSWORD = os.getenv("BAYINET_PASSWORD")
  
     if not all([CUSTOMER_CODE, EMAIL, PASSWORD]):
+        browser.close()
         raise RuntimeError("🚨 Giriş bilgileri eksik (env BAYINET_CUSTOMER_CODE, EMAIL, PASSWORD)!")
 
-    launch_args = ['--no-sandbox', '--disable-setuid-sandbox', '--disable-blink-features=AutomationControlled']
-    browser = p.chromium.launch(headless=True, slow_mo=50, args=launch_args)
-    context = browser.new_context(
-        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36",
-        viewport={"width": 1366, "height": 768}
-    )
+    context = browser.new_context(**context_options)
     page = context.new_page()
-    page.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => false})")
+    page.add_init_script(WEBDRIVER_INIT_SCRIPT)
 
     print(f"➡️ {BASE_URL}Login adresine gidiliyor...")
     page.goto(f"{BASE_URL}Login", wait_until="domcontentloaded", timeout=60000)
@@ -210,112 +127,374 @@ def manual_login_and_get_session(p):
     page.wait_for_selector(".menu-categories__toggle.collapsed.js_collapsed.hidden-xs", timeout=120000)
     print("✅ Bayinet ana sayfası tamamen yüklendi. URL:", page.url)
 
+    save_storage_state(SESSION_NAME, context.storage_state())
     return page
 
+# --- Checkpoint yardımcıları ---
+def start_page(checkpoint, category_id):
+    """Yarıda kalan kategoride DB'ye yazılmış son sayfadan sonraki sayfa."""
+    last_page = checkpoint.resume_page(category_id) if checkpoint else None
+    return 0 if last_page is None else last_page + 1
+
+def add_page(sink, products_on_page, checkpoint, category_id, page_num, writer):
+    # Sink bu sayfayla birlikte bir pencere gönderdiyse, bu sayfaya kadar her şey yazıcıdadır
+    windows = sink.windows
+    sink.add(products_on_page)
+    if checkpoint and sink.windows > windows:
+        checkpoint.page_done(category_id, page_num, writer=writer)
+
 # --- Scraper Fonksiyonu (Sadece veri çeker, DB'ye yazmaz) ---
-def scrape_all_pages(page, category_id, max_pages=200):
+def iter_category_pages(page, category_id, max_pages=200, start_page=0):
     """
-    Belirli bir kategorideki tüm sayfalardaki ürünleri çeker ve bir liste olarak döndürür.
+    Belirli bir kategorinin sayfalarını sırayla gezer ve her sayfa için
+    (sayfa no, ürün listesi) üretir (yield); kategorinin tamamı bellekte
+    biriktirilmez. start_page ile yarıda kalan kategoriye devam edilir.
     """
-    all_products_in_category = []
-    for page_num in range(max_pages):
-        # ... search_model ve URL oluşturma kısmı aynı ...
-        search_model = {
-            "SelectedProperties": [], "SelectedPropertyGroups": [], "AllProp": False, "PageNumber": page_num,
-            "VisibleProductCount": "36", "SearchTextInProducts": "", "Categories": [category_id],
-            "CategoriesLevel4": [], "CategoriesLevel2": [], "Brands": [], "PropertyGroups": [], "Properties": [],
-            "StoragePlace": "2001", "Sorting": "en-dusuk-fiyat", "IsStockOnly": False, "AllStoragePlaces": False,
-            "WithPropertiesAggregation": False, "WithPropertyGroupAggregation": False, "SearchCategoryId": category_id,
-            "MaxPrice": {"Price": 0, "SelectedPrice": 0, "Currency": ""},
-            "MinPrice": {"Price": 0, "SelectedPrice": 0, "Currency": ""},
-            "IsSubscription": "false", "IsN11": False
-        }
-
-        url = f"{BASE_URL}Product/Index?searchModel={urllib.parse.quote(json.dumps(search_model, ensure_ascii=False))}"
-        page.goto(url)
-        page.wait_for_load_state("networkidle")
-
-        product_divs = page.locator("div.product-list__item.grid-item")
-        count = product_divs.count()
+    # Sayfalar arası sabit bekleme yerine host'un hız sınırlayıcısı kullanılır
+    limiter = get_limiter(BASE_URL)
+    for page_num in range(start_page, max_pages):
+        url = build_search_url(category_id, page_num)
+        with limiter.slot() as slot, metrics.timer("page_load", category=category_id):
+            response = page.goto(url)
+            page.wait_for_load_state("networkidle")
+            slot.observe(response.status if response else None, response.headers if response else None)
+
+        with metrics.timer("parse", category=category_id):
+            count, products_on_page = extract_products(page, category_id, page_num)
+        metrics.record_page(category_id, products_on_page)
 
         if count == 0:
             print(f"⛔️ Kategori {category_id}, Sayfa {page_num}: ürün yok, bu kategori bitti.")
             break
 
-        products_on_page = []
-        for i in range(count):
+        print(f"✅ Kategori {category_id}, Sayfa {page_num}: {len(products_on_page)} ürün bulundu.")
+        yield page_num, products_on_page
+
+# --- Paralel Scraper (tek oturum, N sekme) ---
+async def scrape_categories_parallel(storage_state, category_ids, workers=WORKERS, max_pages=200, writer=None, checkpoint=None):
+    """
+    Giriş yapılmış oturumun storage_state'i ile tek bir BrowserContext açar,
+    bu context'ten `workers` adet sekme üretir ve (kategori, sayfa) iş
+    öğelerini ortak bir kuyruktan çeker. Bir kategorinin sonraki sayfası,
+    o sayfa ürün döndürdüğünde kuyruğa eklenir; kategori bittiğinde ürünleri
+    DB'ye yazılır (writer verilmişse arka plan yazıcısına bırakılır).
+    Ürünler sayfa sayfa pencereli bir sink'e akar; kategori sonunda yalnızca
+    son pencere yazılır. checkpoint verilirse yazılan sayfalar ve hatasız biten
+    kategoriler kaydedilir; yarıda kalan kategoriler son yazılan sayfadan başlar.
+    """
+    queue = asyncio.Queue()
+    write = writer.submit if writer else save_products_to_supabase
+    collected = {category_id: StreamingSink(write, key="product_id") for category_id in category_ids}
+    for category_id in category_ids:
+        queue.put_nowait((category_id, start_page(checkpoint, category_id)))
+
+    async def finish_category(category_id, done=True):
+        # Kapatma sırasında hata alan kategori except bloğundan ikinci kez gelebilir
+        sink = collected.pop(category_id, None)
+        if sink is None:
+            return
+        try:
+            # Yazıcı kuyruğu doluysa beklenir; event loop bloklanmasın diye thread'de çağrılır
+            total = await asyncio.to_thread(sink.close)
+        except Exception as e:
+            print(f"🚨 {category_id} kategorisinin son ürünleri yazılamadı: {e}")
+            return
+        if checkpoint and done:
+            checkpoint.complete(category_id, writer=writer)
+        if total:
+            print(f"💾 {category_id} kategorisinden toplam {total} ürün DB'ye yazılmak üzere gönderildi.")
+        else:
+            print(f"ℹ️ {category_id} kategorisinden hiç ürün çekilemedi.")
+
+    limiter = get_limiter(BASE_URL, max_concurrency=workers)
+
+    async def load(page, url, category_id):
+        # Sınırlayıcı thread tabanlıdır; izin beklenirken event loop bloklanmasın
+        started_at = await asyncio.to_thread(limiter.acquire)
+        try:
+            with metrics.timer("page_load", category=category_id):
+                response = await page.goto(url)
+                await page.wait_for_load_state("networkidle")
+        except Exception as e:
+            limiter.release(started_at, error=e)
+            raise
+        limiter.release(started_at, status=response.status if response else None, headers=response.headers if response else None)
+
+    async def worker(worker_id, page):
+        while True:
+            category_id, page_num = await queue.get()
             try:
-                link_tag = product_divs.nth(i).locator("h5 a")
-                product_name = link_tag.inner_text().strip()
-                product_url_absolute = urljoin(BASE_URL, link_tag.get_attribute("href"))
-                product_id = parse_qs(urlparse(product_url_absolute).query).get("ProductId", [None])[0]
-
-                # --- FİYAT ALMA BÖLÜMÜ GÜNCELLENDİ ---
-                price_value = 0.0
-                currency = None # YENİ: Currency için değişken
-                
-                price_tag = product_divs.nth(i).locator("strong.fiyatTooltip.pointer")
-                if price_tag.count() > 0:
-                    # Sayısal değeri al (Mevcut mantık)
-                    data_price = price_tag.first.get_attribute("data-price")
-                    if data_price:
-                        price_value = float(data_price.replace(",", "."))
-                    
-                    # YENİ: Para birimini al
-                    currency = price_tag.first.get_attribute("data-currency")
-
-                stock_divs = product_divs.nth(i).locator("span.stock-status")
-                stock_info = " | ".join([
-                    stock_divs.nth(j).inner_text().strip() for j in range(stock_divs.count())
-                ]) if stock_divs.count() > 0 else "Belirtilmemiş"
-
-                # DEĞİŞTİ: Append edilen sözlük güncellendi
-                products_on_page.append({
-                    "product_id": product_id,
-                    "name": product_name,
-                    "url": product_url_absolute,
-                    "category_id": category_id,
-                    "price": price_value,        # Karşılaştırma için sayısal fiyat
-                    "currency": currency,        # YENİ: Para birimi
-                    "stock_info": stock_info,
-                    "last_updated": time.strftime("%Y-%m-%d %H:%M:%S"),
-                    # KALDIRILDI: price_display ve price_str alanları silindi
-                })
+                await load(page, build_search_url(category_id, page_num), category_id)
+                with metrics.timer("parse", category=category_id):
+                    count, products_on_page = await extract_products_async(page, category_id, page_num)
+                metrics.record_page(category_id, products_on_page)
+                if count == 0:
+                    print(f"⛔️ [W{worker_id}] Kategori {category_id}, Sayfa {page_num}: ürün yok, bu kategori bitti.")
+                    await finish_category(category_id)
+                    continue
+                print(f"✅ [W{worker_id}] Kategori {category_id}, Sayfa {page_num}: {len(products_on_page)} ürün bulundu.")
+                await asyncio.to_thread(add_page, collected[category_id], products_on_page, checkpoint, category_id, page_num, writer)
+                if page_num + 1 < max_pages:
+                    queue.put_nowait((category_id, page_num + 1))
+                else:
+                    await finish_category(category_id)
             except Exception as e:
-                print(f"⚠️ Ürün ayrıştırma hatası (Kategori {category_id}, Sayfa {page_num}): {e}")
-        
-        print(f"✅ Kategori {category_id}, Sayfa {page_num}: {len(products_on_page)} ürün bulundu.")
-        all_products_in_category.extend(products_on_page)
+                print(f"🚨 [W{worker_id}] Kategori {category_id}, Sayfa {page_num} işlenirken hata: {e}")
+                await finish_category(category_id, done=False)
+            finally:
+                queue.task_done()
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        context = await browser.new_context(
+            storage_state=storage_state,
+            user_agent=USER_AGENT,
+            viewport={"width": 1366, "height": 768}
+        )
+        await context.add_init_script(WEBDRIVER_INIT_SCRIPT)
+        pages = [await context.new_page() for _ in range(workers)]
+        print(f"⚡ {workers} sekme aynı oturumla açıldı, {len(category_ids)} kategori paralel taranacak.")
+
+        tasks = [asyncio.create_task(worker(i + 1, page)) for i, page in enumerate(pages)]
+        await queue.join()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await browser.close()
+
+# --- Tarayıcısız Scraper (HTTP + oturum çerezleri) ---
+def login_and_export_cookies(force_login=False):
+    """Playwright ile giriş yapar, oturum çerezlerini alır ve tarayıcıyı kapatır."""
+    with sync_playwright() as p:
+        with metrics.timer("login"):
+            page = manual_login_and_get_session(p, force_login=force_login)
+        cookies = page.context.cookies()
+        page.context.browser.close()
+    return cookies
 
-        time.sleep(1)
-    
-    return all_products_in_category
+def scrape_categories_http(category_ids, workers=HTTP_WORKERS, max_pages=200, writer=None, checkpoint=None):
+    """
+    Liste sayfalarını paralel HTTP istekleriyle çeker. Kategoriler sırayla yoklanıp
+    sitenin gerçekten uyguladığı VisibleProductCount bulunur (aday boyuttan fazla ürünü
+    olan bir kategoride tam aday kadar kart gelmeli); her kategorinin ilk sayfasındaki
+    toplam ürün sayısından kalan sayfalar hesaplanıp tek seferde kuyruğa atılır.
+    Boyut doğrulanamazsa, toplam okunamazsa ya da son sayfa olmayan bir sayfa eksik
+    dönerse sayfalar boş sayfaya kadar sırayla çekilir. Oturum düşerse tarayıcı yalnızca
+    o an yeniden açılır. Sayfalar sırasız geldiğinden checkpoint kategori düzeyinde
+    tutulur: yalnızca hatasız biten kategoriler tamamlanmış sayılır.
+    """
+    state = {"session": build_http_session(login_and_export_cookies(), USER_AGENT, pool_size=workers), "generation": 0}
+    # fetch_listing istekleri host'un sınırlayıcısından geçer; eşzamanlılık en fazla worker sayısına çıkar
+    get_limiter(BASE_URL, max_concurrency=workers)
+    write = writer.submit if writer else save_products_to_supabase
+    categories = {
+        category_id: {"sink": StreamingSink(write, key="product_id"), "pending": 0, "sequential": False,
+                      "errors": 0, "submitted": set(), "last_page": 0}
+        for category_id in category_ids
+    }
+    in_flight = {}
+
+    def relogin(item_generation):
+        # Aynı oturumun düşmesini gören diğer istekler ikinci bir login başlatmasın
+        if item_generation != state["generation"]:
+            return
+        if state["generation"] >= MAX_RELOGINS:
+            raise RuntimeError("🚨 Oturum tekrar tekrar düşüyor, HTTP modu durduruldu.")
+        print("🔐 Oturum süresi dolmuş, tarayıcı yeniden açılıp giriş yapılıyor...")
+        metrics.inc("retries", stage="relogin")
+        clear_storage_state(SESSION_NAME)
+        state["session"] = build_http_session(login_and_export_cookies(force_login=True), USER_AGENT, pool_size=workers)
+        state["generation"] += 1
+
+    def probe(category_id):
+        # Yoklama da sayfa isteği gibi oturum düşmesinde yeniden dener; başka hatada kategori hatalı sayılır
+        while True:
+            generation = state["generation"]
+            try:
+                return probe_visible_count(state["session"], category_id)
+            except SessionExpired:
+                relogin(generation)
+            except Exception as e:
+                print(f"🚨 Kategori {category_id} yoklanırken hata: {e}")
+                categories[category_id]["errors"] += 1
+                return None, ([], None, None)
+
+    first_results = {}
+    visible_count = None
+    for category_id in category_ids:
+        visible_count, first_results[category_id] = probe(category_id)
+        if visible_count:
+            break
+    # Hiçbir kategori boyutu kanıtlamadıysa hesaplanan sayfa aralığına güvenilmez
+    sequential_only = visible_count is None
+    visible_count = visible_count or DEFAULT_VISIBLE_COUNT
+    if sequential_only:
+        print(f"📐 Sayfa başına ürün sayısı doğrulanamadı; sayfalar sırayla çekilecek ({visible_count}/sayfa).")
+    else:
+        print(f"📐 Sayfa başına ürün sayısı: {visible_count}")
+
+    def reusable(first):
+        # Yoklamadaki ilk sayfa ancak aynı boyutla çekildiyse ya da kategorinin tamamını içeriyorsa kullanılır
+        raw_cards, total, count = first
+        return count is None or not raw_cards or count == visible_count or (total is not None and len(raw_cards) >= total)
+
+    def finish_category(category_id):
+        total = categories[category_id]["sink"].close()
+        if checkpoint and not categories[category_id]["errors"]:
+            checkpoint.complete(category_id, writer=writer)
+        if total:
+            print(f"💾 {category_id} kategorisinden toplam {total} ürün DB'ye yazılmak üzere gönderildi.")
+        else:
+            print(f"ℹ️ {category_id} kategorisinden hiç ürün çekilemedi.")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        def submit(category_id, page_num):
+            future = executor.submit(fetch_listing, state["session"], category_id, page_num, visible_count)
+            in_flight[future] = (category_id, page_num, state["generation"])
+
+        def queue_page(category_id, page_num):
+            cat = categories[category_id]
+            cat["pending"] += 1
+            cat["submitted"].add(page_num)
+            submit(category_id, page_num)
+
+        def handle(category_id, page_num, raw_cards, total):
+            cat = categories[category_id]
+            cat["pending"] -= 1
+            products_on_page = parse_cards(raw_cards, category_id, page_num) if raw_cards else []
+            metrics.record_page(category_id, products_on_page)
+            if raw_cards:
+                print(f"✅ Kategori {category_id}, Sayfa {page_num}: {len(products_on_page)} ürün bulundu.")
+                cat["sink"].add(products_on_page)
+            if page_num == 0 and raw_cards:
+                pages = None if sequential_only else remaining_pages(total, visible_count, len(raw_cards))
+                if pages is None:
+                    cat["sequential"] = True
+                    pages = [1]
+                cat["last_page"] = pages[-1] if pages else 0
+                for n in pages[:max_pages - 1]:
+                    queue_page(category_id, n)
+            elif not cat["sequential"] and raw_cards and page_num < cat["last_page"] and len(raw_cards) < int(visible_count):
+                # Son sayfa olmayan sayfa eksik geldi: site boyutu uygulamıyor, hesaplanan aralık ürün kaçırır
+                print(f"⚠️ Kategori {category_id}, Sayfa {page_num} eksik döndü ({len(raw_cards)}/{visible_count}); sıralı sayfalamaya geçiliyor.")
+                cat["sequential"] = True
+                next_page = max(cat["submitted"]) + 1
+                if next_page < max_pages:
+                    queue_page(category_id, next_page)
+            elif cat["sequential"] and raw_cards and page_num + 1 < max_pages and page_num + 1 not in cat["submitted"]:
+                queue_page(category_id, page_num + 1)
+            if cat["pending"] == 0:
+                finish_category(category_id)
+
+        for category_id in category_ids:
+            categories[category_id]["pending"] = 1
+            first = first_results.get(category_id)
+            if first is not None and reusable(first):
+                handle(category_id, 0, first[0], first[1])
+            else:
+                categories[category_id]["pending"] = 0
+                queue_page(category_id, 0)
+
+        while in_flight:
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                category_id, page_num, generation = in_flight.pop(future)
+                try:
+                    raw_cards, total = future.result()
+                except SessionExpired:
+                    relogin(generation)
+                    submit(category_id, page_num)
+                    continue
+                except Exception as e:
+                    print(f"🚨 Kategori {category_id}, Sayfa {page_num} çekilirken hata: {e}")
+                    categories[category_id]["errors"] += 1
+                    raw_cards, total = [], None
+                handle(category_id, page_num, raw_cards, total)
 
 # --- Ana Çalıştırma Fonksiyonu ---
-def run_scraper():
+def run_scraper(workers=None, fetch_mode=FETCH_MODE, resume=False):
+    """workers verilmezse mod varsayılanı kullanılır (BAYINET_WORKERS / BAYINET_HTTP_WORKERS)."""
     print("🚀 Bayinet Scraper başlıyor...")
+    checkpoint = Checkpoint(SESSION_NAME, resume=resume)
+    category_ids = [category_id for category_id in CATEGORY_IDS if not checkpoint.is_fresh(category_id)]
+    if len(category_ids) < len(CATEGORY_IDS):
+        print(f"⏭️ {len(CATEGORY_IDS) - len(category_ids)} kategori son {checkpoint.freshness_hours:g} saat içinde tamamlanmış, atlanıyor.")
+    if not category_ids:
+        checkpoint.finish(CATEGORY_IDS)
+        return
 
-    with sync_playwright() as p:
-        page = manual_login_and_get_session(p)
+    if fetch_mode == "http":
+        workers = workers or HTTP_WORKERS
+        print(f"🌐 HTTP modu: tarayıcı yalnızca giriş için açılacak, {workers} paralel istek.")
+        start_time = time.time()
+        with BackgroundWriter(save_products_to_supabase, name="bayinet-writer") as writer:
+            scrape_categories_http(category_ids, workers=workers, writer=writer, checkpoint=checkpoint)
+        checkpoint.finish(CATEGORY_IDS)
+        log_summaries()
+        print(f"\n✅ Scraping tamamlandı. ({time.time() - start_time:.1f} sn)")
+        return
+
+    workers = workers or WORKERS
+    if workers > 1:
+        # Playwright sync nesneleri thread'ler arasında paylaşılamadığından, login
+        # sync API ile yapılır ve oturum storage_state olarak async havuza aktarılır.
+        with sync_playwright() as p:
+            with metrics.timer("login"):
+                page = manual_login_and_get_session(p)
+            storage_state = page.context.storage_state()
+            page.context.browser.close()
+        print(f"✅ Oturum hazır, {workers} sekme ile paralel scraping başlıyor...")
+        start_time = time.time()
+        with BackgroundWriter(save_products_to_supabase, name="bayinet-writer") as writer:
+            asyncio.run(scrape_categories_parallel(storage_state, category_ids, workers=workers, writer=writer, checkpoint=checkpoint))
+        checkpoint.finish(CATEGORY_IDS)
+        log_summaries()
+        print(f"\n✅ Scraping tamamlandı. ({time.time() - start_time:.1f} sn)")
+        return
+
+    get_limiter(BASE_URL, max_concurrency=1)
+    with sync_playwright() as p, BackgroundWriter(save_products_to_supabase, name="bayinet-writer") as writer:
+        with metrics.timer("login"):
+            page = manual_login_and_get_session(p)
 
         print("✅ Oturum hazır, scraping başlıyor...")
         # Kategori ID'lerini 01'den 51'e (52 dahil değil) kadar çeker
-        for i in range(1, 52): 
-            category_id = f"{i:02d}"
-            print(f"\n📂 Kategori {category_id} çekiliyor...")
-            
-            # 1. Adım: O kategorideki TÜM ürünleri çek
-            products_from_category = scrape_all_pages(page, category_id)
+        for category_id in category_ids:
+            first_page = start_page(checkpoint, category_id)
+            if first_page:
+                print(f"\n📂 Kategori {category_id} çekiliyor (sayfa {first_page}'den devam)...")
+            else:
+                print(f"\n📂 Kategori {category_id} çekiliyor...")
             
-            # 2. Adım: Çekilen ürünleri, last_price mantığını içeren fonksiyona gönder
-            if products_from_category:
-                print(f"💾 {category_id} kategorisinden {len(products_from_category)} ürün DB'ye yazılmak üzere gönderiliyor...")
-                save_products_to_supabase(products_from_category)
+            # Ürünler sayfa sayfa pencereye akar; pencere dolunca veya süresi geçince
+            # yazıcı kuyruğuna bırakılır, bir sonraki sayfa beklemeden çekilir
+            with StreamingSink(writer.submit, key="product_id") as sink:
+                for page_num, products_on_page in iter_category_pages(page, category_id, start_page=first_page):
+                    add_page(sink, products_on_page, checkpoint, category_id, page_num, writer)
+            checkpoint.complete(category_id, writer=writer)
+            if sink.total:
+                print(f"💾 {category_id} kategorisinden toplam {sink.total} ürün DB'ye yazılmak üzere gönderildi.")
             else:
                 print(f"ℹ️ {category_id} kategorisinden hiç ürün çekilemedi.")
 
-        print("\n✅ Scraping tamamlandı.")
+    checkpoint.finish(CATEGORY_IDS)
+    log_summaries()
+    print("\n✅ Scraping tamamlandı.")
 
 # --- Script'in Başlangıç Noktası ---
 if __name__ == "__main__":
-    run_scraper()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Bayinet ürün tarayıcı")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"Tarayıcı modunda aynı oturumdan açılacak sekme sayısı (1 = seri, varsayılan {WORKERS}); "
+                             f"HTTP modunda paralel istek sayısı (varsayılan {HTTP_WORKERS})")
+    parser.add_argument("--mode", choices=["browser", "http"], default=FETCH_MODE, help="Liste sayfalarını tarayıcıyla mı düz HTTP ile mi çek")
+    parser.add_argument("--resume", action="store_true", help="Yarıda kalan son çalıştırmaya kaldığı yerden devam et")
+    args = parser.parse_args()
+    # Aşama süreleri ve sayaçlar çalıştırma sonunda .cache/metrics altına yazılır
+    with metrics.run("bayinet"):
+        started_at = datetime.now(timezone.utc).isoformat()
+        run_scraper(workers=args.workers, fetch_mode=args.mode, resume=args.resume)
+        # Değişmeyen ürünlerin price_try / price_usd değerleri bu çalıştırmanın kurlarıyla güncellenir;
+        # kategori listesi ve "son güncelleme" bilgisi frontend'e marketplace_stats özetinden gider
+        sync_engine.refresh_fx(sync_engine.BAYINET)
+        sync_engine.refresh_stats(sync_engine.BAYINET, started_at)
@@ -2,11 +2,18 @@ import os
 import re
 import time
 import json
+import argparse
+from datetime import datetime, timezone
 from urllib.parse import urljoin
 from dotenv import load_dotenv
 from playwright.sync_api import sync_playwright
-# scripts.shared.supabase_client dosyasının var olduğunu varsayıyoruz
-from scripts.shared.supabase_client import supabase 
+from scripts.shared.otp import wait_for_otp
+from scripts.shared import sync_engine
+from scripts.shared.sync_engine import sync_products
+from scripts.shared.pipeline import BackgroundWriter, StreamingSink
+from scripts.shared.session_store import open_stored_session, save_storage_state
+from scripts.shared.checkpoint import Checkpoint
+from scripts.shared import metrics
 
 # Ortam değişkenlerini yükle
 load_dotenv()
@@ -17,8 +24,11 @@ PASSWORD = os.getenv("DENGE_PASSWORD")
 # YENİ: Proxy URL'sini ortam değişkeninden oku
 PROXY_URL = os.getenv("TR_PROXY_URL") 
 OTP_TABLE = "sms_codes"
-BASE_URL = "https://www.edenge.com.tr"
+BASE_URL = os.getenv("DENGE_BASE_URL", "https://www.edenge.com.tr")
 TIMEOUT_SECONDS = 180
+SESSION_NAME = "denge"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+WEBDRIVER_INIT_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => false})"
 
 if not EMAIL or not PASSWORD:
     raise RuntimeError("🚨 .env dosyasında DENGE_EMAIL ve DENGE_PASSWORD tanımlı olmalı!")
@@ -33,124 +43,26 @@ def clean_price(price_str):
     except (ValueError, TypeError):
         return None
 
-# --- Supabase OTP Yönetimi (Değişiklik yok) ---
+# --- Supabase OTP Yönetimi ---
 def get_and_clear_otp(timeout=TIMEOUT_SECONDS, poll_interval=5):
-    # ... (Bu fonksiyonun içeriği aynı kalmıştır)
-    start_time = time.time()
-    print(f"⏳ {timeout} saniye boyunca DB'den OTP bekleniyor (Tablo: {OTP_TABLE})...")
-    while time.time() - start_time < timeout:
-        try:
-            response = supabase.table(OTP_TABLE).select("otp_code").order("created_at", desc=True).limit(1).execute()
-            if response.data and response.data[0] and response.data[0].get("otp_code"):
-                otp_code = response.data[0]["otp_code"]
-                print(f"✅ OTP bulundu. ({int(time.time() - start_time)} saniye bekleme)")
-                delete_response = supabase.table(OTP_TABLE).delete().eq("otp_code", otp_code).execute()
-                print(f"🗑️ OTP veritabanından silindi. Silinen satır sayısı: {len(delete_response.data)}")
-                return otp_code
-        except Exception as e:
-            print(f"⚠️ Supabase OTP sorgu/silme hatası: {e}")
-        time.sleep(poll_interval)
-    raise TimeoutError(f"🚨 OTP {timeout} saniye içinde Supabase'e yazılmadı, işlem iptal edildi.")
+    # En yeni kod tercih edilir; Realtime aboneliği kurulamazsa polling'e düşülür
+    with metrics.timer("otp_wait"):
+        return wait_for_otp(OTP_TABLE, timeout=timeout, order_column="created_at", max_poll_interval=poll_interval)
 
 
-# --- Supabase kayıt (Fiyat Geçmişi ile) - YENİ VE VERİMLİ VERSİYON ---
-# --- Supabase kayıt (Fiyat Geçmişi ile) - GÜNCELLENMİŞ VE DÜZELTİLMİŞ VERSİYON ---
 # --- Supabase kayıt (FİYAT VE STOK KONTROLLÜ VERSİYON) ---
 def save_products_to_supabase(products, batch_size=50):
     """
     Sadece yeni veya fiyatı/stok durumu değişen ürünleri DB'ye yazar.
     """
-    if not products or not supabase:
-        print("❌ Supabase client eksik veya ürün listesi boş. Kayıt atlandı.")
-        return
-
-    product_ids = [p["product_id"] for p in products if p.get("product_id")]
-    existing_products = {}
-    
-    # Adım 1: Mevcut ürünleri DB'den verimli şekilde çek
-    SELECT_CHUNK_SIZE = 900
-    if product_ids:
-        print(f"📊 DB'den {len(product_ids)} ürünün mevcut durumu sorgulanacak...")
-        for i in range(0, len(product_ids), SELECT_CHUNK_SIZE):
-            id_chunk = product_ids[i:i + SELECT_CHUNK_SIZE]
-            try:
-                # DEĞİŞİKLİK 1: Veritabanından artık 'stock_info' bilgisini de çekiyoruz.
-                response = supabase.table("denge_products").select("product_id, special_price, stock_info").in_("product_id", id_chunk).execute()
-                for item in response.data:
-                    existing_products[item["product_id"]] = item
-                print(f"   -> {len(response.data)} mevcut ürün bilgisi alındı (grup {i//SELECT_CHUNK_SIZE + 1}).")
-            except Exception as e:
-                print(f"⚠️ Mevcut ürünler çekilirken hata (grup {i//SELECT_CHUNK_SIZE + 1}): {e}")
-        print(f"✅ Toplam {len(existing_products)} mevcut ürün bilgisi başarıyla alındı.")
-
-    # Adım 2: Sadece güncellenecek veya eklenecek ürünleri belirle
-    products_to_upsert = []
-    print("\n🔍 Değişiklikler kontrol ediliyor...")
-    for p in products:
-        product_id = p.get("product_id")
-        if not product_id:
-            continue
+    return sync_products(sync_engine.DENGE, products, batch_size=batch_size)
 
-        # Durum 1: Yeni ürün
-        if product_id not in existing_products:
-            print(f"✨ Yeni ürün bulundu: {p['name'][:60]}...")
-            p['last_price'] = None
-            products_to_upsert.append(p)
-            continue
-        
-        # DEĞİŞİKLİK 2: Artık hem fiyat hem de stok durumu karşılaştırılıyor.
-        existing_product = existing_products[product_id]
-        
-        # Fiyatları al (alan adı 'special_price')
-        old_price = existing_product.get("special_price")
-        new_price = p.get("special_price")
-        
-        # Stok durumlarını al (alan adı 'stock_info')
-        old_stock = existing_product.get("stock_info")
-        new_stock = p.get("stock_info")
-
-        # Değişiklik olup olmadığını kontrol et
-        price_has_changed = (old_price is not None and new_price is not None and old_price != new_price)
-        stock_has_changed = (old_stock is not None and new_stock is not None and old_stock != new_stock)
-
-        # Eğer fiyat VEYA stok durumu değişmişse, ürünü güncelleme listesine ekle
-        if price_has_changed or stock_has_changed:
-            change_reasons = []
-            
-            if price_has_changed:
-                p['last_price'] = old_price
-                change_reasons.append(f"Fiyat: {old_price} -> {new_price}")
-            else:
-                p['last_price'] = old_price
-            
-            if stock_has_changed:
-                change_reasons.append(f"Stok: '{old_stock}' -> '{new_stock}'")
-
-            log_message = " | ".join(change_reasons)
-            print(f"🔄 Güncelleme: {p['name'][:50]}... | {log_message}")
-            
-            products_to_upsert.append(p)
-
-    # Adım 3: Sadece filtrelenmiş listeyi veritabanına yaz
-    if not products_to_upsert:
-        print("\n✅ Veritabanı güncel. Bu kategoride değişiklik veya yeni ürün bulunamadı.")
-        return
-        
-    print(f"\n💾 Toplam {len(products_to_upsert)} üründe değişiklik tespit edildi. Veritabanı güncelleniyor...")
-    for i in range(0, len(products_to_upsert), batch_size):
-        chunk = products_to_upsert[i:i+batch_size]
-        for attempt in range(3):
-            try:
-                data = (
-                    supabase.table("denge_products")
-                    .upsert(chunk, on_conflict="product_id")
-                    .execute()
-                )
-                print(f"✅ DB'ye {len(data.data)} ürün yazıldı (chunk {i//batch_size+1})")
-                break
-            except Exception as e:
-                print(f"⚠️ Supabase error (chunk {i//batch_size+1}), retry {attempt+1}/3: {e}")
-                time.sleep(5)
+# --- Kayıtlı Oturum Doğrulama ---
+def is_session_valid(page):
+    """Kayıtlı oturumla ana sayfada kategori menüsünün göründüğünü kontrol eder."""
+    page.goto(BASE_URL, wait_until="domcontentloaded", timeout=60000)
+    page.wait_for_selector("a.navigation-categories-item-title", timeout=20000)
+    return True
 
 # --- Login + Otomatik OTP (Proxy Ayarı Eklendi) ---
 # GÜNCELLENDİ: Fonksiyon artık proxy_settings parametresi alıyor
@@ -165,9 +77,15 @@ def eden_login(p, proxy_settings=None):
         print("🚀 Tarayıcı proxy ile başlatılıyor...")
     
     browser = p.chromium.launch(**launch_options)
-    context = browser.new_context(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36")
+
+    # Kayıtlı oturum geçerliyse giriş adımı atlanır
+    stored = open_stored_session(browser, SESSION_NAME, is_session_valid, init_script=WEBDRIVER_INIT_SCRIPT, user_agent=USER_AGENT)
+    if stored:
+        return stored[1], browser
+
+    context = browser.new_context(user_agent=USER_AGENT)
     page = context.new_page()
-    page.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => false})")
+    page.add_init_script(WEBDRIVER_INIT_SCRIPT)
     
     print("➡️ Giriş sayfasına gidiliyor...")
     page.goto(f"{BASE_URL}/Account/Login", wait_until="networkidle", timeout=60000)
@@ -182,61 +100,74 @@ def eden_login(p, proxy_settings=None):
 
     page.wait_for_selector("a.navigation-categories-item-title", timeout=60000)
     print("🏁 Ana sayfa yüklendi, oturum hazır:", page.url)
+    save_storage_state(SESSION_NAME, context.storage_state())
     
     return page, browser
 
-# --- ANA SCRAPER FONKSİYONU (Değişiklik yok) ---
-def scrape_category(page, category_name):
-    # ... (Bu fonksiyonun içeriği aynı kalmıştır)
-    all_products = []
+# --- ANA SCRAPER FONKSİYONU ---
+def extract_rows(page, category_name):
+    """Açık sayfadaki ürün satırlarını ürün sözlüklerine çevirir."""
+    product_rows = page.query_selector_all(".table-row.js_basket_parents")
+    print(f"   -> Bu sayfada {len(product_rows)} ürün bulundu.")
+    page_products = []
+    for row in product_rows:
+        try:
+            product_id = row.query_selector("input[name='cbxitem']").get_attribute("data-pid")
+            name = row.query_selector(".title-cell h4").inner_text().strip()
+            url_element = row.query_selector(".product-figure a")
+            relative_url = url_element.get_attribute("href") if url_element else None
+            stock = row.query_selector(".stock-status .stock").inner_text().strip()
+            special_price_element = row.query_selector(".price-cell:not(.price-cell-last) .price")
+            special_price_raw = special_price_element.get_attribute("data-pprice") if special_price_element else None
+            list_price_element = row.query_selector(".price-cell-last .price")
+            list_price_raw = list_price_element.get_attribute("data-pprice") if list_price_element else None
+            currency_element = row.query_selector(".currency")
+            currency = currency_element.inner_text().strip() if currency_element else "$"
+            page_products.append({
+                "product_id": f"denge_{product_id}",
+                "name": name,
+                "special_price": clean_price(special_price_raw),
+                "list_price": clean_price(list_price_raw),
+                "currency": currency,
+                "stock_info": stock,
+                "category": category_name,
+                "url": urljoin(BASE_URL, relative_url) if relative_url else None,
+                "marketplace": "edenge",
+                "last_updated": time.strftime("%Y-%m-%d %H:%M:%S")
+            })
+        except Exception as e:
+            print(f"⚠️ Bir ürün satırı işlenirken hata oluştu, atlanıyor: {e}")
+    return page_products
+
+def iter_category_pages(page, category_name):
+    """Kategorinin sayfalarını gezer ve her sayfanın ürün listesini sırayla üretir (yield)."""
+    total = 0
     page_count = 1
     while True:
         print(f"📄 '{category_name}' kategorisi, sayfa {page_count} taranıyor...")
         page.wait_for_selector(".table-row.js_basket_parents", timeout=30000)
-        product_rows = page.query_selector_all(".table-row.js_basket_parents")
-        print(f"   -> Bu sayfada {len(product_rows)} ürün bulundu.")
-        for row in product_rows:
-            try:
-                product_id = row.query_selector("input[name='cbxitem']").get_attribute("data-pid")
-                name = row.query_selector(".title-cell h4").inner_text().strip()
-                url_element = row.query_selector(".product-figure a")
-                relative_url = url_element.get_attribute("href") if url_element else None
-                stock = row.query_selector(".stock-status .stock").inner_text().strip()
-                special_price_element = row.query_selector(".price-cell:not(.price-cell-last) .price")
-                special_price_raw = special_price_element.get_attribute("data-pprice") if special_price_element else None
-                list_price_element = row.query_selector(".price-cell-last .price")
-                list_price_raw = list_price_element.get_attribute("data-pprice") if list_price_element else None
-                currency_element = row.query_selector(".currency")
-                currency = currency_element.inner_text().strip() if currency_element else "$"
-                all_products.append({
-                    "product_id": f"denge_{product_id}",
-                    "name": name,
-                    "special_price": clean_price(special_price_raw),
-                    "list_price": clean_price(list_price_raw),
-                    "currency": currency,
-                    "stock_info": stock,
-                    "category": category_name,
-                    "url": urljoin(BASE_URL, relative_url) if relative_url else None,
-                    "marketplace": "edenge",
-                    "last_updated": time.strftime("%Y-%m-%d %H:%M:%S")
-                })
-            except Exception as e:
-                print(f"⚠️ Bir ürün satırı işlenirken hata oluştu, atlanıyor: {e}")
+        with metrics.timer("parse", category=category_name):
+            page_products = extract_rows(page, category_name)
+        metrics.record_page(category_name, page_products)
+        total += len(page_products)
+        yield page_products
         next_page_button = page.query_selector("a.js_pagelink[rel='next']")
         if next_page_button:
             print("   -> Sonraki sayfa butonuna tıklandı.")
-            next_page_button.click()
-            page.wait_for_load_state("networkidle", timeout=60000)
+            with metrics.timer("page_load", category=category_name):
+                next_page_button.click()
+                page.wait_for_load_state("networkidle", timeout=60000)
             page_count += 1
         else:
-            print(f"🏁 '{category_name}' kategorisi için son sayfaya ulaşıldı. Toplam {len(all_products)} ürün çekildi.")
+            print(f"🏁 '{category_name}' kategorisi için son sayfaya ulaşıldı. Toplam {total} ürün çekildi.")
             break
-    return all_products
 
 # --- ANA ÇALIŞTIRMA BLOĞU (Proxy Ayarı Eklendi) ---
-# --- ANA ÇALIŞTIRMA BLOĞU (Tekilleştirme Adımı Eklendi) ---
-def run_scraper():
+def run_scraper(resume=False):
     print("🚀 Edenge Scraper (Doğrudan Veri Çekme Modu) başlıyor...")
+    # Sayfalama tıklamayla ilerlediğinden checkpoint kategori düzeyinde tutulur
+    checkpoint = Checkpoint(SESSION_NAME, resume=resume)
+    categories = []
     
     proxy_config = None
     if PROXY_URL:
@@ -247,11 +178,11 @@ def run_scraper():
         print("ℹ️ Proxy ayarı (TR_PROXY_URL) bulunamadı. Direkt bağlantı kullanılacak.")
 
     try:
-        with sync_playwright() as p:
-            page, browser = eden_login(p, proxy_settings=proxy_config)
+        with sync_playwright() as p, BackgroundWriter(save_products_to_supabase, name="denge-writer") as writer:
+            with metrics.timer("login"):
+                page, browser = eden_login(p, proxy_settings=proxy_config)
             
             category_elems = page.query_selector_all("a.navigation-categories-item-title")
-            categories = []
             for elem in category_elems:
                 href = elem.get_attribute("href")
                 name = elem.inner_text().strip()
@@ -260,40 +191,44 @@ def run_scraper():
             
             print(f"🔎 {len(categories)} kategori bulundu.")
             for i, (cat_name, cat_url) in enumerate(categories, start=1):
+                if checkpoint.is_fresh(cat_name):
+                    print(f"⏭️ {i}/{len(categories)}. '{cat_name}' son {checkpoint.freshness_hours:g} saat içinde tamamlanmış, atlanıyor.")
+                    continue
                 print(f"\n➡️ {i}/{len(categories)}. Kategori Başlatılıyor: {cat_name}")
                 try:
-                    page.goto(cat_url, wait_until="networkidle", timeout=60000)
+                    with metrics.timer("page_load", category=cat_name):
+                        page.goto(cat_url, wait_until="networkidle", timeout=60000)
                     
-                    # 1. Scraper'dan ürünleri çek
-                    products = scrape_category(page, cat_name)
-                    
-                    # --- YENİ: TEKİLLEŞTİRME ADIMI ---
-                    if products:
-                        print(f"   -> Tekilleştirme öncesi ürün sayısı: {len(products)}")
-                        unique_products = {}
-                        for product in products:
-                            # Her bir ürünü product_id'yi anahtar olarak kullanarak bir sözlüğe ekle.
-                            # Eğer aynı product_id tekrar gelirse, eski kaydın üzerine yazar.
-                            # Bu, listedeki son görülen ürünün geçerli olmasını sağlar.
-                            unique_products[product['product_id']] = product
-                        
-                        # Sözlüğün değerlerini (tekilleştirilmiş ürünleri) tekrar bir listeye çevir.
-                        products = list(unique_products.values())
-                        print(f"   -> Tekilleştirme sonrası ürün sayısı: {len(products)}")
-                    # --- TEKİLLEŞTİRME ADIMI SONU ---
-
-                    if products:
-                        # 2. Sadece tekilleştirilmiş listeyi veritabanına gönder
-                        save_products_to_supabase(products)
-                    else:
+                    # Ürünler sayfa sayfa pencereye akar; pencere dolunca veya süresi
+                    # geçince yazıcı kuyruğuna bırakılır. Aynı product_id bir pencerede
+                    # tekrar gelirse son görülen kayıt geçerli olur.
+                    with StreamingSink(writer.submit, key="product_id") as sink:
+                        for page_products in iter_category_pages(page, cat_name):
+                            sink.add(page_products)
+                    checkpoint.complete(cat_name, writer=writer)
+                    if not sink.total:
                         print(f"ℹ️ '{cat_name}' kategorisinden hiç ürün çekilemedi.")
                 except Exception as e:
+                    metrics.inc("errors", stage="category", category=cat_name)
                     print(f"🚨 Kategori '{cat_name}' işlenirken kritik bir hata oluştu: {e}")
             
             browser.close()
             print("\n✅ Tüm kategoriler başarıyla işlendi. Script tamamlandı.")
     except Exception as e:
         print(f"🔥🔥 Kritik hata, tarayıcı başlatılamadı veya oturum açılamadı: {e}")
+    # Hatalı kategoriler tamamlanmamış kalır; sonraki --resume yalnızca onları tarar
+    if categories:
+        checkpoint.finish([name for name, _ in categories])
 
 if __name__ == "__main__":
-    run_scraper()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Edenge ürün tarayıcı")
+    parser.add_argument("--resume", action="store_true", help="Yarıda kalan son çalıştırmaya kaldığı yerden devam et")
+    args = parser.parse_args()
+    # Aşama süreleri ve sayaçlar çalıştırma sonunda .cache/metrics altına yazılır
+    with metrics.run("denge"):
+        started_at = datetime.now(timezone.utc).isoformat()
+        run_scraper(resume=args.resume)
+        # Değişmeyen ürünlerin price_try / price_usd değerleri bu çalıştırmanın kurlarıyla güncellenir;
+        # kategori listesi ve "son güncelleme" bilgisi frontend'e marketplace_stats özetinden gider
+        sync_engine.refresh_fx(sync_engine.DENGE)
+        sync_engine.refresh_stats(sync_engine.DENGE, started_at)
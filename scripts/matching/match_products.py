@@ -0,0 +1,322 @@
+# Pazaryerleri arası ürün eşleştirme (Oksid ↔ Bayinet ↔ Denge).
+#
+# Üç tablodaki ürün adları normalize edilir (marka, model kodu, birimli değerler,
+# Türkçe küçük harf), aday çiftler iki yoldan bulunur:
+#   - aynı model kodunu paylaşan ürünler (kod indeksi, token blocking)
+#   - MinHash imzalarında en az bir LSH bandı aynı olan ürünler
+# Adaylar puanlanır, MATCH_MIN_CONFIDENCE üstündeki çiftler product_matches
+# tablosuna yazılır.
+#
+# Çalıştırmalar artımlıdır: ürünlerin ad özeti, özellikleri ve imzaları lokal
+# SQLite'ta (.cache/matching.sqlite) saklanır. Her çalıştırmada yalnızca yeni,
+# adı değişen veya silinen ürünlerin çiftleri silinip yeniden hesaplanır. Çift puanı
+# sadece iki ürünün adlarına bağlıdır, ancak aday kümesi tam yeniden hesaplamayla birebir
+# aynı değildir: MAX_BUCKET_SIZE'ı aşan kod/LSH kovaları atlandığından, bir kova o anki
+# duruma göre büyüyüp küçüldükçe eski çiftler korunabilir ya da yeni çiftler bulunmayabilir.
+# Sapma büyürse --full ile baştan hesaplanır.
+#
+#   python -m scripts.matching.match_products           # artımlı
+#   python -m scripts.matching.match_products --full    # lokal durumu sıfırlayıp baştan
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+
+from scripts.shared import write_layer, metrics
+from scripts.matching import lsh
+from scripts.matching.normalize import normalize
+
+STATE_PATH = os.getenv("MATCH_STATE_PATH", os.path.join(".cache", "matching.sqlite"))
+MIN_CONFIDENCE = float(os.getenv("MATCH_MIN_CONFIDENCE", "0.6"))
+# Bu kadar üründen kalabalık LSH kovaları / kodlar ayırt edici değildir ("kablo", "usb3")
+MAX_BUCKET_SIZE = int(os.getenv("MATCH_MAX_BUCKET_SIZE", "200"))
+FETCH_PAGE_SIZE = 1000
+# Oksid anahtarı URL olduğu için .in_() filtreleri küçük tutulur (sync_engine ile aynı gerekçe)
+DELETE_CHUNK_SIZE = 50
+MATCHES_TABLE = "product_matches"
+MATCHES_KEY = "marketplace_a,key_a,marketplace_b,key_b"
+
+# marketplace → (tablo, anahtar kolonu)
+SOURCES = {
+    "oksid": ("oksid_products", "url"),
+    "bayinet": ("bayinet_products", "product_id"),
+    "denge": ("denge_products", "product_id"),
+}
+
+
+# --- Lokal durum ---
+# Aday puanlamada aynı ürün defalarca okunur; çözülmüş özellikler çalıştırma boyunca bellekte tutulur
+_features = {}
+
+
+def open_state(path=None):
+    path = path or STATE_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        "CREATE TABLE IF NOT EXISTS products ("
+        "  marketplace TEXT NOT NULL, key TEXT NOT NULL, name_hash TEXT NOT NULL, features TEXT NOT NULL, signature BLOB NOT NULL,"
+        "  PRIMARY KEY (marketplace, key));"
+        "CREATE TABLE IF NOT EXISTS buckets (band TEXT NOT NULL, marketplace TEXT NOT NULL, key TEXT NOT NULL);"
+        "CREATE INDEX IF NOT EXISTS buckets_band_idx ON buckets (band);"
+        "CREATE INDEX IF NOT EXISTS buckets_product_idx ON buckets (marketplace, key);"
+        "CREATE TABLE IF NOT EXISTS codes (code TEXT NOT NULL, marketplace TEXT NOT NULL, key TEXT NOT NULL);"
+        "CREATE INDEX IF NOT EXISTS codes_code_idx ON codes (code);"
+        "CREATE INDEX IF NOT EXISTS codes_product_idx ON codes (marketplace, key);"
+        # DB'deki product_matches'in aynası: silinecek çiftleri DB'ye sormadan bilmek için
+        "CREATE TABLE IF NOT EXISTS matches ("
+        "  marketplace_a TEXT NOT NULL, key_a TEXT NOT NULL, marketplace_b TEXT NOT NULL, key_b TEXT NOT NULL,"
+        "  confidence REAL NOT NULL, method TEXT NOT NULL,"
+        "  PRIMARY KEY (marketplace_a, key_a, marketplace_b, key_b));"
+        "CREATE INDEX IF NOT EXISTS matches_b_idx ON matches (marketplace_b, key_b);"
+    )
+    return conn
+
+
+def reset_state(conn):
+    _features.clear()
+    conn.executescript("DELETE FROM products; DELETE FROM buckets; DELETE FROM codes; DELETE FROM matches;")
+    conn.commit()
+
+
+def name_hash(name):
+    return hashlib.sha1((name or "").encode("utf-8")).hexdigest()
+
+
+def local_hashes(conn, marketplace):
+    return dict(conn.execute("SELECT key, name_hash FROM products WHERE marketplace = ?", (marketplace,)))
+
+
+def forget(conn, marketplace, keys):
+    """Ürünleri indekslerden ve lokal eşleşme aynasından çıkarır; silinen çiftleri döndürür."""
+    dropped = []
+    for i in range(0, len(keys), 500):
+        chunk = keys[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        params = [marketplace, *chunk]
+        for key in chunk:
+            _features.pop((marketplace, key), None)
+        for table in ("products", "buckets", "codes"):
+            conn.execute(f"DELETE FROM {table} WHERE marketplace = ? AND key IN ({placeholders})", params)
+        for side in ("a", "b"):
+            where = f"marketplace_{side} = ? AND key_{side} IN ({placeholders})"
+            dropped.extend(conn.execute(f"SELECT marketplace_a, key_a, marketplace_b, key_b FROM matches WHERE {where}", params))
+            conn.execute(f"DELETE FROM matches WHERE {where}", params)
+    return dropped
+
+
+def remember(conn, marketplace, key, name):
+    features = normalize(name)
+    sig = lsh.signature(features["tokens"])
+    _features[(marketplace, key)] = (features, sig)
+    conn.execute(
+        "INSERT OR REPLACE INTO products (marketplace, key, name_hash, features, signature) VALUES (?, ?, ?, ?, ?)",
+        (marketplace, key, name_hash(name), json.dumps(features, ensure_ascii=False), lsh.pack(sig)),
+    )
+    conn.executemany("INSERT INTO buckets (band, marketplace, key) VALUES (?, ?, ?)", [(b, marketplace, key) for b in lsh.bands(sig)])
+    conn.executemany("INSERT INTO codes (code, marketplace, key) VALUES (?, ?, ?)", [(c, marketplace, key) for c in features["codes"]])
+    return features, sig
+
+
+def load_product(conn, marketplace, key):
+    cached = _features.get((marketplace, key))
+    if cached:
+        return cached
+    row = conn.execute("SELECT features, signature FROM products WHERE marketplace = ? AND key = ?", (marketplace, key)).fetchone()
+    if not row:
+        return None
+    _features[(marketplace, key)] = (json.loads(row[0]), lsh.unpack(row[1]))
+    return _features[(marketplace, key)]
+
+
+# --- Aday bulma ve puanlama ---
+def candidates(conn, marketplace, key, features, sig):
+    """Aynı model kodunu ya da LSH kovasını paylaşan, başka pazaryerlerindeki ürünler."""
+    found = set()
+    for index, column, values in (("codes", "code", features["codes"]), ("buckets", "band", lsh.bands(sig))):
+        for value in values:
+            members = conn.execute(
+                f"SELECT marketplace, key FROM {index} WHERE {column} = ? LIMIT ?", (value, MAX_BUCKET_SIZE + 1)
+            ).fetchall()
+            if len(members) > MAX_BUCKET_SIZE:
+                continue
+            for other in members:
+                if other[0] != marketplace:
+                    found.add(other)
+    return found
+
+
+def _unit_conflict(units_a, units_b):
+    """Aynı boyutta (kapasite, güç...) ortak değeri olmayan birimler farklı ürün demektir."""
+    by_dim_a, by_dim_b = {}, {}
+    for unit in units_a:
+        by_dim_a.setdefault(unit.split(":")[0], set()).add(unit)
+    for unit in units_b:
+        by_dim_b.setdefault(unit.split(":")[0], set()).add(unit)
+    return any(not (by_dim_a[dim] & by_dim_b[dim]) for dim in by_dim_a.keys() & by_dim_b.keys())
+
+
+def score(features_a, sig_a, features_b, sig_b):
+    """0-1 arası güven puanı ve yöntem; kesin farklı ürünler için (0, None)."""
+    if features_a["brand"] and features_b["brand"] and features_a["brand"] != features_b["brand"]:
+        return 0, None
+    if _unit_conflict(features_a["units"], features_b["units"]):
+        return 0, None
+    jaccard = lsh.similarity(sig_a, sig_b)
+    if set(features_a["codes"]) & set(features_b["codes"]):
+        return round(0.7 + 0.3 * jaccard, 3), "code"
+    if features_a["codes"] and features_b["codes"]:
+        # İkisinde de model kodu var ama ortak değil: büyük ihtimalle aynı serinin farklı modelleri
+        jaccard /= 2
+    if features_a["brand"] and features_a["brand"] == features_b["brand"]:
+        return round(0.85 * jaccard, 3), "minhash"
+    return round(0.7 * jaccard, 3), "minhash"
+
+
+def canonical_pair(marketplace, key, other_marketplace, other_key):
+    if (marketplace, key) <= (other_marketplace, other_key):
+        return marketplace, key, other_marketplace, other_key
+    return other_marketplace, other_key, marketplace, key
+
+
+def match_product(conn, marketplace, key, features, sig, scored=None):
+    """Ürünün eşik üstündeki çiftleri; scored verilirse daha önce puanlanan çiftler atlanır."""
+    pairs = {}
+    for other_marketplace, other_key in candidates(conn, marketplace, key, features, sig):
+        pair = canonical_pair(marketplace, key, other_marketplace, other_key)
+        if scored is not None:
+            if pair in scored:
+                continue
+            scored.add(pair)
+        other = load_product(conn, other_marketplace, other_key)
+        if not other:
+            continue
+        confidence, method = score(features, sig, *other)
+        if confidence >= MIN_CONFIDENCE:
+            pairs[pair] = (confidence, method)
+    return pairs
+
+
+# --- DB ---
+def fetch_names(marketplace):
+    """Tablodaki tüm (anahtar, ad) çiftleri; sadece iki kolon sayfalı okunur."""
+    from scripts.shared.supabase_client import supabase
+
+    table, key = SOURCES[marketplace]
+    names = {}
+    start = 0
+    while True:
+        with metrics.timer("db_lookup", marketplace=marketplace):
+            data = supabase.table(table).select(f"{key}, name").order(key).range(start, start + FETCH_PAGE_SIZE - 1).execute().data
+        names.update({row[key]: row.get("name") or "" for row in data if row.get(key)})
+        if len(data) < FETCH_PAGE_SIZE:
+            return names
+        start += FETCH_PAGE_SIZE
+
+
+def delete_pairs(pairs):
+    """Çiftleri (marketplace_a, key_a) gruplarıyla DB'den siler."""
+    from scripts.shared.supabase_client import supabase
+
+    groups = {}
+    for marketplace_a, key_a, marketplace_b, key_b in pairs:
+        groups.setdefault((marketplace_a, marketplace_b), set()).add(key_a)
+    # Aynı key_a'nın silinmeyecek başka çiftleri de olabileceğinden key_b ile de daraltılır
+    wanted = set(pairs)
+    for (marketplace_a, marketplace_b), keys in groups.items():
+        keys = sorted(keys)
+        for i in range(0, len(keys), DELETE_CHUNK_SIZE):
+            chunk = keys[i:i + DELETE_CHUNK_SIZE]
+            others = sorted({p[3] for p in wanted if p[0] == marketplace_a and p[2] == marketplace_b and p[1] in chunk})
+            for j in range(0, len(others), DELETE_CHUNK_SIZE):
+                with metrics.timer("db_write", marketplace=marketplace_a):
+                    (supabase.table(MATCHES_TABLE).delete()
+                        .eq("marketplace_a", marketplace_a).eq("marketplace_b", marketplace_b)
+                        .in_("key_a", chunk).in_("key_b", others[j:j + DELETE_CHUNK_SIZE]).execute())
+
+
+def delete_all_pairs():
+    from scripts.shared.supabase_client import supabase
+
+    # PostgREST filtresiz DELETE'e izin vermez
+    supabase.table(MATCHES_TABLE).delete().gte("confidence", 0).execute()
+
+
+def upsert_pairs(rows):
+    batcher = write_layer.get_batcher(f"{MATCHES_TABLE}:upsert", initial=500, max_size=2000)
+    written, _, failed = write_layer.write_in_batches(
+        rows,
+        write_layer.send_upsert(MATCHES_TABLE, MATCHES_KEY),
+        batcher,
+        entry={"op": "upsert", "table": MATCHES_TABLE, "key": MATCHES_KEY},
+        label=MATCHES_TABLE,
+    )
+    if failed:
+        print(f"📮 {len(failed)} eşleşme yazılamadı, dead-letter dosyasına alındı (replay ile tekrar gönderilebilir).")
+    return written
+
+
+# --- Ana akış ---
+def run(full=False, conn=None):
+    conn = conn or open_state()
+    has_state = conn.execute("SELECT 1 FROM products LIMIT 1").fetchone() is not None
+    if full or not has_state:
+        # Lokal durum yoksa DB'deki eşleşmelerin hangisinin geçerli olduğu bilinemez; baştan kurulur
+        print("🔄 Tam eşleştirme: lokal durum ve product_matches sıfırlanıyor...")
+        reset_state(conn)
+        delete_all_pairs()
+
+    changed = []
+    dropped = set()
+    for marketplace in SOURCES:
+        names = fetch_names(marketplace)
+        known = local_hashes(conn, marketplace)
+        updated = [k for k, name in names.items() if known.get(k) != name_hash(name)]
+        removed = [k for k in known if k not in names]
+        dropped.update(forget(conn, marketplace, updated + removed))
+        for key in updated:
+            changed.append((marketplace, key, *remember(conn, marketplace, key, names[key])))
+        metrics.inc("rows_sent", len(updated), marketplace=marketplace, stage="normalize")
+        print(f"📦 {marketplace}: {len(names)} ürün, {len(updated)} yeni/değişen, {len(removed)} silinen.")
+
+    pairs = {}
+    scored = set()
+    with metrics.timer("match"):
+        # Tüm değişenler indekse girdikten sonra eşleştirilir ki birbirleriyle de eşleşebilsinler
+        for marketplace, key, features, sig in changed:
+            pairs.update(match_product(conn, marketplace, key, features, sig, scored))
+
+    stale = dropped - set(pairs)
+    if stale:
+        print(f"🧹 {len(stale)} geçersiz eşleşme siliniyor...")
+        delete_pairs(sorted(stale))
+
+    rows = [
+        {"marketplace_a": a, "key_a": ka, "marketplace_b": b, "key_b": kb, "confidence": confidence, "method": method,
+         "matched_at": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+        for (a, ka, b, kb), (confidence, method) in pairs.items()
+    ]
+    written = upsert_pairs(rows) if rows else []
+    # Yazılamayan çiftler de aynaya girer: DB'de önceki çalıştırmadan kalmış hâlleri olabilir ve
+    # ileride geçersizleşirlerse silinebilmeleri için bilinmeleri gerekir (olmayan çifti silmek zararsızdır)
+    conn.executemany("INSERT OR REPLACE INTO matches VALUES (?, ?, ?, ?, ?, ?)", [pair + value for pair, value in pairs.items()])
+    # Yazılamayan çiftlerin ürünleri ad özeti silinerek işaretlenir; sonraki çalıştırma onları yeniden eşleştirip yazar
+    unwritten = set(pairs) - {(r["marketplace_a"], r["key_a"], r["marketplace_b"], r["key_b"]) for r in written}
+    retry = {(a, ka) for a, ka, _, _ in unwritten} | {(b, kb) for _, _, b, kb in unwritten}
+    conn.executemany("UPDATE products SET name_hash = '' WHERE marketplace = ? AND key = ?", sorted(retry))
+    if retry:
+        print(f"🔁 {len(unwritten)} eşleşme yazılamadı; {len(retry)} ürün sonraki çalıştırmada yeniden eşleştirilecek.")
+    conn.commit()
+    metrics.inc("changed_rows", len(written), stage="match")
+    print(f"✅ {len(changed)} ürün yeniden eşleştirildi: {len(written)} eşleşme yazıldı, {len(stale)} eşleşme silindi.")
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pazaryerleri arası ürün eşleştirme")
+    parser.add_argument("--full", action="store_true", help="Lokal durumu sıfırlayıp tüm ürünleri yeniden eşleştir")
+    args = parser.parse_args()
+    with metrics.run("matching"):
+        run(full=args.full)
@@ -0,0 +1,121 @@
+# Ürün adı normalizasyonu (pazaryerleri arası eşleştirme için).
+#
+# Aynı ürün üç sitede farklı yazılır:
+#   "KINGSTON 480GB A400 SA400S37/480G 2.5\" SATA3 SSD"
+#   "Kingston A400 480 GB 2.5'' SATA 3 SSD Disk (SA400S37/480G)"
+# Ad önce Türkçe kurallarla küçültülüp ASCII'ye katlanır (İ/I, ş, ğ...), ardından
+# marka, model kodları (harf + rakam içeren parçalar) ve birimli değerler
+# (kapasite, frekans, güç, ekran boyu...) ayrı ayrı çıkarılır.
+import re
+
+from scripts.shared.text import fold
+
+# Ek adı → (boyut, çarpan, kanonik ek)
+UNITS = {
+    "tb": ("cap", 1000, "gb"), "gb": ("cap", 1, "gb"), "mb": ("cap", 0.001, "gb"),
+    "ghz": ("freq", 1000, "mhz"), "mhz": ("freq", 1, "mhz"),
+    "hz": ("hz", 1, "hz"),
+    "w": ("power", 1, "w"), "watt": ("power", 1, "w"),
+    "mah": ("battery", 1, "mah"),
+    "inc": ("size", 1, "in"), "inch": ("size", 1, "in"), "in": ("size", 1, "in"), '"': ("size", 1, "in"), "''": ("size", 1, "in"),
+    "mm": ("length", 1, "mm"), "cm": ("length", 10, "mm"), "m": ("length", 1000, "mm"),
+    "ms": ("latency", 1, "ms"),
+}
+UNIT_PATTERN = re.compile(
+    r"(?<![a-z0-9.,])(\d+(?:[.,]\d+)?)\s*(" + "|".join(sorted((re.escape(u) for u in UNITS), key=len, reverse=True)) + r")(?![a-z0-9])"
+)
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-/.][a-z0-9]+)*")
+# Harf + rakam içerse de model kodu sayılmayan genel ifadeler: arayüz/standart adları ("sata3", "ddr4")
+# ve kodun içinden çıkan kapasite/güç parçaları ("480g", "650w")
+GENERIC_CODE_PATTERN = re.compile(r"(sata|usb|ddr|lpddr|gddr|pcie|gen|hdmi|wifi|cat|nvme|lga|rj)\d+[a-z]?|\d+(g|gb|t|tb|w|mhz)")
+
+# Marka yazım farkları → kanonik marka
+BRAND_ALIASES = {
+    "hewlett packard": "hp", "hpe": "hp", "western digital": "wd", "wdc": "wd",
+    "gigabyte": "gigabyte", "gıgabyte": "gigabyte", "tp link": "tp-link", "tplink": "tp-link",
+    "cooler master": "cooler master", "coolermaster": "cooler master", "g skill": "g.skill", "gskill": "g.skill",
+}
+BRANDS = {
+    "acer", "adata", "amd", "aoc", "apc", "apple", "asrock", "asus", "benq", "brother", "canon", "cisco",
+    "corsair", "crucial", "d-link", "dark", "dell", "epson", "everest", "fujitsu", "g.skill", "gigabyte",
+    "hikvision", "hp", "huawei", "intel", "kingston", "lenovo", "lexar", "lg", "logitech", "microsoft",
+    "msi", "netgear", "nvidia", "patriot", "philips", "razer", "samsung", "sandisk", "seagate", "sony",
+    "steelseries", "synology", "team", "thermaltake", "toshiba", "tp-link", "ubiquiti", "ugreen", "viewsonic",
+    "wd", "xerox", "xiaomi", "zyxel", "cooler master", "be quiet", "deepcool", "lian li", "nzxt", "sapphire",
+    "palit", "zotac", "pny", "inno3d", "transcend", "verbatim", "hyperx", "kioxia", "qnap", "eaton", "tenda",
+}
+# Eşleştirmede ayırt ediciliği olmayan kelimeler
+STOPWORDS = {
+    "ve", "ile", "icin", "the", "and", "for", "with", "adet", "urun", "orijinal", "yeni", "new", "renk",
+    "siyah", "black", "beyaz", "white", "kutulu", "box", "tray", "oem", "garanti", "yil",
+}
+
+
+def _number(value):
+    value = float(value.replace(",", "."))
+    return int(value) if value.is_integer() else round(value, 2)
+
+
+def extract_units(folded):
+    """'480 gb', '2,5"' gibi değerleri {'cap:480gb', 'size:2.5in'} şeklinde kanonik hale getirir."""
+    units = set()
+    for value, suffix in UNIT_PATTERN.findall(folded):
+        dimension, factor, canonical = UNITS[suffix]
+        units.add(f"{dimension}:{_number(str(float(value.replace(',', '.')) * factor))}{canonical}")
+    return units
+
+
+def extract_brand(folded):
+    padded = f" {re.sub(r'[^a-z0-9.]+', ' ', folded)} "
+    for alias, brand in BRAND_ALIASES.items():
+        if f" {alias} " in padded:
+            return brand
+    for token in padded.split():
+        if token in BRANDS:
+            return token
+    # Çok kelimeli markalar
+    for brand in BRANDS:
+        if " " in brand and f" {brand} " in padded:
+            return brand
+    return None
+
+
+def _is_unit_token(token):
+    return bool(UNIT_PATTERN.fullmatch(token))
+
+
+def extract_codes(folded):
+    """
+    Harf ve rakam içeren, en az 4 karakterlik parçalar model kodu sayılır.
+    'sa400s37/480g' hem birleşik ('sa400s37480g') hem parçalı ('sa400s37') olarak eklenir;
+    siteler kodu bazen eksik yazar.
+    """
+    codes = set()
+    for token in TOKEN_PATTERN.findall(folded):
+        parts = [p for p in re.split(r"[-/.]", token) if p]
+        candidates = {"".join(parts)} | set(parts) if len(parts) > 1 else {token}
+        for code in candidates:
+            if (len(code) >= 4 and re.search(r"[a-z]", code) and re.search(r"\d", code) and not _is_unit_token(code)
+                    and not GENERIC_CODE_PATTERN.fullmatch(code)):
+                codes.add(code)
+    return codes
+
+
+def normalize(name):
+    """
+    Ürün adından eşleştirme özelliklerini çıkarır:
+    brand, codes (model kodları), units (kanonik birimli değerler), tokens (MinHash için).
+    """
+    folded = fold(name)
+    units = extract_units(folded)
+    codes = extract_codes(folded)
+    words = {
+        w for w in re.findall(r"[a-z0-9]+", UNIT_PATTERN.sub(" ", folded))
+        if w not in STOPWORDS and (len(w) > 1 or w.isdigit())
+    }
+    return {
+        "brand": extract_brand(folded),
+        "codes": sorted(codes),
+        "units": sorted(units),
+        "tokens": sorted(words | units | codes),
+    }
@@ -0,0 +1,270 @@
+# Oksid sayfaları için değiştirilebilir HTML ayrıştırma backend'leri.
+#
+# Tarayıcının sayfadan ihtiyaç duyduğu her şey dört bölgeden gelir: ürün listesi
+# (div.colProductIn.productnlist), ara kategori blokları (div.colProductIn.product45),
+# sonraki sayfa linki (a.next) ve ana sayfadaki kategori menüsü (div.catsMenu).
+# Her backend aynı iki fonksiyonu sağlar:
+#   parse(html, category_name, base_url) -> (meta, ürünler)
+#   menu(html, base_url)                -> [(ad, link), ...]
+#
+#   bs4           : tam BeautifulSoup ağacı, html.parser (eski davranış)
+#   bs4-strainer  : BeautifulSoup + SoupStrainer, yalnızca yukarıdaki bölgeler ağaca alınır
+#   lxml          : lxml.html + XPath (C ayrıştırıcı)
+#   selectolax    : selectolax (Lexbor) + CSS seçiciler (C ayrıştırıcı)
+#
+# OKSID_PARSER ile seçilir; "auto" kurulu olan en hızlı backend'i kullanır.
+import os
+import re
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+PARSER_BACKEND = os.getenv("OKSID_PARSER", "auto")
+AUTO_ORDER = ["selectolax", "lxml", "bs4-strainer", "bs4"]
+
+STOCK_CLASS = re.compile(r"^stock\d+$")
+CURRENCY = re.compile(r"[₺$€]")
+
+
+def clean_price(price_text):
+    if not price_text: return None
+    cleaned_text = re.sub(r"[^\d,.]", "", price_text)
+    if "," in cleaned_text and cleaned_text.count(",") == 1:
+        cleaned_text = cleaned_text.replace(".", "").replace(",", ".")
+    elif "." in cleaned_text and cleaned_text.count(".") > 1:
+        parts = cleaned_text.split(".")
+        cleaned_text = "".join(parts[:-1]) + "." + parts[-1]
+    try: return float(cleaned_text)
+    except: return None
+
+
+def build_product(name, href, price1_text, price2_text, stock_classes, category_name, base_url):
+    """Backend'den bağımsız ham kart alanlarını ürün sözlüğüne çevirir."""
+    price1, price2, currency = None, None, None
+    if price1_text is not None:
+        price1 = clean_price(price1_text)
+        cur = CURRENCY.search(price1_text)
+        if cur: currency = cur.group(0)
+    if price2_text is not None:
+        price2 = clean_price(price2_text)
+    stock = "Bilinmiyor"
+    if stock_classes is not None:
+        if "stocktel" in stock_classes: stock = "Stokta Yok"
+        elif any(STOCK_CLASS.match(c) for c in stock_classes): stock = "Stokta Var"
+    return {"name": name, "url": urljoin(base_url, href or ""), "price_1": price1, "price_2": price2,
+            "currency": currency, "stock": stock, "category": category_name}
+
+
+def build_meta(kind, has_products, next_href, children, base_url):
+    next_url = None
+    if has_products and next_href and not next_href.startswith("javascript"):
+        next_url = urljoin(base_url, next_href)
+    return {
+        "kind": kind,
+        "has_products": has_products,
+        "next_url": next_url,
+        "children": [(name, urljoin(base_url, href)) for name, href in children] if kind == "category" else [],
+    }
+
+
+# --- BeautifulSoup ---
+# Sınıf eşleşmesi bs4 sürümüne göre tek tek sınıf değerine ya da tüm class
+# metnine karşı yapılır; bu desen iki durumda da çalışır.
+STRAINER = SoupStrainer(["div", "a"], class_=re.compile(r"(?:^|\s)(?:colProductIn|next|catsMenu)(?:\s|$)"))
+
+
+class Bs4Backend:
+    def __init__(self, name="bs4", features="html.parser", strainer=None):
+        self.name = name
+        self.features = features
+        self.strainer = strainer
+
+    def soup(self, html):
+        return BeautifulSoup(html, self.features, parse_only=self.strainer)
+
+    def parse(self, html, category_name, base_url):
+        soup = self.soup(html)
+        container = soup.select_one("div.colProductIn.productnlist")
+        if container:
+            kind = "listing"
+        elif soup.select("div.colProductIn.product45"):
+            kind = "category"
+        else:
+            kind = "unknown"
+
+        products = []
+        items = container.select("ul li") if container else []
+        for li in items:
+            try:
+                link_tag = li.select_one("a.ihlog.product_click")
+                if not link_tag: continue
+                p1_tag = li.select_one("span.fiyat1")
+                p2_tag = li.select_one("span.fiyat3")
+                stock_span = li.select_one("span.stock")
+                products.append(build_product(
+                    link_tag.get("data-name", "N/A"), link_tag.get("href", ""),
+                    p1_tag.get_text(strip=True) if p1_tag else None,
+                    p2_tag.get_text(strip=True) if p2_tag else None,
+                    stock_span.get("class", []) if stock_span else None,
+                    category_name, base_url,
+                ))
+            except Exception: continue
+
+        children = []
+        if kind == "category":
+            for block in soup.select("div.colProductIn.product45"):
+                link_tag = block.select_one("a.main-title")
+                if link_tag and link_tag.get_text(strip=True) and link_tag.get("href"):
+                    children.append((link_tag.get_text(strip=True), link_tag.get("href")))
+        next_tag = soup.select_one("a.next")
+        meta = build_meta(kind, bool(items), next_tag.get("href") if next_tag else None, children, base_url)
+        return meta, products
+
+    def menu(self, html, base_url):
+        soup = self.soup(html)
+        return [(a.get_text(strip=True), urljoin(base_url, a.get("href") or ""))
+                for a in soup.select("div.catsMenu > ul.hidden-xs > li > a")]
+
+
+# --- lxml ---
+def _has_class(*names):
+    return " and ".join(f"contains(concat(' ', normalize-space(@class), ' '), ' {n} ')" for n in names)
+
+
+class LxmlBackend:
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        self._fromstring = lxml.html.fromstring
+
+    def parse(self, html, category_name, base_url):
+        root = self._fromstring(html)
+        containers = root.xpath(f"//div[{_has_class('colProductIn', 'productnlist')}]")
+        blocks = root.xpath(f"//div[{_has_class('colProductIn', 'product45')}]")
+        kind = "listing" if containers else "category" if blocks else "unknown"
+
+        products = []
+        items = containers[0].xpath(".//ul//li") if containers else []
+        for li in items:
+            try:
+                links = li.xpath(f".//a[{_has_class('ihlog', 'product_click')}]")
+                if not links: continue
+                p1 = li.xpath(f".//span[{_has_class('fiyat1')}]")
+                p2 = li.xpath(f".//span[{_has_class('fiyat3')}]")
+                stock = li.xpath(f".//span[{_has_class('stock')}]")
+                products.append(build_product(
+                    links[0].get("data-name", "N/A"), links[0].get("href", ""),
+                    _lxml_text(p1[0]) if p1 else None,
+                    _lxml_text(p2[0]) if p2 else None,
+                    (stock[0].get("class") or "").split() if stock else None,
+                    category_name, base_url,
+                ))
+            except Exception: continue
+
+        children = []
+        if kind == "category":
+            for block in blocks:
+                links = block.xpath(f".//a[{_has_class('main-title')}]")
+                if links and _lxml_text(links[0]) and links[0].get("href"):
+                    children.append((_lxml_text(links[0]), links[0].get("href")))
+        next_links = root.xpath(f"//a[{_has_class('next')}]")
+        meta = build_meta(kind, bool(items), next_links[0].get("href") if next_links else None, children, base_url)
+        return meta, products
+
+    def menu(self, html, base_url):
+        root = self._fromstring(html)
+        links = root.xpath(f"//div[{_has_class('catsMenu')}]/ul[{_has_class('hidden-xs')}]/li/a")
+        return [(_lxml_text(a), urljoin(base_url, a.get("href") or "")) for a in links]
+
+
+def _lxml_text(node):
+    # BeautifulSoup get_text(strip=True) ile aynı: her metin parçası kırpılıp birleştirilir
+    return "".join(t.strip() for t in node.itertext())
+
+
+# --- selectolax ---
+class SelectolaxBackend:
+    name = "selectolax"
+
+    def __init__(self):
+        try:
+            from selectolax.lexbor import LexborHTMLParser as parser
+        except ImportError:
+            from selectolax.parser import HTMLParser as parser
+        self._parser = parser
+
+    def parse(self, html, category_name, base_url):
+        tree = self._parser(html)
+        container = tree.css_first("div.colProductIn.productnlist")
+        blocks = tree.css("div.colProductIn.product45")
+        kind = "listing" if container else "category" if blocks else "unknown"
+
+        products = []
+        items = container.css("ul li") if container else []
+        for li in items:
+            try:
+                link_tag = li.css_first("a.ihlog.product_click")
+                if not link_tag: continue
+                # Değersiz attribute'larda selectolax None döndürür, bs4 ise ""
+                attrs = {k: v or "" for k, v in link_tag.attributes.items()}
+                p1_tag = li.css_first("span.fiyat1")
+                p2_tag = li.css_first("span.fiyat3")
+                stock_span = li.css_first("span.stock")
+                products.append(build_product(
+                    attrs.get("data-name", "N/A"), attrs.get("href", ""),
+                    p1_tag.text(strip=True) if p1_tag else None,
+                    p2_tag.text(strip=True) if p2_tag else None,
+                    (stock_span.attributes.get("class") or "").split() if stock_span else None,
+                    category_name, base_url,
+                ))
+            except Exception: continue
+
+        children = []
+        if kind == "category":
+            for block in blocks:
+                link_tag = block.css_first("a.main-title")
+                if link_tag and link_tag.text(strip=True) and link_tag.attributes.get("href"):
+                    children.append((link_tag.text(strip=True), link_tag.attributes.get("href")))
+        next_tag = tree.css_first("a.next")
+        meta = build_meta(kind, bool(items), next_tag.attributes.get("href") if next_tag else None, children, base_url)
+        return meta, products
+
+    def menu(self, html, base_url):
+        tree = self._parser(html)
+        return [(a.text(strip=True), urljoin(base_url, a.attributes.get("href") or ""))
+                for a in tree.css("div.catsMenu > ul.hidden-xs > li > a")]
+
+
+def _strainer_backend():
+    try:
+        import lxml  # noqa: F401
+        features = "lxml"
+    except ImportError:
+        features = "html.parser"
+    return Bs4Backend("bs4-strainer", features=features, strainer=STRAINER)
+
+
+BACKENDS = {
+    "bs4": Bs4Backend,
+    "bs4-strainer": _strainer_backend,
+    "lxml": LxmlBackend,
+    "selectolax": SelectolaxBackend,
+}
+
+
+def get_backend(name=None):
+    """İstenen backend'i döndürür; kurulu değilse sıradaki en hızlı backend'e düşer."""
+    name = name or PARSER_BACKEND
+    if name != "auto" and name not in BACKENDS:
+        raise RuntimeError(f"🚨 Bilinmeyen ayrıştırıcı backend'i: {name} (seçenekler: auto, {', '.join(BACKENDS)})")
+    order = AUTO_ORDER if name == "auto" else [name] + [n for n in AUTO_ORDER if n != name]
+    for candidate in order:
+        try:
+            backend = BACKENDS[candidate]()
+        except ImportError:
+            if name != "auto":
+                print(f"⚠️ '{candidate}' ayrıştırıcısı kurulu değil, sıradaki backend deneniyor.")
+            continue
+        return backend
+    raise RuntimeError("🚨 Kullanılabilir bir HTML ayrıştırıcı bulunamadı.")
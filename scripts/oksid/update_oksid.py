@@ -1,18 +1,28 @@
 import re
+import json
 import time
-from urllib.parse import urljoin
-from bs4 import BeautifulSoup
+import hashlib
+import argparse
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import requests
 import os
 
 # Supabase Client'ın Tanımlandığı Varsayımı
 try:
-    from scripts.shared.supabase_client import supabase
+    from scripts.shared import sync_engine
 except ImportError:
     print("⚠️ Supabase client import edilemedi. Veritabanı işlemleri pas geçilecektir.")
-    supabase = None 
+    sync_engine = None 
 
-BASE_URL = "https://www.oksid.com.tr"
+from scripts.shared.pipeline import BackgroundWriter, StreamingSink
+from scripts.shared.http_cache import PageCache
+from scripts.shared.rate_limit import get_limiter, log_summaries
+from scripts.shared.checkpoint import Checkpoint
+from scripts.shared import metrics
+from scripts.oksid.parsing import get_backend
+
+BASE_URL = os.getenv("OKSID_BASE_URL", "https://www.oksid.com.tr")
 
 # Düz Requests için Başlıklar
 HEADERS = {
@@ -28,126 +38,207 @@ PROXIES = {}
 if PROXY_URL:
     PROXIES = {'http': PROXY_URL, 'https': PROXY_URL}
 
+# Eşzamanlı tarama ayarları (OKSID_CRAWL_MODE=serial ile eski seri davranışa dönülür).
+# Host başına istek hızı ve eşzamanlılık scripts/shared/rate_limit.py ile uyarlanır;
+# PER_HOST_LIMIT eşzamanlılığın çıkabileceği üst sınırdır.
+CRAWL_MODE = os.getenv("OKSID_CRAWL_MODE", "concurrent")
+CRAWL_WORKERS = int(os.getenv("OKSID_CRAWL_WORKERS", "8"))
+PER_HOST_LIMIT = int(os.getenv("OKSID_PER_HOST_LIMIT", "4"))
+
+# Çalışma boyunca çekilen sayfa sayısı (sayfa/sn raporu için);
+# not_modified: 304 dönen, unchanged: ürün listesi hash'i aynı çıkan sayfalar
+CRAWL_STATS = {"pages": 0, "not_modified": 0, "unchanged": 0}
+
+# HTML ayrıştırıcı backend'i (OKSID_PARSER: auto, selectolax, lxml, bs4-strainer, bs4)
+PARSER = get_backend()
+
+# Kategori/liste sayfaları için koşullu istek + parça hash önbelleği (HTTP_CACHE=0 ile kapatılır)
+PAGE_CACHE = PageCache("oksid")
+
+# Keşfedilen kategori ağacı (yaprak liste sayfaları); TTL dolana kadar sonraki
+# çalıştırmalar ana sayfa ve ara kategori sayfalarını atlayıp doğrudan yapraklara gider
+TREE_PATH = os.getenv("OKSID_TREE_PATH", os.path.join(".cache", "oksid_tree.json"))
+TREE_TTL_HOURS = float(os.getenv("OKSID_TREE_TTL_HOURS", "168"))
+# known_leaves: kayıtlı ağaçtan gelen yapraklar, leaves: bu çalıştırmada liste olduğu görülenler,
+# failed: ilk isteği hata veren (ne olduğu bilinmeyen) kategori/liste sayfaları
+TREE_STATE = {"known_leaves": set(), "leaves": {}, "stale": False, "failed": set()}
+
+# Liste parçası hash'inde yok sayılan, her istekte değişebilen bloklar
+VOLATILE_HTML = re.compile(r"<script\b.*?</script>|<input[^>]+__RequestVerificationToken[^>]*>", re.S | re.I)
+
 # --- TEMEL FONKSİYONLAR ---
-def fetch_html(url, retries=3, backoff=5): 
+def http_get(url, headers=None, retries=3, category=None):
+    # Bekleme süreleri host'un sınırlayıcısına aittir: 429/5xx/challenge sonrası
+    # soğuma bitmeden yeni istek çıkmaz, sağlıklı yanıtlarda hız kendiliğinden artar
+    limiter = get_limiter(url)
     for attempt in range(retries):
         try:
-            res = requests.get(url, headers=HEADERS, proxies=PROXIES, timeout=120) 
+            with limiter.slot() as slot, metrics.timer("page_load", category=category):
+                res = requests.get(url, headers=headers or HEADERS, proxies=PROXIES, timeout=120)
+                slot.observe(res.status_code, res.headers, res.text)
+            metrics.inc("bytes", len(res.content), category=category)
             res.raise_for_status()
-            return BeautifulSoup(res.text, "html.parser")
+            return res
         except Exception as e:
+            # Kaldırılmış sayfa tekrar denemekle gelmez
+            if is_gone(e): raise
             print(f"⚠️ Hata {e} (URL: {url}) → retry {attempt+1}/{retries}")
-            if attempt < retries - 1:
-                time.sleep(backoff * (attempt + 1))
-            else: raise
-
-def clean_price(price_text):
-    if not price_text: return None
-    cleaned_text = re.sub(r"[^\d,.]", "", price_text)
-    if "," in cleaned_text and cleaned_text.count(",") == 1:
-        cleaned_text = cleaned_text.replace(".", "").replace(",", ".")
-    elif "." in cleaned_text and cleaned_text.count(".") > 1:
-        parts = cleaned_text.split(".")
-        cleaned_text = "".join(parts[:-1]) + "." + parts[-1]
-    try: return float(cleaned_text)
-    except: return None
-
-# --- GÜNCELLENMİŞ SUPABASE KAYDETME FONKSİYONU (SADECE TERMİNAL LOGLAMA) ---
+            if attempt == retries - 1: raise
+            metrics.inc("retries", stage="page_load", category=category)
+
+def is_gone(error):
+    response = getattr(error, "response", None)
+    return isinstance(error, requests.HTTPError) and response is not None and response.status_code in (404, 410)
+
+def fetch_html(url, retries=3):
+    return http_get(url, retries=retries).text
+
+def listing_fragment_hash(html):
+    """
+    Sayfanın ürün listesi parçasının hash'i (liste yoksa tüm sayfanın).
+    HTML ayrıştırılmadan ham metin üzerinde hesaplanır; script blokları
+    ve form token'ları gibi her istekte değişen kısımlar çıkarılır.
+    """
+    start = html.find("colProductIn")
+    fragment = html[start:] if start != -1 else html
+    end = fragment.find("<footer")
+    if end != -1:
+        fragment = fragment[:end]
+    return hashlib.sha1(VOLATILE_HTML.sub("", fragment).encode("utf-8")).hexdigest()
+
+class FetchedPage:
+    """
+    fetch_page sonucu. Sayfa son çalıştırmadan beri değişmediyse html None'dır
+    ve sayfanın önceki meta'sı (cached_meta) kullanılır.
+    """
+    def __init__(self, url, html, validators, cached_meta=None, cache_status="miss"):
+        self.url = url
+        self.html = html
+        self.validators = validators
+        self.cached_meta = cached_meta
+        self.cache_status = cache_status
+
+def fetch_page(url, retries=3, category=None):
+    entry = PAGE_CACHE.get(url)
+    headers = dict(HEADERS, **PAGE_CACHE.conditional_headers(entry))
+    res = http_get(url, headers=headers, retries=retries, category=category)
+    if res.status_code == 304 and entry:
+        return FetchedPage(url, None, entry, cached_meta=entry["meta"], cache_status="not_modified")
+    validators = {
+        "etag": res.headers.get("ETag"),
+        "last_modified": res.headers.get("Last-Modified"),
+        "fragment_hash": listing_fragment_hash(res.text),
+    }
+    if entry and entry["fragment_hash"] == validators["fragment_hash"]:
+        PAGE_CACHE.refresh_validators(url, validators)
+        return FetchedPage(url, None, validators, cached_meta=entry["meta"], cache_status="unchanged")
+    return FetchedPage(url, res.text, validators)
+
+def count_page(page):
+    # Sayaçlar yalnızca tarama akışını yöneten thread'den güncellenir
+    CRAWL_STATS["pages"] += 1
+    if page.cache_status in CRAWL_STATS:
+        CRAWL_STATS[page.cache_status] += 1
+        metrics.inc("cache_hits", status=page.cache_status)
+
+def remember_page(page, meta):
+    """Sayfa işlendikten sonra doğrulayıcıları ve meta'yı önbelleğe yazar."""
+    if page.html is not None:
+        PAGE_CACHE.put(page.url, page.validators, meta)
+
+# --- SUPABASE KAYDETME FONKSİYONU (SADECE TERMİNAL LOGLAMA) ---
 def save_to_supabase(products, category_name, batch_size=50):
     """
     Sadece yeni veya fiyatı/stok durumu değişen ürünleri DB'ye yazar.
     Tüm değişiklikleri terminale loglar.
     """
-    if not products or not supabase:
+    if not sync_engine:
         print("❌ Supabase client eksik veya ürün listesi boş. Kayıt atlandı.")
         return
+    return sync_engine.sync_products(sync_engine.OKSID, products, label=category_name, batch_size=batch_size)
 
-    product_urls = [p["url"] for p in products if p.get("url")]
-    existing_products = {}
-    
-    # Adım 1: Mevcut ürünleri DB'den verimli şekilde çek
-    # Sunucu URL limiti hatasını (400 Bad Request) önlemek için chunk boyutu küçüktür.
-    SELECT_CHUNK_SIZE = 50 
-    
-    if product_urls:
-        print(f"📊 DB'den {len(product_urls)} ürünün mevcut durumu sorgulanacak...")
-        for i in range(0, len(product_urls), SELECT_CHUNK_SIZE):
-            url_chunk = product_urls[i:i + SELECT_CHUNK_SIZE]
-            try:
-                response = supabase.table("oksid_products").select("url, price_1, stock").in_("url", url_chunk).execute()
-                for item in response.data:
-                    existing_products[item["url"]] = item
-                print(f"   -> {len(response.data)} mevcut ürün bilgisi alındı (grup {i//SELECT_CHUNK_SIZE + 1}).")
-            except Exception as e:
-                print(f"⚠️ Mevcut ürünler çekilirken hata (grup {i//SELECT_CHUNK_SIZE + 1}): {e}")
-        print(f"✅ Toplam {len(existing_products)} mevcut ürün bilgisi başarıyla alındı.")
-
-    # Adım 2: Değişiklikleri belirle ve terminale yazdır
-    products_to_upsert = []
-    print("\n🔍 Değişiklikler kontrol ediliyor...")
-    for p in products:
-        url = p.get("url")
-        if not url:
-            continue
-
-        # Durum 1: Yeni ürün
-        if url not in existing_products:
-            print(f"✨ Yeni ürün bulundu: {p['name'][:60]}...")
-            p['last_price'] = None
-            products_to_upsert.append(p)
-            continue
-        
-        # Durum 2: Mevcut ürün, fiyat ve stok karşılaştır
-        existing_product = existing_products[url]
-        old_price = existing_product.get("price_1")
-        new_price = p.get("price_1")
-        old_stock = existing_product.get("stock")
-        new_stock = p.get("stock")
-
-        price_has_changed = (old_price is not None and new_price is not None and old_price != new_price)
-        stock_has_changed = (old_stock is not None and new_stock is not None and old_stock != new_stock)
-
-        if price_has_changed or stock_has_changed:
-            change_reasons = []
-            if price_has_changed:
-                p['last_price'] = old_price
-                change_reasons.append(f"Fiyat: {old_price} -> {new_price}")
-            else:
-                p['last_price'] = old_price
-            
-            if stock_has_changed:
-                change_reasons.append(f"Stok: '{old_stock}' -> '{new_stock}'")
+# Tarama sürerken DB yazımını arka planda yapan yazıcı ve checkpoint (crawl_from_homepage içinde açılır)
+_writer = None
+_checkpoint = None
+
+def queue_save(products, category_name):
+    """Yazıcı açıksa ürünleri arka plan kuyruğuna bırakır, değilse doğrudan kaydeder."""
+    if _writer:
+        _writer.submit(products, category_name)
+    else:
+        save_to_supabase(products, category_name)
+
+# --- CHECKPOINT ---
+# Anahtar, yaprak liste sayfasının URL'sidir; liste ürünleri yazıldığında tamamlanmış sayılır
+def listing_is_fresh(url):
+    return bool(_checkpoint and _checkpoint.is_fresh(url))
+
+def complete_listing(url):
+    if _checkpoint:
+        _checkpoint.complete(url, writer=_writer)
+
+# --- SAYFA AYRIŞTIRMA ---
+def describe_page(page, category_name):
+    """
+    Sayfayı sınıflandırır ve (meta, ürünler) döndürür. meta: kind ("listing",
+    "category", "unknown"), has_products, next_url, children. Değişmemiş
+    sayfalarda meta önbellekten gelir ve ürünler None'dır (ayrıştırma ve diff atlanır).
+    """
+    if page.html is None:
+        metrics.record_page(category_name)
+        return page.cached_meta, None
+    with metrics.timer("parse", category=category_name):
+        meta, products = PARSER.parse(page.html, category_name, BASE_URL)
+    metrics.record_page(category_name, products)
+    return meta, products
+
+# --- KATEGORİ AĞACI HARİTASI ---
+def load_category_tree():
+    """Taze kayıtlı ağacı ([(url, yol), ...], yaş_saat) olarak döndürür; yoksa/bayatsa None."""
+    try:
+        with open(TREE_PATH, encoding="utf-8") as f:
+            tree = json.load(f)
+    except (OSError, ValueError):
+        return None
+    age_hours = (time.time() - tree.get("discovered_at", 0)) / 3600
+    if age_hours > TREE_TTL_HOURS or not tree.get("leaves"):
+        return None
+    return [(leaf["url"], leaf["path"]) for leaf in tree["leaves"]], age_hours
+
+def save_category_tree(leaves):
+    os.makedirs(os.path.dirname(TREE_PATH) or ".", exist_ok=True)
+    tmp_path = TREE_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "discovered_at": time.time(),
+            "leaves": [{"url": url, "path": path} for url, path in sorted(leaves.items())],
+        }, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, TREE_PATH)
+    print(f"🌳 Kategori ağacı kaydedildi: {len(leaves)} yaprak liste sayfası ({TREE_PATH}).")
 
-            log_message = " | ".join(change_reasons)
-            print(f"🔄 Güncelleme: {p['name'][:50]}... | {log_message}")
-            products_to_upsert.append(p)
+def note_listing(url, path):
+    TREE_STATE["leaves"][url] = list(path)
 
-    # Adım 3: Sadece filtrelenmiş listeyi veritabanına yaz
-    if not products_to_upsert:
-        print(f"\n✅ Veritabanı güncel. '{category_name}' kategorisinde değişiklik veya yeni ürün bulunamadı.")
+def note_failed(url, error):
+    # Çekilemeyen sayfa altındaki listeler bilinmediğinden checkpoint'in beklediği anahtarlara
+    # kendisi eklenir; hiç tamamlanmayacağı için çalıştırma açık kalır. Kaldırılmış sayfa beklenmez.
+    if not is_gone(error):
+        TREE_STATE["failed"].add(url)
+
+def check_known_leaf(url, kind=None, error=None):
+    """Kayıtlı bir yaprak 404 dönerse veya artık liste sayfası değilse ağacı bayat işaretler."""
+    if url not in TREE_STATE["known_leaves"]:
+        return
+    if error is not None and is_gone(error):
+        reason = "sayfa kaldırılmış (404)"
+    elif kind is not None and kind != "listing":
+        reason = f"beklenmeyen sayfa yapısı ({kind})"
+    else:
         return
-        
-    print(f"\n💾 '{category_name}' kategorisinde {len(products_to_upsert)} değişiklik tespit edildi. Veritabanı güncelleniyor...")
-    for p in products_to_upsert:
-        p["marketplace"] = "oksid"
-        p["last_updated"] = time.strftime("%Y-%m-%d %H:%M:%S")
-
-    for i in range(0, len(products_to_upsert), batch_size):
-        chunk = products_to_upsert[i:i+batch_size]
-        for attempt in range(3):
-            try:
-                data = (
-                    supabase.table("oksid_products")
-                    .upsert(chunk, on_conflict="url")
-                    .execute()
-                )
-                print(f"✅ DB'ye {len(data.data)} ürün yazıldı (chunk {i//batch_size+1})")
-                break
-            except Exception as e:
-                print(f"⚠️ Supabase error (chunk {i//batch_size+1}), retry {attempt+1}/3: {e}")
-                time.sleep(5)
-
-# --- FİNAL HİYERARŞİK TARAMA SİSTEMİ ---
+    print(f"🌳 Kayıtlı yaprak geçersiz: {url} → {reason}")
+    TREE_STATE["stale"] = True
+
+# --- FİNAL HİYERARŞİK TARAMA SİSTEMİ (SERİ MOD) ---
 def crawl_category_tree(url, category_path, visited_urls):
     if url in visited_urls: return
     visited_urls.add(url)
@@ -159,111 +250,282 @@ def crawl_category_tree(url, category_path, visited_urls):
     print(f"{prefix}➡️ '{current_category_name}' analiz ediliyor...")
     
     try:
-        soup = fetch_html(url)
-        if not soup: return
+        page = fetch_page(url, category=current_category_name)
     except Exception as e:
         print(f"{prefix}❌ Sayfa çekilirken hata: {e}")
+        check_known_leaf(url, error=e)
+        note_failed(url, e)
         return
+    count_page(page)
+    meta, products = describe_page(page, current_category_name)
+    check_known_leaf(url, kind=meta["kind"])
 
     # ÖNCE ÜRÜN LİSTESİ SAYFASI MI DİYE KONTROL ET (en spesifik durum)
-    product_container = soup.select_one("div.colProductIn.productnlist")
-    if product_container:
+    if meta["kind"] == "listing":
+        note_listing(url, category_path)
+        if listing_is_fresh(url):
+            print(f"{prefix}  -> '{current_category_name}' yakın zamanda tamamlanmış, atlanıyor.")
+            return
         print(f"{prefix}  -> '{current_category_name}' bir ÜRÜN LİSTESİ. Tarama başlıyor...")
-        all_products = []
-        current_page_soup = soup
-        current_url = url
+        # Ürünler sayfa sayfa pencereye akar; pencere dolunca veya süresi geçince kaydedilir
+        sink = StreamingSink(queue_save, current_category_name, key="url")
+        # Sayfalar önbelleğe ancak ürünleri yazıcıya aktarıldıktan sonra işlenir
+        processed = []
         page_num = 1
+        failed = False
         while True:
             if page_num > 1:
                 try:
-                    current_page_soup = fetch_html(current_url)
-                    if not current_page_soup: break
-                except Exception: break
+                    page = fetch_page(current_url, category=current_category_name)
+                except Exception:
+                    failed = True
+                    break
+                count_page(page)
+                meta, products = describe_page(page, current_category_name)
             
-            print(f"{prefix}    📄 Sayfa {page_num} taranıyor...")
-            product_list_div = current_page_soup.select_one("div.colProductIn.productnlist")
-            if not product_list_div or not product_list_div.select("ul li"): break
-            for li in product_list_div.select("ul li"):
-                try:
-                    link_tag = li.select_one("a.ihlog.product_click")
-                    if not link_tag: continue
-                    name, url_product = link_tag.get("data-name", "N/A"), urljoin(BASE_URL, link_tag.get("href", ""))
-                    price1, price2, currency = None, None, None
-                    p1_tag = li.select_one("span.fiyat1")
-                    if p1_tag:
-                        price1_text = p1_tag.get_text(strip=True)
-                        price1 = clean_price(price1_text)
-                        cur = re.search(r"[₺$€]", price1_text)
-                        if cur: currency = cur.group(0)
-                    p2_tag = li.select_one("span.fiyat3")
-                    if p2_tag: price2 = clean_price(p2_tag.get_text(strip=True))
-                    stock_span = li.select_one("span.stock")
-                    stock = "Bilinmiyor"
-                    if stock_span:
-                        stock_classes = stock_span.get("class", [])
-                        if "stocktel" in stock_classes: stock = "Stokta Yok"
-                        elif any(re.match(r"^stock\d+$", c) for c in stock_classes): stock = "Stokta Var"
-                    all_products.append({"name": name, "url": url_product, "price_1": price1, "price_2": price2,"currency": currency, "stock": stock, "category": current_category_name})
-                except Exception: continue
-            next_page = current_page_soup.select_one("a.next")
-            if not next_page: break
-            href = next_page.get("href")
-            if not href or href.startswith("javascript"): break
-            current_url = urljoin(BASE_URL, href)
+            if not meta["has_products"]: break
+            if products is None:
+                print(f"{prefix}    📄 Sayfa {page_num} değişmemiş, atlandı.")
+            else:
+                print(f"{prefix}    📄 Sayfa {page_num} taranıyor...")
+                sink.add(products)
+            processed.append((page, meta))
+            current_url = meta["next_url"]
+            if not current_url: break
             page_num += 1
-            time.sleep(1)
-        if all_products:
-            print(f"{prefix}    💾 Toplam {len(all_products)} ürün çekildi. Veritabanı işlemi başlıyor...")
-            save_to_supabase(all_products, current_category_name)
+        total = sink.close()
+        for done_page, done_meta in processed:
+            remember_page(done_page, done_meta)
+        # Yarıda kopan liste tamamlanmış sayılmaz; --resume ile yeniden taranır
+        if not failed:
+            complete_listing(url)
+        if total:
+            print(f"{prefix}    💾 Toplam {total} ürün çekildi ve veritabanı kuyruğuna alındı.")
         return
 
     # EĞER ÜRÜN LİSTESİ DEĞİLSE, ARA KATEGORİ BLOKLARI VAR MI DİYE KONTROL ET
-    # KESİN ÇÖZÜM: `select` ile sayfadaki TÜM `product45` bloklarını bul.
-    sub_category_containers = soup.select("div.colProductIn.product45")
-    if sub_category_containers:
-        print(f"{prefix}  -> '{current_category_name}' bir ARA KATEGORİ. {len(sub_category_containers)} alt başlık bulundu.")
-        
-        for container in sub_category_containers:
-            # Her bir bloğun içindeki `a.main-title` linkini bul
-            link_tag = container.select_one("a.main-title")
-            if link_tag:
-                sub_name = link_tag.get_text(strip=True)
-                sub_href = link_tag.get("href")
-                if sub_name and sub_href:
-                    full_link = urljoin(BASE_URL, sub_href)
-                    crawl_category_tree(full_link, category_path + [sub_name], visited_urls)
+    if meta["kind"] == "category":
+        sub_categories = meta["children"]
+        print(f"{prefix}  -> '{current_category_name}' bir ARA KATEGORİ. {len(sub_categories)} alt başlık bulundu.")
+        remember_page(page, meta)
+        for sub_name, full_link in sub_categories:
+            crawl_category_tree(full_link, category_path + [sub_name], visited_urls)
         return
 
     print(f"{prefix}  -> '{current_category_name}' sayfasında bilinen bir yapı bulunamadı. Atlanıyor.")
 
 
+# --- EŞZAMANLI TARAMA MOTORU ---
+# Sayfalar bir iş kuyruğundan (frontier) thread havuzuyla paralel çekilir.
+# Ağ işi worker thread'lerde yapılır; ziyaret kontrolü, ürün biriktirme ve
+# DB kaydı tek bir koordinatör (ana thread) tarafından yürütülür.
+def _fetch_limited(url, category_name):
+    # Host başına eşzamanlılık ve hız, http_get içindeki sınırlayıcı tarafından ayarlanır
+    page = fetch_page(url, category=category_name)
+    # Ayrıştırma da worker thread'de yapılır; koordinatör yalnızca sonucu işler
+    return page, describe_page(page, category_name)
+
+def crawl_concurrent(roots, visited_urls, max_workers=CRAWL_WORKERS):
+    """
+    roots: [(url, [kategori yolu]), ...]
+    Kategori dalları ve liste sayfaları paralel çekilir. Bir liste sayfasının
+    sonraki sayfası ancak o sayfa çözümlendiğinde bilinir; bu yüzden aynı
+    kategorinin sayfaları zincir halinde, farklı kategoriler paralel ilerler.
+    """
+    # kategori yolu -> {"url": ilk sayfa, "sink": ürünlerin aktığı StreamingSink, "processed": önbelleğe işlenecek sayfalar}
+    listings = {}
+    in_flight = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def submit(kind, url, path, page_num=1):
+            future = executor.submit(_fetch_limited, url, path[-1])
+            in_flight[future] = (kind, url, path, page_num)
+
+        for url, path in roots:
+            if url not in visited_urls:
+                visited_urls.add(url)
+                submit("category", url, path)
+
+        while in_flight:
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, url, path, page_num = in_flight.pop(future)
+                name = path[-1]
+                prefix = "  " * (len(path) - 1)
+                try:
+                    page, (meta, products) = future.result()
+                except Exception as e:
+                    print(f"{prefix}❌ Sayfa çekilirken hata: {e}")
+                    if kind == "category":
+                        check_known_leaf(url, error=e)
+                        note_failed(url, e)
+                    page = None
+                if page is not None:
+                    count_page(page)
+
+                if kind == "category":
+                    if page is None:
+                        continue
+                    check_known_leaf(url, kind=meta["kind"])
+                    if meta["kind"] == "listing":
+                        note_listing(url, path)
+                        if listing_is_fresh(url):
+                            print(f"{prefix}➡️ '{name}' yakın zamanda tamamlanmış, atlanıyor.")
+                            continue
+                        print(f"{prefix}➡️ '{name}' bir ÜRÜN LİSTESİ. Tarama başlıyor...")
+                        listings[tuple(path)] = {"url": url, "sink": StreamingSink(queue_save, name, key="url"), "processed": []}
+                        kind = "listing"
+                    elif meta["kind"] == "category":
+                        sub_categories = meta["children"]
+                        print(f"{prefix}➡️ '{name}' bir ARA KATEGORİ. {len(sub_categories)} alt başlık bulundu.")
+                        remember_page(page, meta)
+                        for sub_name, full_link in sub_categories:
+                            if full_link in visited_urls: continue
+                            visited_urls.add(full_link)
+                            submit("category", full_link, path + [sub_name])
+                        continue
+                    else:
+                        print(f"{prefix}➡️ '{name}' sayfasında bilinen bir yapı bulunamadı. Atlanıyor.")
+                        continue
+
+                # kind == "listing"
+                listing = listings[tuple(path)]
+                next_url = None
+                if page is None:
+                    listing["failed"] = True
+                elif meta["has_products"]:
+                    if products is None:
+                        print(f"{prefix}    📄 '{name}' sayfa {page_num} değişmemiş, atlandı.")
+                    else:
+                        print(f"{prefix}    📄 '{name}' sayfa {page_num} tarandı.")
+                        listing["sink"].add(products)
+                    listing["processed"].append((page, meta))
+                    next_url = meta["next_url"]
+                if next_url:
+                    submit("listing", next_url, path, page_num + 1)
+                    continue
+
+                listing = listings.pop(tuple(path))
+                total = listing["sink"].close()
+                for done_page, done_meta in listing["processed"]:
+                    remember_page(done_page, done_meta)
+                if not listing.get("failed"):
+                    complete_listing(listing["url"])
+                if total:
+                    print(f"{prefix}    💾 '{name}': toplam {total} ürün çekildi ve veritabanı kuyruğuna alındı.")
+
+
 # --- ANA FONKSİYON (BAŞLATICI) ---
-def crawl_from_homepage():
+def discover_roots():
+    """Ana sayfadaki kategori menüsünden ana kategori dallarını döndürür."""
+    try:
+        html = fetch_html(BASE_URL)
+        if not html: return None
+    except Exception as e:
+        print(f"❌ Ana sayfa hatası: {e}")
+        return None
+    CRAWL_STATS["pages"] += 1
+    top_level_cats = PARSER.menu(html, BASE_URL)
+    if not top_level_cats:
+        print("⚠️ Ana sayfada kategori menüsü bulunamadı.")
+        return None
+    roots = []
+    for name, link in top_level_cats:
+        if name and link and name not in ["Tüm Alt Kategoriler", "Outlet"]:
+            roots.append((link, [name]))
+    print(f"🔎 {len(top_level_cats)} ana kategori dalı bulundu. Tarama başlıyor...")
+    return roots
+
+def run_crawl(roots, visited_urls, mode, max_workers, per_host_limit):
+    if mode == "serial":
+        for link, path in roots:
+            print(f"\n===== Kategori Dalına Giriliyor: {' > '.join(path)} =====")
+            crawl_category_tree(link, path, visited_urls)
+    else:
+        print(f"⚡ Eşzamanlı mod: {max_workers} worker, host başına en fazla {per_host_limit} istek (hız sınırlayıcı ayarlar).")
+        crawl_concurrent(roots, visited_urls, max_workers=max_workers)
+
+def crawl_from_homepage(mode=CRAWL_MODE, max_workers=CRAWL_WORKERS, per_host_limit=PER_HOST_LIMIT, refresh_tree=False, resume=False):
+    global _writer, _checkpoint
     print("🚀 Oksid Scraper (Hiyerarşik Tarama - Final v5) başlıyor...")
+    print(f"🧩 HTML ayrıştırıcı: {PARSER.name}")
     if PROXIES:
         proxy_host = PROXY_URL.split('@')[-1] if '@' in PROXY_URL else PROXY_URL
         print(f"✅ Proxy ile çalışılıyor: {proxy_host}")
     else:
         print("ℹ️ Proxy ayarı bulunamadı. Direkt bağlantı kullanılacak.")
-    try:
-        soup = fetch_html(BASE_URL)
-        if not soup: return
-    except Exception as e:
-        print(f"❌ Ana sayfa hatası: {e}")
-        return
-    top_level_cats = soup.select("div.catsMenu > ul.hidden-xs > li > a")
-    if not top_level_cats:
-        print("⚠️ Ana sayfada kategori menüsü bulunamadı.")
-        return
+    # Seri modda aynı anda tek istek gider; eşzamanlı modda üst sınır per_host_limit
+    get_limiter(BASE_URL, max_concurrency=1 if mode == "serial" else per_host_limit)
+    start_time = time.time()
     visited_urls = set()
-    print(f"🔎 {len(top_level_cats)} ana kategori dalı bulundu. Tarama başlıyor...")
-    for a_tag in top_level_cats:
-        name = a_tag.get_text(strip=True)
-        link = urljoin(BASE_URL, a_tag.get("href"))
-        if name and link and name not in ["Tüm Alt Kategoriler", "Outlet"]:
-            print(f"\n===== Ana Kategori Dalına Giriliyor: {name} =====")
-            crawl_category_tree(link, [name], visited_urls)
+    tree = None if refresh_tree else load_category_tree()
+    _checkpoint = Checkpoint("oksid", resume=resume)
+
+    # Kategoriler tarandıkça ürünler kuyruğa bırakılır; diff + upsert arka planda yapılır
+    _writer = BackgroundWriter(save_to_supabase, name="oksid-writer")
+    try:
+        if tree:
+            leaves, age_hours = tree
+            print(f"🌳 Kayıtlı kategori ağacı kullanılıyor: {len(leaves)} yaprak liste sayfası ({age_hours:.1f} saat önce keşfedildi).")
+            TREE_STATE["known_leaves"] = {url for url, _ in leaves}
+            pending = [(url, path) for url, path in leaves if not listing_is_fresh(url)]
+            if len(pending) < len(leaves):
+                print(f"⏭️ {len(leaves) - len(pending)} liste son {_checkpoint.freshness_hours:g} saat içinde tamamlanmış, atlanıyor.")
+                for url, path in leaves:
+                    if listing_is_fresh(url):
+                        note_listing(url, path)
+            leaves = pending
+            run_crawl(leaves, visited_urls, mode, max_workers, per_host_limit)
+            if TREE_STATE["stale"]:
+                # Taranmış yapraklar visited_urls'te olduğundan yeniden keşifte tekrar çekilmez
+                print("🌳 Ağaçta değişiklik tespit edildi, kategori ağacı yeniden keşfediliyor...")
+                tree = None
+        if not tree:
+            roots = discover_roots()
+            if roots is None: return
+            run_crawl(roots, visited_urls, mode, max_workers, per_host_limit)
+            save_category_tree(TREE_STATE["leaves"])
+        crawl_elapsed = time.time() - start_time
+    finally:
+        _writer.close()
+        _writer = None
+    # Yazıcı kapandıktan sonra: tüm liste tamamlama kayıtları işlenmiş olur. Hatalı listesi kalan
+    # çalıştırma açık kalır; --resume tamamlananları atlayıp yalnızca kalanları yeniden çeker.
+    # Ağaç yeniden keşfedildiyse eski ağacın artık olmayan yaprakları beklenmez; çekilemeyen
+    # kategori sayfaları ise altındaki listeler bilinmediğinden kendileri beklenir.
+    expected = set(TREE_STATE["leaves"]) | (TREE_STATE["known_leaves"] if tree else set()) | TREE_STATE["failed"]
+    _checkpoint.finish(sorted(expected))
+
+    elapsed = time.time() - start_time
+    pages = CRAWL_STATS["pages"]
+    print(f"\n📈 {pages} sayfa {crawl_elapsed:.1f} sn'de çekildi ({pages / crawl_elapsed if crawl_elapsed else 0:.2f} sayfa/sn), toplam süre {elapsed:.1f} sn.")
+    if PAGE_CACHE.enabled and pages:
+        hits = CRAWL_STATS["not_modified"] + CRAWL_STATS["unchanged"]
+        print(f"🗂️ Sayfa önbelleği: {hits}/{pages} isabet (%{100 * hits / pages:.1f}) — "
+              f"{CRAWL_STATS['not_modified']} adet 304, {CRAWL_STATS['unchanged']} adet aynı liste hash'i.")
+    log_summaries()
     print("\n✅ Tüm kategoriler tamamlandı.")
 
 if __name__ == "__main__":
-    crawl_from_homepage()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Oksid ürün tarayıcı")
+    parser.add_argument("--serial", action="store_true", help="Eski seri (tek istek) tarama davranışını kullan")
+    parser.add_argument("--workers", type=int, default=CRAWL_WORKERS, help="Eşzamanlı worker sayısı")
+    parser.add_argument("--per-host", type=int, default=PER_HOST_LIMIT, help="Host başına eşzamanlı istek limiti")
+    parser.add_argument("--refresh-tree", action="store_true", help="Kayıtlı kategori ağacını yok say, ağacı baştan keşfet")
+    parser.add_argument("--resume", action="store_true", help="Yarıda kalan son çalıştırmaya kaldığı yerden devam et")
+    args = parser.parse_args()
+    # Aşama süreleri ve sayaçlar çalıştırma sonunda .cache/metrics altına yazılır
+    with metrics.run("oksid"):
+        started_at = datetime.now(timezone.utc).isoformat()
+        crawl_from_homepage(
+            mode="serial" if args.serial else CRAWL_MODE,
+            max_workers=args.workers,
+            per_host_limit=args.per_host,
+            refresh_tree=args.refresh_tree,
+            resume=args.resume,
+        )
+        # Değişmeyen ürünlerin price_try / price_usd değerleri bu çalıştırmanın kurlarıyla güncellenir;
+        # kategori listesi ve "son güncelleme" bilgisi frontend'e marketplace_stats özetinden gider
+        if sync_engine:
+            sync_engine.refresh_fx(sync_engine.OKSID)
+            sync_engine.refresh_stats(sync_engine.OKSID, started_at)
@@ -0,0 +1,135 @@
+# Uzun scraper çalıştırmaları için checkpoint / resume.
+#
+# Her scraper küçük bir durum kaydı tutar: run_id, tamamlanan kategoriler (ne zaman
+# tamamlandıkları) ve yarıda kalan kategorilerde DB'ye yazılmış son sayfa. İlerleme,
+# ilgili ürünler BackgroundWriter tarafından gerçekten yazıldıktan sonra kaydedilir.
+# --resume ile başlatılan çalıştırma, önceki çalıştırma bitmemişse kaldığı yerden
+# devam eder; CHECKPOINT_FRESHNESS_HOURS içinde tamamlanmış kategoriler atlanır.
+#
+# CHECKPOINT_STORE : "file" (varsayılan, .cache/checkpoints/) veya "supabase" (scraper_checkpoints tablosu)
+import os
+import json
+import time
+import threading
+
+CHECKPOINT_STORE = os.getenv("CHECKPOINT_STORE", "file")
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", os.path.join(".cache", "checkpoints"))
+CHECKPOINT_TABLE = "scraper_checkpoints"
+FRESHNESS_HOURS = float(os.getenv("CHECKPOINT_FRESHNESS_HOURS", "12"))
+
+
+def _file_path(name):
+    return os.path.join(CHECKPOINT_DIR, f"{name}.json")
+
+
+def _new_run_id():
+    return os.getenv("GITHUB_RUN_ID") or time.strftime("%Y%m%d-%H%M%S")
+
+
+class Checkpoint:
+    def __init__(self, name, resume=False, freshness_hours=FRESHNESS_HOURS, store=CHECKPOINT_STORE):
+        self.name = name
+        self.store = store
+        self.freshness_hours = freshness_hours
+        self._lock = threading.Lock()
+        previous = self._load()
+        if resume and previous and not previous.get("finished"):
+            self.state = previous
+            print(
+                f"♻️ '{name}' için {previous['run_id']} çalıştırmasına devam ediliyor: "
+                f"{len(previous['completed'])} kategori tamamlanmış, {len(previous['pages'])} kategori yarıda."
+            )
+        else:
+            if resume:
+                print(f"ℹ️ '{name}' için yarıda kalmış çalıştırma yok, baştan başlanıyor.")
+            self.state = {"run_id": _new_run_id(), "started_at": time.time(), "finished": False, "completed": {}, "pages": {}}
+        self.resumed = self.state is previous
+
+    @property
+    def run_id(self):
+        return self.state["run_id"]
+
+    # --- Sorgular ---
+    def is_fresh(self, key):
+        """Kategori bu çalıştırmada (ya da devam edilen çalıştırmada) yakın zamanda tamamlandı mı?"""
+        completed_at = self.state["completed"].get(str(key))
+        return completed_at is not None and time.time() - completed_at < self.freshness_hours * 3600
+
+    def resume_page(self, key):
+        """Yarıda kalan kategoride DB'ye yazılmış son sayfa; yoksa None."""
+        return self.state["pages"].get(str(key))
+
+    # --- İlerleme ---
+    def page_done(self, key, page, writer=None):
+        """
+        Sayfanın ürünleri yazıldığında kaydedilir. writer verilirse kayıt, yazıcı
+        kuyruğunda bekleyen partiler DB'ye ulaştıktan sonra yapılır.
+        """
+        self._after(writer, lambda: self._update(lambda s: s["pages"].__setitem__(str(key), page)))
+
+    def complete(self, key, writer=None):
+        def mark(s):
+            s["completed"][str(key)] = time.time()
+            s["pages"].pop(str(key), None)
+        self._after(writer, lambda: self._update(mark))
+
+    def finish(self, expected_keys=None):
+        """
+        Tüm beklenen kategoriler tamamlandıysa çalıştırmayı bitmiş işaretler; aksi halde
+        kayıt açık kalır ve sonraki --resume kaldığı yerden devam eder.
+        Yazıcı kapatıldıktan sonra çağrılmalıdır.
+        """
+        missing = [k for k in (expected_keys or []) if str(k) not in self.state["completed"]]
+        if missing:
+            shown = ", ".join(map(str, missing[:5])) + (", ..." if len(missing) > 5 else "")
+            print(f"⏸️ '{self.name}': {len(missing)} kategori tamamlanmadı ({shown}), --resume ile devam edilebilir.")
+            return False
+        self._update(lambda s: s.__setitem__("finished", True))
+        print(f"🏁 '{self.name}' checkpoint'i kapatıldı (run {self.run_id}).")
+        return True
+
+    def _after(self, writer, fn):
+        if writer:
+            writer.after_written(fn)
+        else:
+            fn()
+
+    def _update(self, change):
+        with self._lock:
+            change(self.state)
+            self.state["updated_at"] = time.time()
+            self._save(self.state)
+
+    # --- Depolama ---
+    def _load(self):
+        try:
+            if self.store == "supabase":
+                from scripts.shared.supabase_client import supabase
+                response = supabase.table(CHECKPOINT_TABLE).select("state").eq("name", self.name).limit(1).execute()
+                return response.data[0]["state"] if response.data else None
+            if not os.path.exists(_file_path(self.name)):
+                return None
+            with open(_file_path(self.name), encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️ Checkpoint okunamadı, baştan başlanacak: {e}")
+            return None
+
+    def _save(self, state):
+        try:
+            if self.store == "supabase":
+                from scripts.shared.supabase_client import supabase
+                supabase.table(CHECKPOINT_TABLE).upsert(
+                    {"name": self.name, "run_id": state["run_id"], "state": state,
+                     "updated_at": time.strftime("%Y-%m-%d %H:%M:%S")},
+                    on_conflict="name",
+                ).execute()
+            else:
+                os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+                tmp_path = _file_path(self.name) + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(state, f, ensure_ascii=False)
+                os.replace(tmp_path, _file_path(self.name))
+        except Exception as e:
+            # Checkpoint yazılamaması scraping'i durdurmamalı
+            print(f"⚠️ Checkpoint kaydedilemedi: {e}")
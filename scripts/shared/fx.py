@@ -0,0 +1,144 @@
+# Çalıştırma başına tek döviz kuru snapshot'ı ve karşılaştırılabilir fiyat kolonları.
+#
+# Fiyatlar farklı para birimlerinde geliyor ($, ₺, €, bayinet'in data-currency değerleri).
+# Her scraper çalıştırmasının başında kurlar bir kez çekilir, fx_snapshots tablosuna
+# yazılır ve .cache altında saklanır; yazılan her ürüne price_try / price_usd eklenir.
+# Böylece pazaryerleri arası fiyat sıralaması ve aralık filtresi DB'de indeksten yapılır.
+#
+# FX_OFFLINE=1 ya da kur servisleri erişilemezse önce lokal önbellekteki, o da yoksa
+# DB'deki son snapshot kullanılır. Hiçbiri yoksa FX kolonları yazılmaz.
+#
+# Kurallar değişirse SQL karşılığı (supabase/migrations/20261018091000_fx_snapshots.sql)
+# ve frontend/src/utils/exchange.ts birlikte güncellenmeli.
+import os
+import re
+import json
+import threading
+from decimal import Decimal, ROUND_HALF_UP
+from datetime import datetime, timezone
+
+import requests
+
+CACHE_PATH = os.getenv("FX_CACHE_PATH", os.path.join(".cache", "fx_snapshot.json"))
+OFFLINE = os.getenv("FX_OFFLINE", "0") == "1"
+TIMEOUT = float(os.getenv("FX_TIMEOUT", "10"))
+CURRENCIES = ["USD", "EUR", "GBP"]
+# Sırayla denenen kaynaklar; ikisi de TRY bazlı kur döndürür (1 TRY = x birim)
+SOURCES = [
+    ("frankfurter", "https://api.frankfurter.app/latest?from=TRY&to=" + ",".join(CURRENCIES)),
+    ("open.er-api", "https://open.er-api.com/v6/latest/TRY"),
+]
+# Ham para birimi metni → ISO kodu; para birimi boşsa fiyat TL kabul edilir (frontend'deki "₺" varsayılanı)
+ALIASES = {
+    "": "TRY", "₺": "TRY", "tl": "TRY", "try": "TRY", "trl": "TRY", "ytl": "TRY",
+    "$": "USD", "usd": "USD", "us$": "USD", "dolar": "USD",
+    "€": "EUR", "eur": "EUR", "euro": "EUR",
+    "£": "GBP", "gbp": "GBP",
+}
+
+_lock = threading.Lock()
+_snapshot = None
+_loaded = False
+
+
+def currency_code(raw):
+    """Ham para birimi metnini ISO koduna çevirir; tanınmıyorsa None."""
+    s = str(raw or "").strip().lower().rstrip(".,")
+    if s in ALIASES:
+        return ALIASES[s]
+    return s.upper() if re.fullmatch(r"[a-z]{3}", s) else None
+
+
+def _fetch_rates():
+    """(kaynak, {kod: 1 birimin TL karşılığı}) döndürür; hiçbir kaynak cevap vermezse None."""
+    for source, url in SOURCES:
+        try:
+            res = requests.get(url, timeout=TIMEOUT)
+            res.raise_for_status()
+            rates = res.json().get("rates") or {}
+            converted = {code: round(1 / float(rates[code]), 6) for code in CURRENCIES if rates.get(code)}
+            if "USD" in converted:
+                return source, converted
+        except Exception as e:
+            print(f"⚠️ Kur kaynağı başarısız ({source}): {e}")
+    return None
+
+
+def _read_cache():
+    try:
+        with open(CACHE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(snapshot):
+    os.makedirs(os.path.dirname(CACHE_PATH) or ".", exist_ok=True)
+    with open(CACHE_PATH, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+
+
+def _latest_from_db(client):
+    try:
+        rows = client.table("fx_snapshots").select("id,captured_at,source,rates") \
+            .order("captured_at", desc=True).limit(1).execute().data
+        return rows[0] if rows else None
+    except Exception as e:
+        print(f"⚠️ Son kur snapshot'ı DB'den okunamadı: {e}")
+        return None
+
+
+def _load(client):
+    fetched = None if OFFLINE else _fetch_rates()
+    if fetched:
+        source, rates = fetched
+        snapshot = {"id": None, "captured_at": datetime.now(timezone.utc).isoformat(), "source": source,
+                    "rates": {"TRY": 1, **rates}}
+        if client:
+            try:
+                row = client.table("fx_snapshots").insert(
+                    {"captured_at": snapshot["captured_at"], "source": source, "rates": snapshot["rates"]}
+                ).execute().data
+                snapshot["id"] = row[0]["id"] if row else None
+            except Exception as e:
+                print(f"⚠️ Kur snapshot'ı DB'ye yazılamadı: {e}")
+        _write_cache(snapshot)
+        print(f"💱 Kur snapshot'ı alındı ({source}): 1 USD = {rates['USD']:.4f} TL")
+        return snapshot
+
+    snapshot = _read_cache()
+    origin = "lokal önbellek"
+    if not snapshot and client:
+        snapshot = _latest_from_db(client)
+        origin = "DB"
+    if snapshot:
+        print(f"💱 Kur snapshot'ı {origin} kaynağından kullanılıyor ({snapshot['captured_at']}).")
+    else:
+        print("⚠️ Kur snapshot'ı yok; price_try / price_usd kolonları bu çalıştırmada yazılmayacak.")
+    return snapshot
+
+
+def current(client=None):
+    """Bu çalıştırmanın kur snapshot'ı (ilk çağrıda bir kez yüklenir)."""
+    global _snapshot, _loaded
+    with _lock:
+        if not _loaded:
+            _snapshot = _load(client)
+            _loaded = True
+    return _snapshot
+
+
+def _round(value):
+    # Postgres numeric round() ile aynı sonuç için Decimal + yarımı yukarı yuvarlama
+    return value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def convert(price, currency, snapshot):
+    """Fiyatı snapshot kurlarıyla {price_try, price_usd} kolonlarına çevirir."""
+    rates = snapshot["rates"]
+    rate = rates.get(currency_code(currency))
+    if price is None or rate is None:
+        return {"price_try": None, "price_usd": None}
+    price_try = _round(Decimal(str(price)) * Decimal(str(rate)))
+    price_usd = _round(price_try / Decimal(str(rates["USD"])))
+    return {"price_try": float(price_try), "price_usd": float(price_usd)}
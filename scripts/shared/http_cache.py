@@ -0,0 +1,93 @@
+# Çalıştırmalar arasında kalıcı, URL anahtarlı sayfa önbelleği.
+#
+# Her URL için sunucunun döndüğü ETag / Last-Modified doğrulayıcıları, sayfanın
+# anlamlı parçasının (ör. ürün listesi) hash'i ve sayfa ayrıştırıldığında
+# çıkarılan küçük bir meta (sonraki sayfa linki, alt kategoriler...) saklanır.
+# Bir sonraki çalıştırmada koşullu istek gönderilir; 304 dönerse ya da parça
+# hash'i aynıysa sayfa yeniden ayrıştırılmadan meta'dan devam edilir.
+import os
+import json
+import time
+import sqlite3
+import threading
+
+CACHE_PATH = os.getenv("HTTP_CACHE_PATH", os.path.join(".cache", "http_cache.sqlite"))
+CACHE_ENABLED = os.getenv("HTTP_CACHE", "1") != "0"
+# Bu süreden eski kayıtlar yok sayılır ve sayfa baştan ayrıştırılır (ürünler periyodik olarak yeniden doğrulanır)
+CACHE_MAX_AGE_HOURS = float(os.getenv("HTTP_CACHE_MAX_AGE_HOURS", "72"))
+
+
+class PageCache:
+    def __init__(self, namespace, path=CACHE_PATH, max_age_hours=CACHE_MAX_AGE_HOURS, enabled=CACHE_ENABLED):
+        self.namespace = namespace
+        self.path = path
+        self.max_age_hours = max_age_hours
+        self.enabled = enabled
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " namespace TEXT NOT NULL, url TEXT NOT NULL, etag TEXT, last_modified TEXT,"
+                " fragment_hash TEXT, meta TEXT, verified_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, url))"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, url):
+        """Taze kaydı {etag, last_modified, fragment_hash, meta} olarak döndürür, yoksa None."""
+        if not self.enabled:
+            return None
+        min_verified_at = time.time() - self.max_age_hours * 3600
+        with self._lock:
+            row = self._db().execute(
+                "SELECT etag, last_modified, fragment_hash, meta FROM pages WHERE namespace = ? AND url = ? AND verified_at >= ?",
+                (self.namespace, url, min_verified_at),
+            ).fetchone()
+        if not row:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "fragment_hash": row[2], "meta": json.loads(row[3])}
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url, validators, meta):
+        """Sayfa tamamen işlendikten sonra doğrulayıcıları ve meta'yı kaydeder."""
+        if not self.enabled:
+            return
+        with self._lock:
+            conn = self._db()
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (namespace, url, etag, last_modified, fragment_hash, meta, verified_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.namespace, url, validators.get("etag"), validators.get("last_modified"),
+                 validators.get("fragment_hash"), json.dumps(meta, ensure_ascii=False), time.time()),
+            )
+            conn.commit()
+
+    def refresh_validators(self, url, validators):
+        """
+        İçeriği değişmemiş sayfanın ETag/Last-Modified bilgisini günceller.
+        verified_at'e dokunulmaz; böylece kayıt max-age dolunca yine baştan doğrulanır.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            conn = self._db()
+            conn.execute(
+                "UPDATE pages SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)"
+                " WHERE namespace = ? AND url = ?",
+                (validators.get("etag"), validators.get("last_modified"), self.namespace, url),
+            )
+            conn.commit()
@@ -0,0 +1,271 @@
+# Scraper çalıştırmaları için yapılandırılmış metrikler.
+#
+# Sayaçlar (sayfa, ürün, değişen satır, retry, byte, hata...) ve aşama süre
+# histogramları (login, otp_wait, page_load, parse, db_lookup, db_write...)
+# marketplace / kategori / aşama etiketleriyle bellekte toplanır. Çalıştırma
+# bitince METRICS_DIR altına yazılır:
+#   - <marketplace>-<run_id>.json ve <marketplace>-latest.json (karşılaştırma için)
+#   - <marketplace>.prom (Prometheus textfile formatı, node_exporter textfile collector ile okunur)
+#
+#     with metrics.run("oksid"):
+#         with metrics.timer("page_load", category=name):
+#             html = fetch_html(url)
+#         metrics.record_page(name, products, bytes=len(html))
+#
+# İki çalıştırmayı karşılaştırmak için:
+#   python -m scripts.shared.metrics compare .cache/metrics/oksid-<eski>.json .cache/metrics/oksid-latest.json
+import os
+import json
+import time
+import argparse
+import threading
+from contextlib import contextmanager
+
+METRICS_ENABLED = os.getenv("METRICS", "1") != "0"
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(".cache", "metrics"))
+METRIC_PREFIX = "comprosearch_scraper"
+# Saniye cinsinden histogram sınırları (sayfa yüklemeden OTP beklemesine kadar)
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+COUNTER_HELP = {
+    "pages": "Çekilen sayfa sayısı",
+    "products": "Sayfalardan ayrıştırılan ürün sayısı",
+    "bytes": "İndirilen yanıt gövdesi byte'ı",
+    "rows_sent": "DB'ye gönderilen aday satır sayısı",
+    "changed_rows": "DB'de gerçekten değişen satır sayısı",
+    "failed_rows": "Yazılamayıp dead-letter'a alınan satır sayısı",
+    "retries": "Tekrar denenen istek / parti sayısı",
+    "throttled": "Hız sınırlayıcının yavaşlamaya geçtiği yanıt sayısı",
+    "errors": "Hata ile biten iş sayısı",
+    "cache_hits": "Önbellekten karşılanan sayfa sayısı",
+}
+
+_lock = threading.Lock()
+_state = {}
+
+
+def _reset(marketplace=None, run_id=None):
+    _state.update({
+        "marketplace": marketplace,
+        "run_id": run_id or os.getenv("GITHUB_RUN_ID") or time.strftime("%Y%m%d-%H%M%S"),
+        "started_at": time.time(),
+        "counters": {},
+        "timings": {},
+    })
+
+
+_reset()
+
+
+def _key(labels):
+    base = {"marketplace": _state["marketplace"]} if _state["marketplace"] else {}
+    base.update({k: str(v) for k, v in labels.items() if v is not None})
+    return tuple(sorted(base.items()))
+
+
+# --- Kayıt ---
+def inc(name, value=1, **labels):
+    """Sayaç artırır; None değerli etiketler yok sayılır."""
+    if not METRICS_ENABLED or not value:
+        return
+    key = (name, _key(labels))
+    with _lock:
+        _state["counters"][key] = _state["counters"].get(key, 0) + value
+
+
+def observe(stage, seconds, **labels):
+    """Bir aşamanın süresini histograma ekler."""
+    if not METRICS_ENABLED:
+        return
+    key = (stage, _key(labels))
+    with _lock:
+        timing = _state["timings"].get(key)
+        if timing is None:
+            timing = _state["timings"][key] = {"count": 0, "sum": 0.0, "min": seconds, "max": seconds, "buckets": [0] * len(BUCKETS)}
+        timing["count"] += 1
+        timing["sum"] += seconds
+        timing["min"] = min(timing["min"], seconds)
+        timing["max"] = max(timing["max"], seconds)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                timing["buckets"][i] += 1
+                break
+
+
+@contextmanager
+def timer(stage, **labels):
+    """Bloğun süresini ölçer; blok hata fırlatırsa süre yine kaydedilir ve hata sayılır."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        inc("errors", stage=stage, **labels)
+        raise
+    finally:
+        observe(stage, time.perf_counter() - start, **labels)
+
+
+def record_page(category, products=None, bytes=None):
+    """Çekilen bir sayfa için sayfa, ürün ve byte sayaçlarını artırır."""
+    inc("pages", category=category)
+    inc("products", len(products) if products is not None else 0, category=category)
+    inc("bytes", bytes or 0, category=category)
+
+
+# --- Rapor ---
+def snapshot(status=None):
+    """Toplanan metriklerin JSON'a yazılabilir hali."""
+    with _lock:
+        counters = [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in _state["counters"].items()]
+        timings = [
+            {"stage": stage, "labels": dict(labels), **{k: (list(v) if k == "buckets" else v) for k, v in timing.items()}}
+            for (stage, labels), timing in _state["timings"].items()
+        ]
+    totals, stages = {}, {}
+    for c in counters:
+        totals[c["name"]] = totals.get(c["name"], 0) + c["value"]
+    for t in timings:
+        stage = stages.setdefault(t["stage"], {"count": 0, "seconds": 0.0})
+        stage["count"] += t["count"]
+        stage["seconds"] += t["sum"]
+    finished_at = time.time()
+    return {
+        "marketplace": _state["marketplace"],
+        "run_id": _state["run_id"],
+        "status": status,
+        "started_at": _state["started_at"],
+        "finished_at": finished_at,
+        "duration_seconds": finished_at - _state["started_at"],
+        "bucket_bounds": list(BUCKETS),
+        "totals": totals,
+        "stages": stages,
+        "counters": counters,
+        "timings": timings,
+    }
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _labels(labels, extra=None):
+    items = dict(labels, **(extra or {}))
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items.items()) + "}"
+
+
+def to_prometheus(data):
+    lines = []
+    by_name = {}
+    for c in data["counters"]:
+        by_name.setdefault(c["name"], []).append(c)
+    for name, samples in sorted(by_name.items()):
+        metric = f"{METRIC_PREFIX}_{name}_total"
+        lines.append(f"# HELP {metric} {COUNTER_HELP.get(name, name)}")
+        lines.append(f"# TYPE {metric} counter")
+        lines.extend(f"{metric}{_labels(s['labels'])} {s['value']}" for s in samples)
+
+    metric = f"{METRIC_PREFIX}_stage_duration_seconds"
+    if data["timings"]:
+        lines.append(f"# HELP {metric} Aşama süreleri")
+        lines.append(f"# TYPE {metric} histogram")
+    for t in data["timings"]:
+        labels = dict(t["labels"], stage=t["stage"])
+        cumulative = 0
+        for bound, count in zip(data["bucket_bounds"], t["buckets"]):
+            cumulative += count
+            lines.append(f"{metric}_bucket{_labels(labels, {'le': bound})} {cumulative}")
+        lines.append(f"{metric}_bucket{_labels(labels, {'le': '+Inf'})} {t['count']}")
+        lines.append(f"{metric}_sum{_labels(labels)} {t['sum']:.6f}")
+        lines.append(f"{metric}_count{_labels(labels)} {t['count']}")
+
+    run_labels = {"marketplace": data["marketplace"]} if data["marketplace"] else {}
+    for name, help_text, value in (
+        ("run_duration_seconds", "Son çalıştırmanın süresi", f"{data['duration_seconds']:.3f}"),
+        ("last_run_timestamp_seconds", "Son çalıştırmanın bitiş zamanı", f"{data['finished_at']:.0f}"),
+        ("last_run_success", "Son çalıştırma hatasız bitti mi (1/0)", "1" if data["status"] == "ok" else "0"),
+    ):
+        lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+        lines.append(f"{METRIC_PREFIX}_{name}{_labels(run_labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def _write_atomic(path, content):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def write_run(status="ok"):
+    """Metrikleri JSON ve Prometheus textfile olarak METRICS_DIR altına yazar."""
+    if not METRICS_ENABLED:
+        return None
+    data = snapshot(status)
+    name = data["marketplace"] or "scraper"
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        content = json.dumps(data, ensure_ascii=False, indent=1)
+        _write_atomic(os.path.join(METRICS_DIR, f"{name}-{data['run_id']}.json"), content)
+        _write_atomic(os.path.join(METRICS_DIR, f"{name}-latest.json"), content)
+        _write_atomic(os.path.join(METRICS_DIR, f"{name}.prom"), to_prometheus(data))
+    except OSError as e:
+        # Metrik yazılamaması çalıştırmayı başarısız saymamalı
+        print(f"⚠️ Metrikler yazılamadı: {e}")
+        return data
+    stages = ", ".join(f"{stage} {s['seconds']:.1f} sn" for stage, s in sorted(data["stages"].items(), key=lambda x: -x[1]["seconds"]))
+    print(f"📊 Metrikler yazıldı ({METRICS_DIR}/{name}-latest.json, {name}.prom): {stages or 'aşama ölçümü yok'}.")
+    return data
+
+
+@contextmanager
+def run(marketplace, run_id=None):
+    """Çalıştırma boyunca metrikleri toplar, sonunda (hata olsa bile) dosyaya yazar."""
+    _reset(marketplace, run_id)
+    status = "failed"
+    try:
+        yield
+        status = "ok"
+    finally:
+        write_run(status)
+
+
+# --- Karşılaştırma ---
+def _change(before, after):
+    if not before:
+        return "yeni" if after else "-"
+    return f"{100 * (after - before) / before:+.0f}%"
+
+
+def compare(before_path, after_path):
+    with open(before_path, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(after_path, encoding="utf-8") as f:
+        after = json.load(f)
+    print(f"📊 {before['marketplace']}: {before['run_id']} → {after['run_id']}")
+    print(f"   süre: {before['duration_seconds']:.1f} sn → {after['duration_seconds']:.1f} sn ({_change(before['duration_seconds'], after['duration_seconds'])})")
+    for name in sorted(set(before["totals"]) | set(after["totals"])):
+        old, new = before["totals"].get(name, 0), after["totals"].get(name, 0)
+        print(f"   {name:<14} {old:>12} → {new:>12} ({_change(old, new)})")
+    for stage in sorted(set(before["stages"]) | set(after["stages"])):
+        old = before["stages"].get(stage, {"count": 0, "seconds": 0})
+        new = after["stages"].get(stage, {"count": 0, "seconds": 0})
+        old_avg = old["seconds"] / old["count"] if old["count"] else 0
+        new_avg = new["seconds"] / new["count"] if new["count"] else 0
+        print(
+            f"   ⏱️ {stage:<15} toplam {old['seconds']:8.1f} → {new['seconds']:8.1f} sn ({_change(old['seconds'], new['seconds'])}), "
+            f"ortalama {1000 * old_avg:8.1f} → {1000 * new_avg:8.1f} ms ({_change(old_avg, new_avg)})"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scraper çalıştırma metrikleri")
+    sub = parser.add_subparsers(dest="command", required=True)
+    compare_parser = sub.add_parser("compare", help="İki çalıştırmanın JSON metriklerini karşılaştır")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+    args = parser.parse_args()
+    if args.command == "compare":
+        compare(args.before, args.after)
@@ -0,0 +1,214 @@
+# OTP bekleme: 5 sn'lik select+delete polling yerine yeni satırlara abone olunur.
+#
+# Kaynak sırası:
+#   1. Supabase Realtime (INSERT olayları)
+#   2. Postgres LISTEN/NOTIFY (OTP_PG_DSN tanımlıysa; lokal testler için)
+#   3. Üstel geri çekilmeli polling (abonelik kurulamazsa)
+#
+# Kod, satır DELETE ... RETURNING ile silinerek sahiplenilir; iki çalışma aynı
+# kodu görse bile yalnızca satırı silebilen taraf onu kullanır.
+import os
+import json
+import time
+import queue
+import select
+import asyncio
+import threading
+
+from scripts.shared.supabase_client import supabase, url as SUPABASE_URL, key as SUPABASE_KEY
+
+OTP_PG_DSN = os.getenv("OTP_PG_DSN")
+OTP_NOTIFY_CHANNEL = "otp_inserted"
+SUBSCRIBE_TIMEOUT = 10
+
+
+def claim_otp(table, otp_code):
+    """Kodu silerek sahiplenir; başka bir çalışma önce sildiyse False döner."""
+    response = supabase.table(table).delete().eq("otp_code", otp_code).execute()
+    return bool(response.data)
+
+
+def _latest_otp(table, order_column=None):
+    query = supabase.table(table).select("otp_code")
+    if order_column:
+        query = query.order(order_column, desc=True)
+    response = query.limit(1).execute()
+    if response.data and response.data[0] and response.data[0].get("otp_code"):
+        return response.data[0]["otp_code"]
+    return None
+
+
+def _record_from_payload(payload):
+    # realtime-py sürümlerine göre kayıt farklı anahtarlar altında gelebiliyor
+    if not isinstance(payload, dict):
+        return {}
+    data = payload.get("data") or {}
+    return data.get("record") or payload.get("record") or payload.get("new") or {}
+
+
+class RealtimeListener:
+    """Supabase Realtime aboneliğini kendi event loop'u olan bir thread'de çalıştırır."""
+
+    def __init__(self, table, events):
+        self.table = table
+        self.events = events
+        self.ready = threading.Event()
+        self.error = None
+        self._loop = None
+        self._stop = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self, timeout=SUBSCRIBE_TIMEOUT):
+        self._thread.start()
+        return self.ready.wait(timeout) and self.error is None
+
+    def stop(self):
+        if self._loop and self._stop:
+            self._loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        try:
+            asyncio.run(self._main())
+        except Exception as e:
+            self.error = e
+            self.ready.set()
+
+    async def _main(self):
+        from supabase import acreate_client
+
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        client = await acreate_client(SUPABASE_URL, SUPABASE_KEY)
+
+        def on_insert(payload):
+            otp_code = _record_from_payload(payload).get("otp_code")
+            if otp_code:
+                self.events.put(otp_code)
+
+        def on_status(status, err=None):
+            status = getattr(status, "value", status)
+            if status == "SUBSCRIBED":
+                self.ready.set()
+            elif status in ("CHANNEL_ERROR", "TIMED_OUT", "CLOSED") and not self.ready.is_set():
+                self.error = err or RuntimeError(f"Realtime durumu: {status}")
+                self.ready.set()
+
+        channel = client.channel(f"otp-{self.table}")
+        channel.on_postgres_changes("INSERT", schema="public", table=self.table, callback=on_insert)
+        await channel.subscribe(on_status)
+        await self._stop.wait()
+        await client.remove_channel(channel)
+
+
+class PgNotifyListener:
+    """LISTEN otp_inserted; tetikleyici NOTIFY ile {"table", "otp_code"} gönderir."""
+
+    def __init__(self, table, events, dsn=OTP_PG_DSN):
+        self.table = table
+        self.events = events
+        self.dsn = dsn
+        self._stopped = threading.Event()
+        self._conn = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self, timeout=SUBSCRIBE_TIMEOUT):
+        import psycopg2
+        import psycopg2.extensions
+
+        self._conn = psycopg2.connect(self.dsn, connect_timeout=timeout)
+        self._conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with self._conn.cursor() as cur:
+            cur.execute(f"LISTEN {OTP_NOTIFY_CHANNEL};")
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join(timeout=5)
+        if self._conn:
+            self._conn.close()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            if select.select([self._conn], [], [], 1) == ([], [], []):
+                continue
+            self._conn.poll()
+            while self._conn.notifies:
+                notify = self._conn.notifies.pop(0)
+                try:
+                    payload = json.loads(notify.payload)
+                except ValueError:
+                    continue
+                if payload.get("table") == self.table and payload.get("otp_code"):
+                    self.events.put(payload["otp_code"])
+
+
+def _subscribe(table, events):
+    """Kullanılabilen ilk push kaynağını başlatır; hiçbiri yoksa None."""
+    if OTP_PG_DSN:
+        try:
+            listener = PgNotifyListener(table, events)
+            if listener.start():
+                print("📡 OTP için Postgres LISTEN/NOTIFY aboneliği kuruldu.")
+                return listener
+        except Exception as e:
+            print(f"⚠️ LISTEN/NOTIFY kurulamadı: {e}")
+    try:
+        listener = RealtimeListener(table, events)
+        if listener.start():
+            print("📡 OTP için Supabase Realtime aboneliği kuruldu.")
+            return listener
+        print(f"⚠️ Realtime aboneliği kurulamadı: {listener.error}")
+        listener.stop()
+    except Exception as e:
+        print(f"⚠️ Realtime aboneliği kurulamadı: {e}")
+    return None
+
+
+def wait_for_otp(table, timeout=180, order_column=None, max_poll_interval=5):
+    """
+    `table`'a yazılan OTP'yi bekler, atomik olarak sahiplenir ve döndürür.
+    Abonelik kurulamazsa 0.5 sn'den başlayıp `max_poll_interval`'a kadar
+    katlanan aralıklarla polling yapılır.
+    """
+    start_time = time.time()
+    deadline = start_time + timeout
+    print(f"⏳ {timeout} saniye boyunca OTP bekleniyor (Tablo: {table})...")
+
+    events = queue.Queue()
+    listener = _subscribe(table, events)
+    if listener is None:
+        print("ℹ️ Push aboneliği yok, üstel geri çekilmeli polling kullanılacak.")
+    poll_interval = 0.5
+    check_table = True  # Abonelikten önce yazılmış bir kod kaçmasın diye ilk turda tablo okunur
+    try:
+        while time.time() < deadline:
+            otp_code = None
+            if check_table:
+                check_table = listener is None
+                try:
+                    otp_code = _latest_otp(table, order_column)
+                except Exception as e:
+                    print(f"⚠️ Supabase OTP sorgu hatası: {e}")
+
+            if otp_code is None:
+                remaining = max(0.0, deadline - time.time())
+                try:
+                    otp_code = events.get(timeout=min(poll_interval, remaining) if listener is None else remaining)
+                except queue.Empty:
+                    poll_interval = min(poll_interval * 2, max_poll_interval)
+                    continue
+
+            try:
+                if claim_otp(table, otp_code):
+                    print(f"✅ OTP alındı ve sahiplenildi. ({int(time.time() - start_time)} saniye bekleme)")
+                    return otp_code
+                print("ℹ️ OTP başka bir çalışma tarafından alınmış, beklemeye devam.")
+            except Exception as e:
+                print(f"⚠️ Supabase OTP silme hatası: {e}")
+    finally:
+        if listener:
+            listener.stop()
+
+    raise TimeoutError(f"🚨 OTP {timeout} saniye içinde gelmedi, işlem iptal edildi.")
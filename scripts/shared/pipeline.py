@@ -0,0 +1,204 @@
+import os
+import time
+import queue
+import threading
+
+# Kuyrukta bekleyebilecek en fazla kategori/parti sayısı; dolarsa scraper yazıcıyı bekler
+WRITER_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))
+# PIPELINE_WRITER=0 ile yazma işlemleri eskisi gibi scraping akışı içinde yapılır
+WRITER_ENABLED = os.getenv("PIPELINE_WRITER", "1") != "0"
+# Sayfa sayfa gelen ürünler bu kadar satır birikince veya bu kadar saniye geçince yazıcıya aktarılır
+SINK_MAX_ROWS = int(os.getenv("PIPELINE_SINK_ROWS", "500"))
+SINK_MAX_SECONDS = float(os.getenv("PIPELINE_SINK_SECONDS", "10"))
+
+_STOP = object()
+
+
+class _Callback:
+    def __init__(self, fn, failed_before):
+        self.fn = fn
+        self.failed_before = failed_before
+
+
+class BackgroundWriter:
+    """
+    Scrape edilen ürün partilerini sınırlı bir kuyruk üzerinden arka plandaki
+    tek bir yazıcı thread'e aktarır. Scraper bir sonraki kategoriye geçerken
+    diff + upsert işlemi arka planda sürer. Kuyruk doluysa submit() bekler
+    (backpressure); close() kuyruğu boşaltıp özet basar.
+
+        with BackgroundWriter(save_products_to_supabase) as writer:
+            writer.submit(products)
+    """
+
+    def __init__(self, write_fn, max_pending=WRITER_QUEUE_SIZE, name="db-writer", enabled=WRITER_ENABLED):
+        self.write_fn = write_fn
+        self.name = name
+        self.enabled = enabled
+        self.stats = {"batches": 0, "rows": 0, "changed": 0, "failed": 0, "write_seconds": 0.0, "blocked_seconds": 0.0}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max(1, max_pending))
+        self._thread = None
+        self._closed = False
+        if enabled:
+            self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+            self._thread.start()
+
+    def submit(self, products, *args, **kwargs):
+        """Partiyi yazma kuyruğuna ekler; kuyruk doluysa yer açılana kadar bekler."""
+        if self._closed:
+            raise RuntimeError(f"{self.name} kapatıldıktan sonra submit çağrıldı.")
+        if not products:
+            return
+        if not self.enabled:
+            self._write(products, args, kwargs)
+            return
+        start = time.time()
+        self._queue.put((products, args, kwargs))
+        waited = time.time() - start
+        with self._lock:
+            self.stats["blocked_seconds"] += waited
+        if waited > 1:
+            print(f"⏳ Yazıcı geride kaldı, scraper {waited:.1f} sn bekledi (kuyruk: {self._queue.qsize()}).")
+
+    def after_written(self, fn):
+        """
+        Kuyrukta şu an bekleyen partiler yazıldıktan sonra fn() çağrılır (ör. checkpoint
+        ilerletmek için). Arada hatalı parti olduysa fn çağrılmaz; ilerleme kaydedilmez.
+        """
+        with self._lock:
+            failed_before = self.stats["failed"]
+        if not self.enabled:
+            fn()
+            return
+        self._queue.put(_Callback(fn, failed_before))
+
+    def _callback(self, item):
+        with self._lock:
+            failed = self.stats["failed"] > item.failed_before
+        if failed:
+            print(f"⚠️ [{self.name}] Önceki partilerde yazma hatası var, ilerleme kaydı atlandı.")
+            return
+        try:
+            item.fn()
+        except Exception as e:
+            print(f"⚠️ [{self.name}] Yazma sonrası çağrı başarısız: {e}")
+
+    def _write(self, products, args, kwargs):
+        start = time.time()
+        try:
+            changed = self.write_fn(products, *args, **kwargs)
+            failed = False
+        except Exception as e:
+            print(f"🚨 [{self.name}] {len(products)} ürünlük parti yazılamadı: {e}")
+            changed, failed = 0, True
+        with self._lock:
+            self.stats["batches"] += 1
+            self.stats["rows"] += len(products)
+            self.stats["changed"] += changed if isinstance(changed, int) else 0
+            self.stats["failed"] += 1 if failed else 0
+            self.stats["write_seconds"] += time.time() - start
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                if isinstance(item, _Callback):
+                    self._callback(item)
+                    continue
+                self._write(*item)
+            finally:
+                self._queue.task_done()
+
+    def close(self):
+        """Kuyruktaki tüm partiler yazılana kadar bekler ve özet istatistikleri döndürür."""
+        if self._closed:
+            return self.stats
+        self._closed = True
+        if self._thread:
+            pending = self._queue.qsize()
+            if pending:
+                print(f"⏳ Kuyrukta {pending} parti kaldı, yazıcının bitirmesi bekleniyor...")
+            self._queue.put(_STOP)
+            self._thread.join()
+        s = self.stats
+        print(
+            f"📊 [{self.name}] {s['batches']} parti / {s['rows']} ürün işlendi, {s['changed']} satır değişti, "
+            f"{s['failed']} parti hatalı. Yazma: {s['write_seconds']:.1f} sn, scraper bekleme: {s['blocked_seconds']:.1f} sn."
+        )
+        return s
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class StreamingSink:
+    """
+    Scraper'ın sayfa sayfa ürettiği ürünleri küçük pencerelerde biriktirir ve
+    pencere `max_rows` satıra ulaştığında ya da `max_seconds` geçtiğinde
+    target(pencere, *args) ile (genellikle BackgroundWriter.submit) aktarır.
+    Böylece bir kategorinin tamamı bellekte tutulmaz; yarıda kalan bir
+    kategoride o ana kadar çekilen ürünler DB'ye ulaşmış olur. `key`
+    verilirse aynı pencerede tekrar eden ürünlerden sonuncusu tutulur.
+    """
+
+    def __init__(self, target, *args, key=None, max_rows=SINK_MAX_ROWS, max_seconds=SINK_MAX_SECONDS):
+        self.target = target
+        self.args = args
+        self.key = key
+        self.max_rows = max(1, max_rows)
+        self.max_seconds = max_seconds
+        self.total = 0
+        self.windows = 0
+        self._buffer = {} if key else []
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def add(self, products):
+        if not products:
+            return
+        with self._lock:
+            if self._opened_at is None:
+                self._opened_at = time.time()
+            if self.key:
+                for p in products:
+                    self._buffer[p.get(self.key)] = p
+            else:
+                self._buffer.extend(products)
+            due = len(self._buffer) >= self.max_rows or time.time() - self._opened_at >= self.max_seconds
+            window = self._take() if due else None
+        if window:
+            self.target(window, *self.args)
+
+    def _take(self):
+        window = list(self._buffer.values()) if self.key else self._buffer
+        self._buffer = {} if self.key else []
+        self._opened_at = None
+        self.total += len(window)
+        self.windows += 1
+        return window
+
+    def flush(self):
+        with self._lock:
+            window = self._take() if self._buffer else None
+        if window:
+            self.target(window, *self.args)
+
+    def close(self):
+        """Kalan ürünleri aktarır ve toplam aktarılan ürün sayısını döndürür."""
+        self.flush()
+        return self.total
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Hata durumunda da o ana kadar çekilenler kaybolmasın
+        self.close()
+        return False
@@ -0,0 +1,203 @@
+# Host başına uyarlanabilir hız sınırlayıcı (token bucket + AIMD).
+#
+# Sayfalar arasındaki sabit time.sleep(1) ve sabit artan retry beklemeleri yerine
+# her host için tek bir sınırlayıcı kullanılır:
+# - İstek hızı (istek/sn) token bucket ile, eşzamanlı istek sayısı bir limit ile sınırlanır.
+# - Yanıtlar sağlıklı ve hızlı geldikçe hız ve eşzamanlılık toplamsal olarak artar.
+# - 429 / 5xx / Cloudflare challenge / bağlantı hatalarında ikisi de yarıya iner ve
+#   host bir süre soğumaya alınır (Retry-After varsa ona uyulur, art arda gelen
+#   hatalarda süre katlanır).
+#
+#     limiter = get_limiter(url)
+#     with limiter.slot() as slot:
+#         res = requests.get(url)
+#         slot.observe(res.status_code, res.headers, res.text)
+import os
+import time
+import random
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from scripts.shared import metrics
+
+RATE_INITIAL = float(os.getenv("RATE_LIMIT_INITIAL", "1"))
+RATE_MIN = float(os.getenv("RATE_LIMIT_MIN", "0.2"))
+RATE_MAX = float(os.getenv("RATE_LIMIT_MAX", "8"))
+CONCURRENCY_MAX = int(os.getenv("RATE_LIMIT_CONCURRENCY", "4"))
+# Bu süreyi aşan yanıtlar sunucunun zorlandığı şeklinde yorumlanır ve hız hafifçe düşürülür
+TARGET_LATENCY = float(os.getenv("RATE_LIMIT_TARGET_LATENCY", "3"))
+COOLDOWN_BASE = float(os.getenv("RATE_LIMIT_COOLDOWN_BASE", "5"))
+COOLDOWN_CAP = float(os.getenv("RATE_LIMIT_COOLDOWN_CAP", "120"))
+# Her bu kadar istekte bir güncel hız loglanır (0 = kapalı)
+LOG_EVERY = int(os.getenv("RATE_LIMIT_LOG_EVERY", "200"))
+
+THROTTLE_STATUSES = (429, 500, 502, 503, 504, 520, 521, 522, 524)
+CHALLENGE_MARKERS = ("cf-chl", "challenge-platform", "just a moment", "attention required")
+
+
+def is_challenge(status, headers=None, text=None):
+    """Cloudflare (veya benzeri) bot doğrulama sayfası mı?"""
+    headers = headers or {}
+    if headers.get("cf-mitigated") == "challenge":
+        return True
+    if status in (403, 503) and text:
+        head = text[:5000].lower()
+        return any(marker in head for marker in CHALLENGE_MARKERS)
+    return False
+
+
+def _retry_after(headers):
+    headers = headers or {}
+    # Playwright başlıkları küçük harfle döndürür
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class AdaptiveLimiter:
+    def __init__(self, host, rate=None, min_rate=None, max_rate=None, max_concurrency=None, target_latency=None):
+        self.host = host
+        self.rate = rate or RATE_INITIAL
+        self.min_rate = min_rate or RATE_MIN
+        self.max_rate = max_rate or RATE_MAX
+        self.max_concurrency = max(1, max_concurrency or CONCURRENCY_MAX)
+        self.concurrency = min(2.0, self.max_concurrency)
+        self.target_latency = target_latency or TARGET_LATENCY
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0, "slow": 0, "waited_seconds": 0.0}
+        self._tokens = 1.0
+        self._refilled_at = time.monotonic()
+        self._in_flight = 0
+        self._cooldown_until = 0.0
+        self._strikes = 0
+        self._cond = threading.Condition()
+
+    # --- İzin alma ---
+    def acquire(self):
+        """Eşzamanlılık limiti, token ve soğuma süresi izin verene kadar bekler."""
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._cooldown_until:
+                    wait = self._cooldown_until - now
+                elif self._in_flight >= int(self.concurrency):
+                    wait = None  # release() uyandırır
+                elif self._tokens < 1:
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    self._tokens -= 1
+                    self._in_flight += 1
+                    self.stats["waited_seconds"] += now - start
+                    metrics.observe("rate_limit_wait", now - start, host=self.host)
+                    return now
+                self._cond.wait(timeout=wait)
+
+    def _refill(self, now):
+        # Kova en fazla 1 saniyelik token tutar; boşta kalınca ani patlama yapılmaz
+        self._tokens = min(max(1.0, self.rate), self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def release(self, started_at, status=None, headers=None, text=None, error=None):
+        """İsteğin sonucunu bildirir; hız ve eşzamanlılık buna göre güncellenir."""
+        latency = time.monotonic() - started_at
+        with self._cond:
+            self._in_flight -= 1
+            self.stats["requests"] += 1
+            if error is not None:
+                self.stats["errors"] += 1
+                self._throttle(f"bağlantı hatası ({type(error).__name__})", None)
+            elif status in THROTTLE_STATUSES or is_challenge(status, headers, text):
+                self.stats["throttled"] += 1
+                metrics.inc("throttled", host=self.host)
+                reason = "Cloudflare challenge" if is_challenge(status, headers, text) else f"HTTP {status}"
+                self._throttle(reason, _retry_after(headers))
+            elif status is not None and status >= 400:
+                pass  # 404 gibi yanıtlar hız hakkında bilgi vermez
+            elif latency > self.target_latency * 2:
+                self.stats["slow"] += 1
+                self.rate = max(self.min_rate, self.rate * 0.8)
+            else:
+                self._strikes = 0
+                # Toplamsal artış: yaklaşık her `rate` sağlıklı yanıtta +1 istek/sn
+                self.rate = min(self.max_rate, self.rate + 1 / self.rate)
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+            requests_done = self.stats["requests"]
+            self._cond.notify_all()
+        if LOG_EVERY and requests_done % LOG_EVERY == 0:
+            print(f"🚦 [{self.host}] {requests_done} istek, güncel hız {self.rate:.2f} istek/sn, eşzamanlılık {int(self.concurrency)}.")
+
+    def _throttle(self, reason, retry_after):
+        self._strikes += 1
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.concurrency = max(1.0, self.concurrency / 2)
+        cooldown = min(COOLDOWN_CAP, COOLDOWN_BASE * 2 ** (self._strikes - 1)) * random.uniform(0.5, 1)
+        if retry_after is not None:
+            cooldown = max(cooldown, min(retry_after, COOLDOWN_CAP))
+        self._cooldown_until = max(self._cooldown_until, time.monotonic() + cooldown)
+        print(f"🐢 [{self.host}] {reason} → hız {self.rate:.2f} istek/sn, eşzamanlılık {int(self.concurrency)}, {cooldown:.1f} sn bekleniyor.")
+
+    @contextmanager
+    def slot(self):
+        """acquire/release çiftini sarar; sonuç slot.observe() ile bildirilmezse hata sayılır."""
+        slot = _Slot(self, self.acquire())
+        try:
+            yield slot
+        except Exception as e:
+            if not slot.reported:
+                slot.report(error=e)
+            raise
+        finally:
+            if not slot.reported:
+                slot.report()
+
+    def summary(self):
+        s = self.stats
+        print(
+            f"🚦 [{self.host}] {s['requests']} istek, son hız {self.rate:.2f} istek/sn, eşzamanlılık {int(self.concurrency)}; "
+            f"{s['throttled']} yavaşlatma, {s['errors']} bağlantı hatası, {s['slow']} yavaş yanıt, "
+            f"toplam bekleme {s['waited_seconds']:.1f} sn."
+        )
+        return s
+
+
+class _Slot:
+    def __init__(self, limiter, started_at):
+        self.limiter = limiter
+        self.started_at = started_at
+        self.reported = False
+
+    def observe(self, status, headers=None, text=None):
+        self.report(status=status, headers=headers, text=text)
+
+    def report(self, **kwargs):
+        if not self.reported:
+            self.reported = True
+            self.limiter.release(self.started_at, **kwargs)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(url_or_host, max_concurrency=None, **kwargs):
+    """Host için çalıştırma boyunca paylaşılan sınırlayıcıyı döndürür."""
+    host = urlparse(url_or_host).netloc or url_or_host
+    with _limiters_lock:
+        if host not in _limiters:
+            _limiters[host] = AdaptiveLimiter(host, max_concurrency=max_concurrency, **kwargs)
+        elif max_concurrency:
+            limiter = _limiters[host]
+            limiter.max_concurrency = max(1, max_concurrency)
+            limiter.concurrency = min(limiter.concurrency, limiter.max_concurrency)
+        return _limiters[host]
+
+
+def log_summaries():
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    for limiter in limiters:
+        limiter.summary()
@@ -0,0 +1,117 @@
+# Playwright storage_state'in şifreli olarak saklanması ve sonraki çalıştırmada
+# yeniden kullanılması. Böylece oturum hâlâ geçerliyse login + OTP adımı atlanır.
+#
+# SESSION_STORE_KEY : Fernet anahtarı (üretmek için: python -m scripts.shared.session_store keygen)
+# SESSION_STORE     : "file" (varsayılan, .cache/sessions/) veya "supabase" (scraper_sessions tablosu)
+import os
+import json
+import time
+from cryptography.fernet import Fernet, InvalidToken
+
+SESSION_STORE = os.getenv("SESSION_STORE", "file")
+SESSION_STORE_KEY = os.getenv("SESSION_STORE_KEY")
+SESSION_DIR = os.getenv("SESSION_STORE_DIR", os.path.join(".cache", "sessions"))
+SESSION_TABLE = "scraper_sessions"
+
+
+def _fernet():
+    if not SESSION_STORE_KEY:
+        return None
+    try:
+        return Fernet(SESSION_STORE_KEY.encode())
+    except (ValueError, TypeError) as e:
+        # Bozuk anahtar login akışını düşürmesin; oturum saklanmadan devam edilir
+        print(f"⚠️ SESSION_STORE_KEY geçersiz, oturum saklanmayacak/okunmayacak: {e}")
+        return None
+
+
+def _file_path(name):
+    return os.path.join(SESSION_DIR, f"{name}.session")
+
+
+def save_storage_state(name, storage_state):
+    fernet = _fernet()
+    if not fernet:
+        print("ℹ️ SESSION_STORE_KEY tanımlı değil, oturum saklanmayacak.")
+        return
+    token = fernet.encrypt(json.dumps(storage_state).encode()).decode()
+    try:
+        if SESSION_STORE == "supabase":
+            from scripts.shared.supabase_client import supabase
+            supabase.table(SESSION_TABLE).upsert(
+                {"name": name, "payload": token, "updated_at": time.strftime("%Y-%m-%d %H:%M:%S")},
+                on_conflict="name",
+            ).execute()
+        else:
+            os.makedirs(SESSION_DIR, exist_ok=True)
+            with open(_file_path(name), "w") as f:
+                f.write(token)
+        print(f"🔒 '{name}' oturumu şifreli olarak kaydedildi ({SESSION_STORE}).")
+    except Exception as e:
+        print(f"⚠️ Oturum kaydedilemedi: {e}")
+
+
+def load_storage_state(name):
+    """Kayıtlı storage_state'i döndürür; yoksa veya çözülemiyorsa None."""
+    fernet = _fernet()
+    if not fernet:
+        return None
+    try:
+        if SESSION_STORE == "supabase":
+            from scripts.shared.supabase_client import supabase
+            response = supabase.table(SESSION_TABLE).select("payload").eq("name", name).limit(1).execute()
+            token = response.data[0]["payload"] if response.data else None
+        else:
+            if not os.path.exists(_file_path(name)):
+                return None
+            with open(_file_path(name)) as f:
+                token = f.read()
+        if not token:
+            return None
+        return json.loads(fernet.decrypt(token.encode()))
+    except InvalidToken:
+        print(f"⚠️ '{name}' oturumu çözülemedi (anahtar değişmiş olabilir), yok sayılıyor.")
+    except Exception as e:
+        print(f"⚠️ Kayıtlı oturum okunamadı: {e}")
+    return None
+
+
+def clear_storage_state(name):
+    try:
+        if SESSION_STORE == "supabase":
+            from scripts.shared.supabase_client import supabase
+            supabase.table(SESSION_TABLE).delete().eq("name", name).execute()
+        elif os.path.exists(_file_path(name)):
+            os.remove(_file_path(name))
+    except Exception as e:
+        print(f"⚠️ Kayıtlı oturum silinemedi: {e}")
+
+
+def open_stored_session(browser, name, validate, init_script=None, **context_kwargs):
+    """
+    Kayıtlı oturumla yeni bir context açar ve `validate(page)` ile doğrular.
+    Geçerliyse (context, page), değilse None döner (geçersiz oturum silinir).
+    """
+    storage_state = load_storage_state(name)
+    if not storage_state:
+        return None
+    context = browser.new_context(storage_state=storage_state, **context_kwargs)
+    page = context.new_page()
+    if init_script:
+        page.add_init_script(init_script)
+    try:
+        if validate(page):
+            print(f"♻️ '{name}' için kayıtlı oturum geçerli, giriş adımı atlanıyor.")
+            return context, page
+    except Exception as e:
+        print(f"⚠️ Kayıtlı oturum doğrulanamadı: {e}")
+    print(f"🔁 '{name}' için kayıtlı oturum reddedildi, tam giriş yapılacak.")
+    context.close()
+    clear_storage_state(name)
+    return None
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == "keygen":
+        print(Fernet.generate_key().decode())
@@ -0,0 +1,62 @@
+# Ham stok metinlerinin ingest sırasında tipli kolonlara çevrilmesi.
+#
+# Üç pazaryeri stoğu farklı biçimlerde yazar:
+#   oksid:   "Stokta Var" / "Stokta Yok" / "Bilinmiyor"
+#   bayinet: "Merkez (0) | Dış depo (13)" (depo başına adet)
+#   denge:   "Stokta" / "Stokta Yok" / "Sorunuz" ya da adet
+# Her biri in_stock (boolean), stock_qty (biliniyorsa toplam adet) ve stock_depots
+# (depo → adet) kolonlarına çevrilir. Kurallar frontend'in eski toBoolStock*
+# fonksiyonlarıyla aynıdır; SQL karşılığı supabase/migrations/20261018090900_typed_stock.sql
+# içinde mevcut satırları doldurmak için kullanılır.
+import re
+
+from scripts.shared.text import fold
+
+# Stokta olmadığını belirten ifadeler (fold() sonrası)
+OUT_OF_STOCK = {
+    "0", "false", "no", "hayir", "yok", "out", "stok yok", "stokta yok", "yoktur",
+    "stok bulunmamaktadir", "mevcut degil",
+}
+DEPOT_PATTERN = re.compile(r"^\s*(.*?)\s*[(（](\d+)[)）]")
+QUANTITY_PATTERN = re.compile(r"^[>+]?\s*(\d+)(?:[.,]0+)?\s*\+?$")
+
+
+def _typed(in_stock, qty=None, depots=None):
+    return {"in_stock": in_stock, "stock_qty": qty, "stock_depots": depots}
+
+
+def parse_oksid(row):
+    """Boş ya da 'yok' türü bir ifade değilse stokta; adet bilgisi yok."""
+    s = fold(str(row.get("stock") or "").strip())
+    return _typed(not s or s not in OUT_OF_STOCK)
+
+
+def parse_bayinet(row):
+    """Depo adetleri toplanır; toplam > 0 ise stokta. Boş metin stokta sayılır."""
+    s = str(row.get("stock_info") or "").strip()
+    if not s:
+        return _typed(True)
+    depots = {}
+    for part in s.split("|"):
+        match = DEPOT_PATTERN.match(part)
+        if match:
+            depots[match.group(1)] = int(match.group(2))
+    if not depots:
+        # "Belirtilmemiş" gibi adetsiz metinler
+        return _typed(False)
+    qty = sum(depots.values())
+    return _typed(qty > 0, qty, depots)
+
+
+def parse_denge(row):
+    """Adet yazıyorsa adet > 0; metinse 'yok' türü ifadeler dışındakiler stokta. Boş değer stokta değil."""
+    value = row.get("stock_info")
+    if value is None:
+        return _typed(False)
+    s = str(value).strip()
+    match = QUANTITY_PATTERN.match(s)
+    if match:
+        qty = int(match.group(1))
+        return _typed(qty > 0, qty)
+    s = fold(s)
+    return _typed(bool(s) and s not in OUT_OF_STOCK)
@@ -0,0 +1,371 @@
+# Üç marketplace için ortak "sadece değişeni yaz" motoru.
+#
+# Her ürün satırı için içerik kolonlarından kararlı bir parmak izi (fingerprint)
+# hesaplanır ve tabloda saklanır; parmak izi değişen her ürün yazılır. Son
+# senkronize edilen parmak izi + fiyat lokal bir SQLite snapshot'ında da tutulur.
+# Taze snapshot kaydı olan ürünler için DB'ye hiç okuma yapılmaz; DB yalnızca
+# snapshot'ta olmayan veya bayatlamış ürünler için, sadece (anahtar, fingerprint,
+# fiyat) kolonlarıyla sorgulanır.
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+from scripts.shared.supabase_client import supabase
+from scripts.shared import write_layer, metrics, stock, fx
+from scripts.shared.text import search_text
+
+SNAPSHOT_PATH = os.getenv("SYNC_SNAPSHOT_PATH", os.path.join(".cache", "sync_state.sqlite"))
+SNAPSHOT_TTL_HOURS = float(os.getenv("SYNC_SNAPSHOT_TTL_HOURS", "24"))
+SNAPSHOT_ENABLED = os.getenv("SYNC_SNAPSHOT", "1") != "0"
+# "rpc": karşılaştır-birleştir işi merge_products Postgres fonksiyonunda yapılır; "upsert": Python tarafında
+WRITE_MODE = os.getenv("SYNC_WRITE_MODE", "rpc")
+RPC_CHUNK_SIZE = int(os.getenv("SYNC_RPC_CHUNK_SIZE", "1000"))
+# Uyarlamalı parti boyutunun üst sınırları (başlangıç değerleri batch_size / RPC_CHUNK_SIZE)
+RPC_MAX_CHUNK_SIZE = int(os.getenv("SYNC_RPC_MAX_CHUNK_SIZE", "5000"))
+UPSERT_MAX_BATCH = int(os.getenv("SYNC_UPSERT_MAX_BATCH", "500"))
+_rpc_available = True
+
+
+class SyncSpec:
+    """Bir marketplace tablosunun senkronizasyon ayarları."""
+
+    def __init__(self, marketplace, table, key, price_column, content_columns,
+                 select_chunk_size=900, extra_fields=None, set_last_updated=False, category_column="category",
+                 stock_parser=None, fx_price_columns=None):
+        self.marketplace = marketplace
+        self.table = table
+        self.key = key
+        self.price_column = price_column
+        # Parmak izine giren kolonlar (last_updated/last_price gibi her yazımda değişenler hariç)
+        self.content_columns = content_columns
+        self.select_chunk_size = select_chunk_size
+        self.extra_fields = extra_fields or {}
+        self.set_last_updated = set_last_updated
+        # Metriklerde kategori etiketi için kullanılan kolon
+        self.category_column = category_column
+        # Ham stok metnini in_stock / stock_qty / stock_depots kolonlarına çeviren fonksiyon
+        self.stock_parser = stock_parser
+        # price_try / price_usd için kullanılan fiyat kolonları (ilk dolu olan alınır)
+        self.fx_price_columns = fx_price_columns or [price_column]
+
+
+BAYINET = SyncSpec("bayinet", "bayinet_products", "product_id", "price",
+                   ["name", "url", "category_id", "price", "currency", "stock_info"], category_column="category_id",
+                   stock_parser=stock.parse_bayinet)
+DENGE = SyncSpec("denge", "denge_products", "product_id", "special_price",
+                 ["name", "url", "category", "special_price", "list_price", "currency", "stock_info"],
+                 stock_parser=stock.parse_denge, fx_price_columns=["special_price", "list_price"])
+# Oksid'de anahtar URL olduğu için .in_() sorgusu 400 (URL çok uzun) vermesin diye küçük chunk
+OKSID = SyncSpec("oksid", "oksid_products", "url", "price_1",
+                 ["name", "url", "category", "price_1", "price_2", "currency", "stock"],
+                 select_chunk_size=50, extra_fields={"marketplace": "oksid"}, set_last_updated=True,
+                 stock_parser=stock.parse_oksid, fx_price_columns=["price_1", "price_2"])
+
+
+def compute_fingerprint(spec, row):
+    """İçerik kolonlarının kanonik JSON'undan kararlı bir SHA-1 özeti."""
+    content = {column: row.get(column) for column in spec.content_columns}
+    canonical = json.dumps(content, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+# --- Lokal snapshot ---
+_lock = threading.Lock()
+_conn = None
+
+
+def _snapshot():
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(SNAPSHOT_PATH) or ".", exist_ok=True)
+        _conn = sqlite3.connect(SNAPSHOT_PATH, check_same_thread=False)
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshot ("
+            " marketplace TEXT NOT NULL, key TEXT NOT NULL, state TEXT NOT NULL, synced_at REAL NOT NULL,"
+            " PRIMARY KEY (marketplace, key))"
+        )
+        _conn.commit()
+    return _conn
+
+
+def load_snapshot(spec, keys):
+    """Taze snapshot kayıtlarını {key: {kolon: değer}} olarak döndürür."""
+    if not SNAPSHOT_ENABLED or not keys:
+        return {}
+    min_synced_at = time.time() - SNAPSHOT_TTL_HOURS * 3600
+    found = {}
+    with _lock:
+        conn = _snapshot()
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, state FROM snapshot WHERE marketplace = ? AND synced_at >= ? AND key IN ({placeholders})",
+                [spec.marketplace, min_synced_at, *chunk],
+            ).fetchall()
+            for key, state in rows:
+                state = json.loads(state)
+                # Parmak izi olmayan eski format kayıtlar DB'den yeniden okunur
+                if state.get("fingerprint"):
+                    found[key] = state
+    return found
+
+
+def store_snapshot(spec, rows):
+    if not SNAPSHOT_ENABLED or not rows:
+        return
+    now = time.time()
+    values = [
+        (spec.marketplace, row[spec.key], json.dumps({spec.price_column: row.get(spec.price_column), "fingerprint": row.get("fingerprint")}), now)
+        for row in rows if row.get(spec.key)
+    ]
+    with _lock:
+        conn = _snapshot()
+        conn.executemany("INSERT OR REPLACE INTO snapshot (marketplace, key, state, synced_at) VALUES (?, ?, ?, ?)", values)
+        conn.commit()
+
+
+# --- DB okuma ---
+def fetch_existing(spec, keys):
+    existing = {}
+    if not keys:
+        return existing
+    columns = ", ".join([spec.key, "fingerprint", spec.price_column])
+    print(f"📊 DB'den {len(keys)} ürünün mevcut durumu sorgulanacak...")
+    for i in range(0, len(keys), spec.select_chunk_size):
+        key_chunk = keys[i:i + spec.select_chunk_size]
+        group = i // spec.select_chunk_size + 1
+        try:
+            with metrics.timer("db_lookup", marketplace=spec.marketplace):
+                response = supabase.table(spec.table).select(columns).in_(spec.key, key_chunk).execute()
+            for item in response.data:
+                existing[item[spec.key]] = item
+            print(f"   -> {len(response.data)} mevcut ürün bilgisi alındı (grup {group}).")
+        except Exception as e:
+            print(f"⚠️ Mevcut ürünler çekilirken hata (grup {group}): {e}")
+    print(f"✅ Toplam {len(existing)} mevcut ürün bilgisi başarıyla alındı.")
+    return existing
+
+
+# --- Diff ---
+def diff_products(spec, products, existing):
+    """Yeni veya parmak izi değişen ürünleri (last_price atanmış halde) döndürür."""
+    products_to_upsert = []
+    print("\n🔍 Değişiklikler kontrol ediliyor...")
+    for p in products:
+        key = p.get(spec.key)
+        if not key:
+            continue
+
+        # Durum 1: Yeni ürün
+        if key not in existing:
+            print(f"✨ Yeni ürün bulundu: {p['name'][:60]}...")
+            # 'All object keys must match' hatasını önlemek için last_price ekliyoruz.
+            p['last_price'] = None
+            products_to_upsert.append(p)
+            continue
+
+        # Durum 2: Mevcut ürün, parmak izi karşılaştır
+        existing_product = existing[key]
+        if existing_product.get("fingerprint") == p["fingerprint"]:
+            continue
+
+        old_price = existing_product.get(spec.price_column)
+        new_price = p.get(spec.price_column)
+        p['last_price'] = old_price
+        if old_price is not None and new_price is not None and old_price != new_price:
+            log_message = f"Fiyat: {old_price} -> {new_price}"
+        else:
+            log_message = "İçerik değişti (stok/ad/URL/para birimi...)"
+        print(f"🔄 Güncelleme: {p['name'][:50]}... | {log_message}")
+        products_to_upsert.append(p)
+    return products_to_upsert
+
+
+# --- Yazma ---
+def upsert_products(spec, products_to_upsert, batch_size=50):
+    """Ürünleri uyarlamalı partilerle upsert eder; yazılan satırları döndürür."""
+    batcher = write_layer.get_batcher(f"{spec.table}:upsert", initial=batch_size, max_size=UPSERT_MAX_BATCH)
+    written, results, failed = write_layer.write_in_batches(
+        products_to_upsert,
+        write_layer.send_upsert(spec.table, spec.key),
+        batcher,
+        entry={"op": "upsert", "table": spec.table, "key": spec.key},
+        label=spec.table,
+    )
+    print(f"✅ DB'ye {sum(results)} ürün yazıldı ({len(results)} parti, son parti boyutu {batcher.size}).")
+    if failed:
+        print(f"📮 {len(failed)} ürün yazılamadı, dead-letter dosyasına alındı (replay ile tekrar gönderilebilir).")
+    return written
+
+
+class RpcUnavailable(Exception):
+    pass
+
+
+def _is_missing_rpc(error):
+    # Fonksiyon henüz migrate edilmemişse klasik upsert yoluna dönülür
+    message = str(error)
+    return "PGRST202" in message or ("merge_products" in message and "not find" in message)
+
+
+def merge_via_rpc(spec, rows, chunk_size=None):
+    """
+    Satırları büyük POST gövdeleriyle `merge_products` Postgres fonksiyonuna gönderir.
+    Karşılaştırma ve last_price ataması SQL tarafında yapılır; (değişen satır sayısı,
+    gönderilen satırlar) döndürür.
+    """
+    batcher = write_layer.get_batcher(f"{spec.table}:merge", initial=chunk_size or RPC_CHUNK_SIZE, min_size=50, max_size=RPC_MAX_CHUNK_SIZE)
+    try:
+        sent, results, failed = write_layer.write_in_batches(
+            rows,
+            write_layer.send_merge(spec.table),
+            batcher,
+            entry={"op": "merge", "table": spec.table, "key": spec.key},
+            is_fatal=_is_missing_rpc,
+            label=f"{spec.table} merge",
+        )
+    except Exception as e:
+        if _is_missing_rpc(e):
+            raise RpcUnavailable(str(e))
+        raise
+    changed = sum(results)
+    print(f"✅ merge_products: {len(sent)} satır gönderildi, {changed} satır değişti ({len(results)} parti, son parti boyutu {batcher.size}).")
+    if failed:
+        print(f"📮 {len(failed)} satır yazılamadı, dead-letter dosyasına alındı (replay ile tekrar gönderilebilir).")
+    return changed, sent
+
+
+def _single_category(spec, products):
+    """Partideki tüm ürünler aynı kategorideyse o kategori (metrik etiketi için)."""
+    categories = {p.get(spec.category_column) for p in products}
+    return categories.pop() if len(categories) == 1 else None
+
+
+def _comparable_price(spec, row):
+    return next((row[c] for c in spec.fx_price_columns if row.get(c) is not None), None)
+
+
+def _prepare_for_write(spec, rows):
+    snapshot = fx.current(supabase)
+    for p in rows:
+        p.update(spec.extra_fields)
+        # Ad değişirse fingerprint de değişir; arama kolonu her yazımda addan yeniden üretilir
+        p["search_text"] = search_text(p.get("name"))
+        # Stok metni içerik kolonlarında olduğundan tipli stok kolonları da yalnızca değişince yeniden yazılır
+        if spec.stock_parser:
+            p.update(spec.stock_parser(p))
+        # Kurlar içerik kolonu değil; değişmeyen satırlar çalıştırma sonunda refresh_fx ile SQL tarafında güncellenir
+        if snapshot:
+            p.update(fx.convert(_comparable_price(spec, p), p.get("currency"), snapshot))
+        if spec.set_last_updated:
+            p["last_updated"] = time.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def sync_products(spec, products, label=None, batch_size=50):
+    """
+    Sadece yeni veya herhangi bir içerik alanı değişen ürünleri DB'ye yazar ve
+    değişen satır sayısını döndürür. Karşılaştırma önce lokal snapshot'a karşı
+    yapılır; kalanlar "rpc" modunda SQL tarafında, "upsert" modunda DB'den
+    okunan parmak izlerine karşı karşılaştırılır.
+    """
+    global _rpc_available
+    if not products or not supabase:
+        print("❌ Supabase client eksik veya ürün listesi boş. Kayıt atlandı.")
+        return 0
+
+    for p in products:
+        p["fingerprint"] = compute_fingerprint(spec, p)
+    category = label or _single_category(spec, products)
+
+    keys = [p[spec.key] for p in products if p.get(spec.key)]
+    existing = load_snapshot(spec, keys)
+    if existing:
+        print(f"⚡ {len(existing)}/{len(keys)} ürünün son durumu lokal snapshot'tan okundu.")
+    scope = f"'{label}' kategorisinde" if label else "Bu kategoride"
+
+    if WRITE_MODE == "rpc" and _rpc_available:
+        candidates = [
+            p for p in products
+            if p.get(spec.key) and existing.get(p[spec.key], {}).get("fingerprint") != p["fingerprint"]
+        ]
+        if not candidates:
+            print(f"\n✅ Veritabanı güncel. {scope} değişiklik veya yeni ürün bulunamadı.")
+            return 0
+        print(f"\n💾 {scope} {len(candidates)} aday satır sunucu tarafında birleştirilecek...")
+        _prepare_for_write(spec, candidates)
+        try:
+            with metrics.timer("db_write", marketplace=spec.marketplace, category=category):
+                changed, sent = merge_via_rpc(spec, candidates)
+            store_snapshot(spec, sent)
+            metrics.inc("rows_sent", len(sent), marketplace=spec.marketplace, category=category)
+            metrics.inc("changed_rows", changed, marketplace=spec.marketplace, category=category)
+            return changed
+        except RpcUnavailable as e:
+            print(f"⚠️ merge_products fonksiyonu bulunamadı, upsert moduna geçiliyor: {e}")
+            _rpc_available = False
+
+    missing = [k for k in keys if k not in existing]
+    from_db = fetch_existing(spec, missing)
+    existing.update(from_db)
+    # DB'den okunan güncel durumu snapshot'a işle ki sonraki çalıştırmada tekrar sorulmasın
+    store_snapshot(spec, list(from_db.values()))
+
+    products_to_upsert = diff_products(spec, products, existing)
+    if not products_to_upsert:
+        print(f"\n✅ Veritabanı güncel. {scope} değişiklik veya yeni ürün bulunamadı.")
+        return 0
+
+    print(f"\n💾 {scope} {len(products_to_upsert)} değişiklik tespit edildi. Veritabanı güncelleniyor...")
+    _prepare_for_write(spec, products_to_upsert)
+    with metrics.timer("db_write", marketplace=spec.marketplace, category=category):
+        written = upsert_products(spec, products_to_upsert, batch_size)
+    metrics.inc("rows_sent", len(written), marketplace=spec.marketplace, category=category)
+    metrics.inc("changed_rows", len(written), marketplace=spec.marketplace, category=category)
+    # Yalnızca gerçekten yazılan satırlar snapshot'a girer; başarısız chunk'lar sonraki çalıştırmada tekrar denenir
+    store_snapshot(spec, written)
+    return len(written)
+
+
+# --- Özet ---
+def refresh_fx(spec):
+    """
+    Bu çalıştırmanın kur snapshot'ını tablodaki tüm satırlara SQL tarafında uygular
+    (apply_fx_snapshot); yalnızca price_try / price_usd değeri değişen satırlar yazılır.
+    """
+    snapshot = fx.current(supabase)
+    if not supabase or not snapshot or not snapshot.get("id"):
+        return None
+    try:
+        with metrics.timer("fx_refresh", marketplace=spec.marketplace):
+            updated = supabase.rpc(
+                "apply_fx_snapshot", {"p_marketplace": spec.marketplace, "p_snapshot_id": snapshot["id"]}
+            ).execute().data
+        print(f"💱 {spec.marketplace}: {updated} ürünün price_try / price_usd değeri güncellendi.")
+        return updated
+    except Exception as e:
+        print(f"⚠️ Kur snapshot'ı uygulanamadı: {e}")
+        return None
+
+
+def refresh_stats(spec, run_started_at=None):
+    """
+    Çalıştırma sonunda marketplace_stats tablosunu (kategoriler, ürün / stokta ürün
+    sayıları, çalıştırma zamanları) SQL tarafında yeniden hesaplatır. Özet
+    yazılamazsa çalıştırma başarısız sayılmaz.
+    """
+    if not supabase:
+        return None
+    try:
+        with metrics.timer("stats_refresh", marketplace=spec.marketplace):
+            categories = supabase.rpc(
+                "refresh_marketplace_stats", {"p_marketplace": spec.marketplace, "p_run_started_at": run_started_at}
+            ).execute().data
+        print(f"📈 marketplace_stats güncellendi: {spec.marketplace}, {categories} kategori.")
+        return categories
+    except Exception as e:
+        print(f"⚠️ marketplace_stats güncellenemedi: {e}")
+        return None
@@ -0,0 +1,44 @@
+# Ürün adları için ortak metin normalizasyonu (arama kolonu ve eşleştirme).
+#
+# search_text() çıktısı tablolardaki search_text kolonuna yazılır; search_vector
+# bundan üretilir ('simple' tsvector + GIN indeks). Aynı kurallar SQL'de
+# public.product_search_text() (backfill) ve frontend'de utils/search.ts (sorgu)
+# tarafında da uygulanır; biri değişirse üçü birlikte güncellenmeli.
+import re
+
+# Türkçe büyük harfler önce Türkçe kurala göre küçültülür, sonra ASCII'ye katlanır
+_TR_UPPER = str.maketrans({"I": "ı", "İ": "i"})
+_ASCII_FOLD = str.maketrans({"ı": "i", "ş": "s", "ğ": "g", "ü": "u", "ö": "o", "ç": "c", "â": "a", "î": "i", "û": "u"})
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+# Ayırıcılı model kodları: "sa400s37/480g", "wi-fi", "rtx-4060"
+JOINED_PATTERN = re.compile(r"[a-z0-9]+(?:[-/.][a-z0-9]+)+")
+# Harf + rakam içeren kelimelerin (model kodları) sonekleri de saklanır ki kodun ortasından
+# yazılan aramalar ('a400' → 'sa400s37') önek olarak bulunabilsin
+SUFFIX_MIN_LENGTH = 3
+SUFFIX_MAX_WORD_LENGTH = 20
+
+
+def fold(text):
+    """Türkçe kurallarla küçük harfe çevirip ASCII'ye katlar: 'İŞLEMCİ' → 'islemci', 'KINGSTON' → 'kingston'."""
+    return (text or "").translate(_TR_UPPER).lower().translate(_ASCII_FOLD)
+
+
+def search_text(name):
+    """
+    Aranabilir token listesi (sıralı, tekrarsız, boşlukla ayrılmış):
+    kelimeler, ayırıcısız yazılmış model kodları ('sa400s37480g') ve harf/rakam
+    sınırından bölünmüş parçalar ('480gb' → '480', 'gb'; 'sata3' → 'sata', '3').
+    Harf ve rakam içeren kelimelerin en az SUFFIX_MIN_LENGTH karakterlik sonekleri de
+    eklenir ('sa400s37' → 'a400s37', '400s37', ..., 's37').
+    """
+    folded = fold(name)
+    tokens = set()
+    for word in WORD_PATTERN.findall(folded):
+        tokens.add(word)
+        tokens.update(re.findall(r"[a-z]+|[0-9]+", word))
+        if len(word) <= SUFFIX_MAX_WORD_LENGTH and re.search(r"[a-z]", word) and re.search(r"[0-9]", word):
+            tokens.update(word[i:] for i in range(1, len(word) - SUFFIX_MIN_LENGTH + 1))
+    for code in JOINED_PATTERN.findall(folded):
+        if re.search(r"[a-z]", code):
+            tokens.add(re.sub(r"[-/.]", "", code))
+    return " ".join(sorted(tokens))
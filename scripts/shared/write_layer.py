@@ -0,0 +1,216 @@
+# Ortak DB yazma katmanı.
+#
+# - Parti boyutu gözlenen gecikmeye göre büyür/küçülür; "payload too large" /
+#   zaman aşımı gibi boyut kaynaklı hatalarda parti deneme hakkı yakmadan bölünür.
+# - Geçici hatalarda sabit time.sleep(5) yerine üstel geri çekilme + jitter.
+# - Tüm denemelere rağmen yazılamayan partiler kaybolmaz; lokal bir dead-letter
+#   JSONL dosyasına yazılır ve sonradan tekrar gönderilebilir:
+#
+#     python -m scripts.shared.write_layer replay [--dry-run]
+import os
+import json
+import time
+import random
+import argparse
+import threading
+
+from scripts.shared import metrics
+
+DEAD_LETTER_PATH = os.getenv("WRITE_DEAD_LETTER_PATH", os.path.join(".cache", "dead_letter.jsonl"))
+MAX_RETRIES = int(os.getenv("WRITE_MAX_RETRIES", "4"))
+BACKOFF_BASE = float(os.getenv("WRITE_BACKOFF_BASE", "1"))
+BACKOFF_CAP = float(os.getenv("WRITE_BACKOFF_CAP", "30"))
+# Bir partinin hedef yazma süresi; çok altında kalınırsa parti büyütülür, üstüne çıkılırsa küçültülür
+TARGET_SECONDS = float(os.getenv("WRITE_TARGET_SECONDS", "2"))
+
+PAYLOAD_ERROR_MARKERS = ("413", "payload too large", "request entity too large", "timed out", "timeout", "57014")
+
+_dead_letter_lock = threading.Lock()
+
+
+def backoff_delay(attempt, base=None, cap=None):
+    """Full-jitter üstel geri çekilme: 0 ile min(cap, base * 2^attempt) arası rastgele bekleme."""
+    base = BACKOFF_BASE if base is None else base
+    cap = BACKOFF_CAP if cap is None else cap
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def is_payload_error(error):
+    message = str(error).lower()
+    return any(marker in message for marker in PAYLOAD_ERROR_MARKERS)
+
+
+class AdaptiveBatcher:
+    """Gözlenen yazma süresine göre parti boyutunu ayarlar (hızlıysa x1.5, yavaşsa /2)."""
+
+    def __init__(self, initial, min_size=10, max_size=1000, target_seconds=None):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.size = max(min_size, min(initial, max_size))
+        self.target_seconds = target_seconds or TARGET_SECONDS
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, rows):
+        with self._lock:
+            # Sadece tam dolu partiler büyütme sinyali verir; küçük kuyruk partisi hızlı bitmesiyle yanıltmasın
+            if seconds < self.target_seconds / 2 and rows >= self.size:
+                self.size = min(self.max_size, int(self.size * 1.5) + 1)
+            elif seconds > self.target_seconds * 2:
+                self.size = max(self.min_size, self.size // 2)
+
+    def shrink(self):
+        with self._lock:
+            self.size = max(self.min_size, self.size // 2)
+            return self.size
+
+
+# Aynı (tablo, işlem) için öğrenilen parti boyutu çalıştırma boyunca korunur
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(name, initial, min_size=10, max_size=1000):
+    with _batchers_lock:
+        if name not in _batchers:
+            _batchers[name] = AdaptiveBatcher(initial, min_size=min_size, max_size=max_size)
+        return _batchers[name]
+
+
+# --- Gönderim fonksiyonları (sync_engine ve replay ortak kullanır) ---
+def send_upsert(table, key):
+    from scripts.shared.supabase_client import supabase
+
+    def send(chunk):
+        return len(supabase.table(table).upsert(chunk, on_conflict=key).execute().data)
+    return send
+
+
+def send_merge(table):
+    from scripts.shared.supabase_client import supabase
+
+    def send(chunk):
+        data = supabase.rpc("merge_products", {"p_table": table, "p_rows": chunk}).execute().data
+        return data if isinstance(data, int) else 0
+    return send
+
+
+def sender_for(entry):
+    if entry["op"] == "merge":
+        return send_merge(entry["table"])
+    return send_upsert(entry["table"], entry["key"])
+
+
+# --- Dead-letter ---
+def write_dead_letter(entry, rows, error, path=None):
+    path = path or DEAD_LETTER_PATH
+    record = dict(entry, rows=rows, error=str(error)[:500], failed_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+    with _dead_letter_lock:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    print(f"📮 {len(rows)} satır dead-letter dosyasına yazıldı: {path}")
+
+
+def read_dead_letters(path=None):
+    path = path or DEAD_LETTER_PATH
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# --- Ana yazma döngüsü ---
+def write_in_batches(rows, send, batcher, entry=None, is_fatal=None, max_retries=None, label="DB"):
+    """
+    rows'u batcher'ın belirlediği boyutlarda send(chunk) ile gönderir.
+    (yazılan satırlar, send sonuçları, yazılamayan satırlar) döndürür. entry
+    verilmişse yazılamayan partiler dead-letter dosyasına kaydedilir.
+    is_fatal(e) True dönerse hata yeniden denenmeden yukarı fırlatılır.
+    """
+    max_retries = MAX_RETRIES if max_retries is None else max_retries
+    written, results, failed = [], [], []
+    pos = 0
+    chunk_no = 0
+    while pos < len(rows):
+        chunk = rows[pos:pos + batcher.size]
+        chunk_no += 1
+        attempt = 0
+        while True:
+            start = time.time()
+            try:
+                result = send(chunk)
+            except Exception as e:
+                if is_fatal and is_fatal(e):
+                    raise
+                if is_payload_error(e) and len(chunk) > batcher.min_size:
+                    # Boyut kaynaklı hata: deneme hakkı yakmadan partiyi küçült
+                    new_size = batcher.shrink()
+                    chunk = rows[pos:pos + new_size]
+                    print(f"✂️ {label} partisi çok büyük ({e}); parti boyutu {new_size} satıra düşürüldü.")
+                    continue
+                attempt += 1
+                if attempt >= max_retries:
+                    print(f"❌ {label} chunk {chunk_no} {max_retries} denemede yazılamadı: {e}")
+                    metrics.inc("failed_rows", len(chunk), stage="db_write")
+                    failed.extend(chunk)
+                    if entry is not None:
+                        write_dead_letter(entry, chunk, e)
+                    break
+                delay = backoff_delay(attempt)
+                metrics.inc("retries", stage="db_write")
+                print(f"⚠️ Supabase error ({label} chunk {chunk_no}), retry {attempt}/{max_retries - 1}, {delay:.1f} sn sonra: {e}")
+                time.sleep(delay)
+                continue
+            batcher.observe(time.time() - start, len(chunk))
+            written.extend(chunk)
+            results.append(result)
+            break
+        pos += len(chunk)
+    return written, results, failed
+
+
+# --- Replay ---
+def replay(path=None, dry_run=False):
+    """Dead-letter kayıtlarını yeniden gönderir; yine yazılamayanlar dosyada kalır."""
+    path = path or DEAD_LETTER_PATH
+    entries = read_dead_letters(path)
+    if not entries:
+        print("✅ Dead-letter dosyası boş, gönderilecek kayıt yok.")
+        return 0
+    total_rows = sum(len(e["rows"]) for e in entries)
+    print(f"📮 {len(entries)} kayıt / {total_rows} satır bulundu ({path}).")
+    if dry_run:
+        for e in entries:
+            print(f"   -> {e['failed_at']} {e['op']} {e['table']}: {len(e['rows'])} satır | {e['error'][:80]}")
+        return 0
+
+    remaining = []
+    replayed = 0
+    for e in entries:
+        batcher = get_batcher(f"replay:{e['table']}:{e['op']}", initial=len(e["rows"]), max_size=max(len(e["rows"]), 10))
+        written, _, failed = write_in_batches(e["rows"], sender_for(e), batcher, label=f"replay {e['table']}")
+        replayed += len(written)
+        if failed:
+            remaining.append(dict(e, rows=failed))
+
+    with _dead_letter_lock:
+        # Replay sırasında eklenen yeni kayıtlar kaybolmasın
+        added = read_dead_letters(path)[len(entries):]
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for e in remaining + added:
+                f.write(json.dumps(e, ensure_ascii=False, default=str) + "\n")
+        os.replace(tmp_path, path)
+    print(f"✅ {replayed}/{total_rows} satır yeniden yazıldı, {sum(len(e['rows']) for e in remaining)} satır dosyada kaldı.")
+    return replayed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dead-letter yazma kayıtlarını yönetir")
+    sub = parser.add_subparsers(dest="command", required=True)
+    replay_parser = sub.add_parser("replay", help="Dead-letter kayıtlarını DB'ye yeniden gönder")
+    replay_parser.add_argument("--path", default=DEAD_LETTER_PATH)
+    replay_parser.add_argument("--dry-run", action="store_true", help="Sadece listele, gönderme")
+    args = parser.parse_args()
+    if args.command == "replay":
+        replay(args.path, dry_run=args.dry_run)
@@ -0,0 +1,10 @@
+-- Scraper'ların şifreli Playwright storage_state kayıtları (SESSION_STORE=supabase).
+-- payload, SESSION_STORE_KEY ile Fernet şifrelidir; anahtar olmadan okunamaz.
+create table if not exists public.scraper_sessions (
+  name text primary key,
+  payload text not null,
+  updated_at timestamp without time zone not null default now()
+);
+
+-- Sadece service role erişebilsin
+alter table public.scraper_sessions enable row level security;
@@ -0,0 +1,40 @@
+-- OTP tablolarına yeni satır eklendiğinde scraper'ın polling yapmadan haberdar olması için.
+
+-- 1) Supabase Realtime: INSERT olaylarını yayınla
+do $$
+begin
+  if exists (select 1 from pg_publication where pubname = 'supabase_realtime') then
+    begin
+      alter publication supabase_realtime add table public.otp_codes;
+    exception when duplicate_object then null;
+    end;
+    begin
+      alter publication supabase_realtime add table public.sms_codes;
+    exception when duplicate_object then null;
+    end;
+  end if;
+end $$;
+
+-- 2) LISTEN/NOTIFY (OTP_PG_DSN ile doğrudan Postgres'e bağlanan lokal testler için)
+create or replace function public.notify_otp_inserted()
+returns trigger
+language plpgsql
+as $$
+begin
+  perform pg_notify(
+    'otp_inserted',
+    json_build_object('table', tg_table_name, 'otp_code', new.otp_code)::text
+  );
+  return new;
+end;
+$$;
+
+drop trigger if exists otp_codes_notify on public.otp_codes;
+create trigger otp_codes_notify
+  after insert on public.otp_codes
+  for each row execute function public.notify_otp_inserted();
+
+drop trigger if exists sms_codes_notify on public.sms_codes;
+create trigger sms_codes_notify
+  after insert on public.sms_codes
+  for each row execute function public.notify_otp_inserted();
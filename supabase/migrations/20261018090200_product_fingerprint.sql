@@ -0,0 +1,6 @@
+-- Ürün satırlarının içerik parmak izi (scripts/shared/sync_engine.py::compute_fingerprint).
+-- Yazım öncesi karşılaştırma yalnızca (anahtar, fingerprint, fiyat) çekerek yapılır.
+-- Mevcut satırlarda kolon boş kalır; ilk çalıştırmada hepsi bir kez yeniden yazılarak dolar.
+alter table public.oksid_products add column if not exists fingerprint text;
+alter table public.bayinet_products add column if not exists fingerprint text;
+alter table public.denge_products add column if not exists fingerprint text;
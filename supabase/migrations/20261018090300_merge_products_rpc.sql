@@ -0,0 +1,68 @@
+-- Sunucu tarafında toplu karşılaştır-birleştir (scripts/shared/sync_engine.py, SYNC_WRITE_MODE=rpc).
+--
+-- Bir kategori/çalıştırmanın tamamı birkaç büyük POST gövdesiyle gönderilir:
+--   select public.merge_products('bayinet_products', '[{...}, ...]'::jsonb);
+-- Yeni satırlar eklenir; mevcut satırlar yalnızca fingerprint değiştiyse güncellenir.
+-- last_price yalnızca fiyat gerçekten değiştiğinde eski fiyata çekilir.
+-- Dönüş değeri eklenen + güncellenen satır sayısıdır.
+create or replace function public.merge_products(p_table text, p_rows jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+  v_key text;
+  v_price text;
+  v_cols text;
+  v_updates text;
+  v_count integer;
+begin
+  case p_table
+    when 'oksid_products' then v_key := 'url'; v_price := 'price_1';
+    when 'bayinet_products' then v_key := 'product_id'; v_price := 'price';
+    when 'denge_products' then v_key := 'product_id'; v_price := 'special_price';
+    else raise exception 'merge_products: desteklenmeyen tablo %', p_table;
+  end case;
+
+  if p_rows is null or jsonb_array_length(p_rows) = 0 then
+    return 0;
+  end if;
+
+  -- Gelen JSON'da olan ve tabloda karşılığı bulunan kolonlar (id ve last_price hariç)
+  select string_agg(quote_ident(c.column_name), ', ' order by c.ordinal_position),
+         string_agg(format('%1$I = excluded.%1$I', c.column_name), ', ' order by c.ordinal_position)
+           filter (where c.column_name <> v_key)
+    into v_cols, v_updates
+    from information_schema.columns c
+   where c.table_schema = 'public'
+     and c.table_name = p_table
+     and c.column_name not in ('id', 'last_price')
+     and (p_rows -> 0) ? c.column_name;
+
+  execute format($sql$
+    with incoming as (
+      -- Aynı anahtar bir gövdede iki kez gelirse ON CONFLICT hata vermesin diye sonuncusu alınır
+      select distinct on (r.%2$I) r.*
+        from jsonb_populate_recordset(null::public.%1$I, $1) with ordinality as r
+       order by r.%2$I, ordinality desc
+    )
+    insert into public.%1$I as t (%3$s)
+    select %3$s from incoming
+    on conflict (%2$I) do update
+       set %4$s,
+           last_price = case
+             when t.%5$I is distinct from excluded.%5$I then t.%5$I
+             else t.last_price
+           end
+     where t.fingerprint is distinct from excluded.fingerprint
+  $sql$, p_table, v_key, v_cols, v_updates, v_price)
+  using p_rows;
+
+  get diagnostics v_count = row_count;
+  return v_count;
+end;
+$$;
+
+-- Anahtar kolonlarında ON CONFLICT için benzersiz kısıt gerekir (upsert zaten bunlara dayanıyor)
+create unique index if not exists oksid_products_url_key on public.oksid_products (url);
+create unique index if not exists bayinet_products_product_id_key on public.bayinet_products (product_id);
+create unique index if not exists denge_products_product_id_key on public.denge_products (product_id);
@@ -0,0 +1,11 @@
+-- Scraper checkpoint'leri (CHECKPOINT_STORE=supabase). Çalıştırma yarıda kalırsa
+-- bir sonraki --resume çalıştırması tamamlanan kategorileri buradan okuyup atlar.
+create table if not exists public.scraper_checkpoints (
+  name text primary key,
+  run_id text not null,
+  state jsonb not null,
+  updated_at timestamp without time zone not null default now()
+);
+
+-- Sadece service role erişebilsin
+alter table public.scraper_checkpoints enable row level security;
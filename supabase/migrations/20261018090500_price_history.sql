@@ -0,0 +1,186 @@
+-- Fiyat geçmişi: last_price yalnızca bir önceki fiyatı tuttuğu için zaman içindeki
+-- değişim ve "son 30 günün en düşük fiyatı" gibi sorular cevaplanamıyordu.
+--
+-- Ürün tablolarına yazılan her satır (merge_products RPC'si ya da upsert yolu fark
+-- etmeksizin) statement seviyesinde bir trigger'dan geçer. Fiyat, para birimi veya
+-- stok gerçekten değiştiyse price_history'ye tek satır eklenir; bir yazma partisindeki
+-- tüm değişiklikler tek INSERT ... SELECT ile eklenir. Aynı değerle tekrar gelen ürün
+-- (aynı çalıştırmada başka kategoride ya da sonraki çalıştırmalarda) satır üretmez.
+--
+-- price_history_daily, ürün başına günlük açılış/kapanış/en düşük/en yüksek fiyatı
+-- aynı trigger içinde günceller; frontend ham satırları taramadan price_trends()
+-- fonksiyonuyla bu tablodan okur.
+create table if not exists public.price_history (
+  id bigint generated always as identity primary key,
+  marketplace text not null,
+  product_key text not null,
+  ts timestamptz not null default now(),
+  price numeric,
+  currency text,
+  stock text
+);
+
+-- Ürün başına zaman sıralı okuma (son N değişiklik, tarih aralığı)
+create index if not exists price_history_product_ts_idx
+  on public.price_history (marketplace, product_key, ts desc);
+
+create table if not exists public.price_history_daily (
+  marketplace text not null,
+  product_key text not null,
+  day date not null,
+  currency text,
+  open_price numeric,
+  close_price numeric,
+  min_price numeric,
+  max_price numeric,
+  changes integer not null default 1,
+  primary key (marketplace, product_key, day)
+);
+
+-- Ham geçmiş yalnızca service role ile; günlük özet herkese açık okunur
+alter table public.price_history enable row level security;
+alter table public.price_history_daily enable row level security;
+drop policy if exists "price_history_daily okuma" on public.price_history_daily;
+create policy "price_history_daily okuma" on public.price_history_daily for select using (true);
+
+-- TG_ARGV: marketplace, anahtar kolonu, fiyat kolonu, stok kolonu
+create or replace function public.record_price_history()
+returns trigger
+language plpgsql
+as $$
+declare
+  v_marketplace text := TG_ARGV[0];
+  v_key text := TG_ARGV[1];
+  v_price text := TG_ARGV[2];
+  v_stock text := TG_ARGV[3];
+  v_changes jsonb;
+begin
+  if TG_OP = 'INSERT' then
+    select jsonb_agg(jsonb_build_object('product_key', n ->> v_key, 'price', n -> v_price, 'currency', n ->> 'currency', 'stock', n ->> v_stock))
+      into v_changes
+      from (select to_jsonb(r) as n from new_rows r) as inserted;
+  else
+    select jsonb_agg(jsonb_build_object('product_key', n ->> v_key, 'price', n -> v_price, 'currency', n ->> 'currency', 'stock', n ->> v_stock))
+      into v_changes
+      from (select to_jsonb(r) as n from new_rows r) as updated
+      join (select to_jsonb(r) as o from old_rows r) as previous on o ->> v_key = n ->> v_key
+     where (n ->> v_price, n ->> 'currency', n ->> v_stock)
+           is distinct from (o ->> v_price, o ->> 'currency', o ->> v_stock);
+  end if;
+
+  if v_changes is null then
+    return null;
+  end if;
+
+  with changes as (
+    select *
+      from jsonb_to_recordset(v_changes) as c(product_key text, price numeric, currency text, stock text)
+     where c.product_key is not null
+  ),
+  history as (
+    insert into public.price_history (marketplace, product_key, price, currency, stock)
+    select v_marketplace, product_key, price, currency, stock from changes
+  )
+  insert into public.price_history_daily as d
+         (marketplace, product_key, day, currency, open_price, close_price, min_price, max_price)
+  select v_marketplace, product_key, (now() at time zone 'Europe/Istanbul')::date, currency, price, price, price, price
+    from changes
+   where price is not null
+  on conflict (marketplace, product_key, day) do update
+     set close_price = excluded.close_price,
+         currency = excluded.currency,
+         min_price = least(d.min_price, excluded.min_price),
+         max_price = greatest(d.max_price, excluded.max_price),
+         changes = d.changes + 1;
+  return null;
+end;
+$$;
+
+-- Transition table'lı trigger'lar tek olay için tanımlanabildiğinden INSERT ve UPDATE ayrı
+drop trigger if exists oksid_price_history_ins on public.oksid_products;
+drop trigger if exists oksid_price_history_upd on public.oksid_products;
+create trigger oksid_price_history_ins after insert on public.oksid_products
+  referencing new table as new_rows for each statement
+  execute function public.record_price_history('oksid', 'url', 'price_1', 'stock');
+create trigger oksid_price_history_upd after update on public.oksid_products
+  referencing old table as old_rows new table as new_rows for each statement
+  execute function public.record_price_history('oksid', 'url', 'price_1', 'stock');
+
+drop trigger if exists bayinet_price_history_ins on public.bayinet_products;
+drop trigger if exists bayinet_price_history_upd on public.bayinet_products;
+create trigger bayinet_price_history_ins after insert on public.bayinet_products
+  referencing new table as new_rows for each statement
+  execute function public.record_price_history('bayinet', 'product_id', 'price', 'stock_info');
+create trigger bayinet_price_history_upd after update on public.bayinet_products
+  referencing old table as old_rows new table as new_rows for each statement
+  execute function public.record_price_history('bayinet', 'product_id', 'price', 'stock_info');
+
+drop trigger if exists denge_price_history_ins on public.denge_products;
+drop trigger if exists denge_price_history_upd on public.denge_products;
+create trigger denge_price_history_ins after insert on public.denge_products
+  referencing new table as new_rows for each statement
+  execute function public.record_price_history('denge', 'product_id', 'special_price', 'stock_info');
+create trigger denge_price_history_upd after update on public.denge_products
+  referencing old table as old_rows new table as new_rows for each statement
+  execute function public.record_price_history('denge', 'product_id', 'special_price', 'stock_info');
+
+-- Mevcut ürünlerin bugünkü durumu başlangıç noktası olarak bir kez yazılır
+insert into public.price_history (marketplace, product_key, price, currency, stock)
+select 'oksid', url, price_1, currency, stock::text from public.oksid_products
+ where url is not null and not exists (select 1 from public.price_history where marketplace = 'oksid')
+union all
+select 'bayinet', product_id, price, currency, stock_info::text from public.bayinet_products
+ where product_id is not null and not exists (select 1 from public.price_history where marketplace = 'bayinet')
+union all
+select 'denge', product_id, special_price, currency, stock_info::text from public.denge_products
+ where product_id is not null and not exists (select 1 from public.price_history where marketplace = 'denge');
+
+insert into public.price_history_daily (marketplace, product_key, day, currency, open_price, close_price, min_price, max_price)
+select marketplace, product_key, (ts at time zone 'Europe/Istanbul')::date, currency, price, price, price, price
+  from public.price_history
+ where price is not null
+on conflict (marketplace, product_key, day) do nothing;
+
+-- Bir sayfadaki ürünlerin son p_days gündeki fiyat seyri (frontend tek çağrıyla alır).
+-- Pencere öncesindeki son kapanış fiyatı da en düşük/en yüksek hesabına katılır;
+-- böylece pencere içinde hiç değişmeyen ürün için de doğru sonuç döner.
+create or replace function public.price_trends(p_marketplace text, p_keys text[], p_days integer default 30)
+returns table (product_key text, min_price numeric, max_price numeric, start_price numeric, changes integer, points jsonb)
+language sql
+stable
+as $$
+  with since as (
+    select (now() at time zone 'Europe/Istanbul')::date - p_days as day
+  ),
+  in_window as (
+    select d.*
+      from public.price_history_daily d, since s
+     where d.marketplace = p_marketplace
+       and d.product_key = any (p_keys)
+       and d.day > s.day
+  ),
+  carried as (
+    select distinct on (d.product_key) d.product_key, d.close_price
+      from public.price_history_daily d, since s
+     where d.marketplace = p_marketplace
+       and d.product_key = any (p_keys)
+       and d.day <= s.day
+     order by d.product_key, d.day desc
+  ),
+  keys as (
+    select product_key from in_window
+    union
+    select product_key from carried
+  )
+  select k.product_key,
+         least(min(w.min_price), c.close_price),
+         greatest(max(w.max_price), c.close_price),
+         coalesce(c.close_price, (array_agg(w.open_price order by w.day))[1]),
+         coalesce(sum(w.changes), 0)::integer,
+         coalesce(jsonb_agg(jsonb_build_object('day', w.day, 'price', w.close_price) order by w.day)
+                  filter (where w.day is not null), '[]'::jsonb)
+    from keys k
+    left join carried c on c.product_key = k.product_key
+    left join in_window w on w.product_key = k.product_key
+   group by k.product_key, c.close_price;
+$$;
@@ -0,0 +1,26 @@
+-- Pazaryerleri arası ürün eşleşmeleri: oksid_products.url, bayinet_products.product_id
+-- ve denge_products.product_id arasında bir bağ yoktu; karşılaştırma tarayıcıda
+-- adlardan yeniden kuruluyordu.
+--
+-- scripts/matching/match_products.py her scraper çalıştırmasından sonra yalnızca yeni
+-- veya adı değişen ürünleri yeniden eşleştirip bu tabloyu günceller. Çiftler kanonik
+-- sırada tutulur ((marketplace_a, key_a) < (marketplace_b, key_b)); bir ürünün
+-- eşleşmeleri her iki kolon çifti üzerinden de indeksli okunur.
+create table if not exists public.product_matches (
+  marketplace_a text not null,
+  key_a text not null,
+  marketplace_b text not null,
+  key_b text not null,
+  confidence numeric not null,
+  -- "code": ortak model kodu, "minhash": ad benzerliği
+  method text not null,
+  matched_at timestamptz not null default now(),
+  primary key (marketplace_a, key_a, marketplace_b, key_b)
+);
+
+create index if not exists product_matches_b_idx
+  on public.product_matches (marketplace_b, key_b);
+
+alter table public.product_matches enable row level security;
+drop policy if exists "product_matches okuma" on public.product_matches;
+create policy "product_matches okuma" on public.product_matches for select using (true);
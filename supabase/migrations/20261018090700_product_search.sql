@@ -0,0 +1,56 @@
+-- Ürün araması için önceden hesaplanmış arama kolonu.
+--
+-- Frontend `name ilike '%terim%'` + count=exact ile arıyordu; bu her aramada tablonun
+-- tamamını tarıyordu ve "ISLEMCI" / "işlemci", "SA400S37/480G" / "sa400s37480g" gibi
+-- yazım farklarını yakalamıyordu.
+--
+-- search_text ingest sırasında Python tarafında üretilir (scripts/shared/text.py::search_text):
+-- Türkçe kurallarla küçültülüp ASCII'ye katlanmış kelimeler, ayırıcısız model kodları ve
+-- harf/rakam sınırından bölünmüş parçalar. search_vector bundan üretilen 'simple' tsvector'dür;
+-- frontend her kelimeyi önek olarak arar ('kingston:* & a400:*') ve sorgu GIN indeksinden karşılanır.
+--
+-- public.product_search_text() aynı kuralların SQL karşılığıdır; yalnızca mevcut satırları
+-- doldurmak için kullanılır. Kurallar değişirse Python, SQL ve frontend/src/utils/search.ts
+-- birlikte güncellenmeli.
+create or replace function public.product_search_text(p_name text)
+returns text
+language sql
+immutable
+as $$
+  with folded as (
+    select translate(lower(translate(coalesce(p_name, ''), 'Iİ', 'ıi')), 'ışğüöçâîû', 'isguocaiu') as f
+  ),
+  words as (
+    select w[1] as word from folded, regexp_matches(f, '[a-z0-9]+', 'g') as w
+  ),
+  tokens as (
+    select word as token from words
+    union
+    select p[1] from words, regexp_matches(word, '[a-z]+|[0-9]+', 'g') as p
+    union
+    select regexp_replace(c[1], '[-/.]', '', 'g')
+      from folded, regexp_matches(f, '[a-z0-9]+(?:[-/.][a-z0-9]+)+', 'g') as c
+     where c[1] ~ '[a-z]'
+  )
+  select coalesce(string_agg(token, ' ' order by token collate "C"), '') from tokens;
+$$;
+
+alter table public.oksid_products add column if not exists search_text text;
+alter table public.bayinet_products add column if not exists search_text text;
+alter table public.denge_products add column if not exists search_text text;
+
+-- Mevcut satırlar bir kez doldurulur; sonraki yazımlarda kolon scraper'dan gelir
+update public.oksid_products set search_text = public.product_search_text(name) where search_text is null;
+update public.bayinet_products set search_text = public.product_search_text(name) where search_text is null;
+update public.denge_products set search_text = public.product_search_text(name) where search_text is null;
+
+alter table public.oksid_products add column if not exists search_vector tsvector
+  generated always as (to_tsvector('simple', coalesce(search_text, ''))) stored;
+alter table public.bayinet_products add column if not exists search_vector tsvector
+  generated always as (to_tsvector('simple', coalesce(search_text, ''))) stored;
+alter table public.denge_products add column if not exists search_vector tsvector
+  generated always as (to_tsvector('simple', coalesce(search_text, ''))) stored;
+
+create index if not exists oksid_products_search_idx on public.oksid_products using gin (search_vector);
+create index if not exists bayinet_products_search_idx on public.bayinet_products using gin (search_vector);
+create index if not exists denge_products_search_idx on public.denge_products using gin (search_vector);
@@ -0,0 +1,81 @@
+-- Pazaryeri başına önceden hesaplanmış özet: kategori listesi, kategori başına ürün /
+-- stokta ürün sayısı ve son çalıştırmanın başlangıç/bitiş zamanı.
+--
+-- Frontend kategori listesi için tüm ürün tablosunu sayfalayarak okuyor, "son güncelleme"
+-- için tabloyu last_updated'a göre sıralıyordu. Her scraper çalıştırması artık
+-- refresh_marketplace_stats() ile bu tabloyu tek seferde yeniden hesaplatır; frontend
+-- ikisini de tek küçük sorguyla buradan okur.
+--
+-- category = '*' satırı pazaryerinin toplamıdır (kategorisiz ürünler dahil).
+create table if not exists public.marketplace_stats (
+  marketplace text not null,
+  category text not null,
+  product_count integer not null default 0,
+  in_stock_count integer not null default 0,
+  run_started_at timestamptz,
+  run_finished_at timestamptz not null default now(),
+  primary key (marketplace, category)
+);
+
+alter table public.marketplace_stats enable row level security;
+drop policy if exists "marketplace_stats okuma" on public.marketplace_stats;
+create policy "marketplace_stats okuma" on public.marketplace_stats for select using (true);
+
+-- Stok kuralları frontend'deki toBoolStock* fonksiyonlarıyla aynıdır:
+--   oksid: boş ya da "yok" türü bir ifade değilse stokta
+--   bayinet: depo listesindeki "(N)" sayılarının toplamı > 0 ise (boş ise stokta)
+--   denge: adet yazıyorsa adet > 0; metinse boş ya da "yok" türü bir ifade değilse stokta; null stokta değil
+--   (stock_info kolonu metin de olabildiğinden her kural ::text üzerinden yazılır)
+create or replace function public.refresh_marketplace_stats(p_marketplace text, p_run_started_at timestamptz default null)
+returns integer
+language plpgsql
+as $$
+declare
+  v_table text;
+  v_category text;
+  v_in_stock text;
+  v_count integer;
+begin
+  case p_marketplace
+    when 'oksid' then
+      v_table := 'oksid_products';
+      v_category := 'category';
+      v_in_stock := $e$coalesce(trim(stock), '') = '' or lower(trim(stock)) not in
+        ('0', 'false', 'no', 'hayir', 'yok', 'out', 'stok yok', 'stokta yok', 'yoktur', 'stok bulunmamaktadır', 'mevcut değil')$e$;
+    when 'bayinet' then
+      v_table := 'bayinet_products';
+      v_category := 'category_id';
+      v_in_stock := $e$coalesce(trim(stock_info::text), '') = '' or coalesce(
+        (select sum(m[1]::bigint) from regexp_matches(stock_info::text, '[(（](\d+)[)）]', 'g') as m), 0) > 0$e$;
+    when 'denge' then
+      v_table := 'denge_products';
+      v_category := 'category';
+      v_in_stock := $e$stock_info is not null and case
+        when trim(stock_info::text) ~ '^[>+]?\s*(\d+)(?:[.,]0+)?\s*\+?$'
+          then (regexp_match(trim(stock_info::text), '^[>+]?\s*(\d+)(?:[.,]0+)?\s*\+?$'))[1]::bigint > 0
+        else trim(stock_info::text) <> '' and lower(trim(stock_info::text)) not in
+          ('0', 'false', 'no', 'hayir', 'yok', 'out', 'stok yok', 'stokta yok', 'yoktur', 'stok bulunmamaktadır', 'mevcut değil')
+      end$e$;
+    else raise exception 'refresh_marketplace_stats: desteklenmeyen pazaryeri %', p_marketplace;
+  end case;
+
+  delete from public.marketplace_stats where marketplace = p_marketplace;
+
+  execute format($sql$
+    with products as (
+      select nullif(trim(%2$I::text), '') as category, (%3$s) as in_stock
+        from public.%1$I
+    )
+    insert into public.marketplace_stats (marketplace, category, product_count, in_stock_count, run_started_at, run_finished_at)
+    select $1, coalesce(category, '*'), count(*), count(*) filter (where in_stock), $2, now()
+      from products
+     group by grouping sets ((category), ())
+    having grouping(category) = 1 or category is not null
+  $sql$, v_table, v_category, v_in_stock)
+  using p_marketplace, p_run_started_at;
+
+  get diagnostics v_count = row_count;
+  -- Toplam satırı hariç kategori sayısı
+  return greatest(v_count - 1, 0);
+end;
+$$;
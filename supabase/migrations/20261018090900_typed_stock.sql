@@ -0,0 +1,116 @@
+-- Stok bilgisinin tipli kolonları: in_stock, stock_qty (biliniyorsa toplam adet) ve
+-- stock_depots (bayinet: depo → adet).
+--
+-- Ham stok metni üç pazaryerinde farklı biçimlerdeydi ("Stokta Var", "Merkez (0) | Dış depo (13)",
+-- "Sorunuz"...) ve frontend her satırı her yüklemede regex'lerle yeniden yorumluyor, "sadece
+-- stoktakiler" filtresini `not ilike '%yok%'` ile yapıyordu. Kolonlar artık ingest sırasında
+-- Python'da doldurulur (scripts/shared/stock.py); aşağıdaki ifadeler aynı kuralların SQL
+-- karşılığıdır ve yalnızca mevcut satırları doldurmak için kullanılır.
+create or replace function public.tr_fold(p_text text)
+returns text
+language sql
+immutable
+as $$
+  select translate(lower(translate(p_text, 'Iİ', 'ıi')), 'ışğüöçâîû', 'isguocaiu');
+$$;
+
+alter table public.oksid_products
+  add column if not exists in_stock boolean,
+  add column if not exists stock_qty integer,
+  add column if not exists stock_depots jsonb;
+alter table public.bayinet_products
+  add column if not exists in_stock boolean,
+  add column if not exists stock_qty integer,
+  add column if not exists stock_depots jsonb;
+alter table public.denge_products
+  add column if not exists in_stock boolean,
+  add column if not exists stock_qty integer,
+  add column if not exists stock_depots jsonb;
+
+-- oksid: boş ya da "yok" türü bir ifade değilse stokta
+update public.oksid_products
+   set in_stock = coalesce(trim(stock), '') = ''
+                  or public.tr_fold(trim(stock)) not in ('0', 'false', 'no', 'hayir', 'yok', 'out', 'stok yok', 'stokta yok',
+                                                         'yoktur', 'stok bulunmamaktadir', 'mevcut degil')
+ where in_stock is null;
+
+-- bayinet: "Depo (N)" adetleri toplanır; boş metin stokta, adetsiz metin stokta değil
+update public.bayinet_products as b
+   set in_stock = case
+                    when coalesce(trim(b.stock_info::text), '') = '' then true
+                    when d.depots is null then false
+                    else d.qty > 0
+                  end,
+       stock_qty = case when coalesce(trim(b.stock_info::text), '') = '' then null else d.qty end,
+       stock_depots = case when coalesce(trim(b.stock_info::text), '') = '' then null else d.depots end
+  from (
+    select p.product_id,
+           jsonb_object_agg(m[1], m[2]::integer) filter (where m is not null) as depots,
+           (sum(m[2]::integer) filter (where m is not null))::integer as qty
+      from public.bayinet_products p
+      left join lateral unnest(string_to_array(p.stock_info::text, '|')) as part on true
+      left join lateral regexp_match(part, '^\s*(.*?)\s*[(（](\d+)[)）]') as m on true
+     where p.in_stock is null
+     group by p.product_id
+  ) as d
+ where d.product_id = b.product_id;
+
+-- denge: adet yazıyorsa adet > 0; metinse "yok" türü ifadeler dışındakiler stokta; boş değer stokta değil
+update public.denge_products as t
+   set in_stock = case
+                    when t.stock_info is null then false
+                    when q.qty is not null then q.qty > 0
+                    else public.tr_fold(trim(t.stock_info::text)) <> ''
+                         and public.tr_fold(trim(t.stock_info::text)) not in ('0', 'false', 'no', 'hayir', 'yok', 'out', 'stok yok',
+                                                                             'stokta yok', 'yoktur', 'stok bulunmamaktadir', 'mevcut degil')
+                  end,
+       stock_qty = q.qty
+  from (
+    select product_id, (regexp_match(trim(stock_info::text), '^[>+]?\s*(\d+)(?:[.,]0+)?\s*\+?$'))[1]::integer as qty
+      from public.denge_products
+     where in_stock is null
+  ) as q
+ where q.product_id = t.product_id;
+
+-- "Sadece stoktakiler" + fiyat sıralaması indeksten karşılanır
+create index if not exists oksid_products_in_stock_price_idx on public.oksid_products (in_stock, price_2);
+create index if not exists bayinet_products_in_stock_price_idx on public.bayinet_products (in_stock, price);
+create index if not exists denge_products_in_stock_price_idx on public.denge_products (in_stock, special_price);
+
+-- marketplace_stats stok sayıları artık tipli kolondan
+create or replace function public.refresh_marketplace_stats(p_marketplace text, p_run_started_at timestamptz default null)
+returns integer
+language plpgsql
+as $$
+declare
+  v_table text;
+  v_category text;
+  v_count integer;
+begin
+  case p_marketplace
+    when 'oksid' then v_table := 'oksid_products'; v_category := 'category';
+    when 'bayinet' then v_table := 'bayinet_products'; v_category := 'category_id';
+    when 'denge' then v_table := 'denge_products'; v_category := 'category';
+    else raise exception 'refresh_marketplace_stats: desteklenmeyen pazaryeri %', p_marketplace;
+  end case;
+
+  delete from public.marketplace_stats where marketplace = p_marketplace;
+
+  execute format($sql$
+    with products as (
+      select nullif(trim(%2$I::text), '') as category, coalesce(in_stock, false) as in_stock
+        from public.%1$I
+    )
+    insert into public.marketplace_stats (marketplace, category, product_count, in_stock_count, run_started_at, run_finished_at)
+    select $1, coalesce(category, '*'), count(*), count(*) filter (where in_stock), $2, now()
+      from products
+     group by grouping sets ((category), ())
+    having grouping(category) = 1 or category is not null
+  $sql$, v_table, v_category)
+  using p_marketplace, p_run_started_at;
+
+  get diagnostics v_count = row_count;
+  -- Toplam satırı hariç kategori sayısı
+  return greatest(v_count - 1, 0);
+end;
+$$;
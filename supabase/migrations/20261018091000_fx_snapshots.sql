@@ -0,0 +1,109 @@
+-- Çalıştırma başına döviz kuru snapshot'ı ve karşılaştırılabilir fiyat kolonları.
+--
+-- Fiyatlar farklı para birimlerinde ($, ₺, €, bayinet data-currency değerleri) ve kur
+-- dönüşümü frontend'de (utils/exchange.ts) genel kur API'lerine, olmazsa sabit bir kura
+-- dayanıyordu; pazaryerleri arası fiyat sıralaması DB'de yapılamıyordu.
+--
+-- Her scraper çalıştırması kurları bir kez çekip fx_snapshots'a yazar (scripts/shared/fx.py)
+-- ve yazdığı ürünlere price_try / price_usd ekler. Kurlar parmak izine girmediğinden
+-- değişmeyen ürünler çalıştırma sonunda apply_fx_snapshot() ile SQL tarafında güncellenir.
+--
+-- rates: 1 birimin TL karşılığı, ör. {"TRY": 1, "USD": 41.25, "EUR": 48.1}
+create table if not exists public.fx_snapshots (
+  id bigint generated always as identity primary key,
+  captured_at timestamptz not null default now(),
+  source text,
+  rates jsonb not null
+);
+
+create index if not exists fx_snapshots_captured_at_idx on public.fx_snapshots (captured_at desc);
+
+alter table public.fx_snapshots enable row level security;
+drop policy if exists "fx_snapshots okuma" on public.fx_snapshots;
+create policy "fx_snapshots okuma" on public.fx_snapshots for select using (true);
+
+-- Ham para birimi metni → ISO kodu (scripts/shared/fx.py::currency_code ile aynı; boş değer TL)
+create or replace function public.fx_currency(p_currency text)
+returns text
+language sql
+immutable
+as $$
+  select case
+    when s in ('', '₺', 'tl', 'try', 'trl', 'ytl') then 'TRY'
+    when s in ('$', 'usd', 'us$', 'dolar') then 'USD'
+    when s in ('€', 'eur', 'euro') then 'EUR'
+    when s in ('£', 'gbp') then 'GBP'
+    when s ~ '^[a-z]{3}$' then upper(s)
+  end
+  from (select rtrim(lower(trim(coalesce(p_currency, ''))), '.,') as s) as c;
+$$;
+
+-- Fiyatın TL karşılığı; para birimi snapshot'ta yoksa null
+create or replace function public.fx_to_try(p_price numeric, p_currency text, p_rates jsonb)
+returns numeric
+language sql
+immutable
+as $$
+  select round(p_price * (p_rates ->> public.fx_currency(p_currency))::numeric, 2);
+$$;
+
+alter table public.oksid_products
+  add column if not exists price_try numeric,
+  add column if not exists price_usd numeric;
+alter table public.bayinet_products
+  add column if not exists price_try numeric,
+  add column if not exists price_usd numeric;
+alter table public.denge_products
+  add column if not exists price_try numeric,
+  add column if not exists price_usd numeric;
+
+-- Fiyat sıralaması (tümü / sadece stoktakiler) indeksten karşılanır
+create index if not exists oksid_products_price_try_idx on public.oksid_products (price_try);
+create index if not exists bayinet_products_price_try_idx on public.bayinet_products (price_try);
+create index if not exists denge_products_price_try_idx on public.denge_products (price_try);
+create index if not exists oksid_products_in_stock_price_try_idx on public.oksid_products (in_stock, price_try);
+create index if not exists bayinet_products_in_stock_price_try_idx on public.bayinet_products (in_stock, price_try);
+create index if not exists denge_products_in_stock_price_try_idx on public.denge_products (in_stock, price_try);
+
+-- Snapshot'ı (verilmezse en sonuncusunu) pazaryerinin tüm ürünlerine uygular; fiyat kolonları
+-- sync_engine'deki fx_price_columns ile aynıdır. Yalnızca değeri değişen satırlar yazılır,
+-- güncellenen satır sayısı döner.
+create or replace function public.apply_fx_snapshot(p_marketplace text, p_snapshot_id bigint default null)
+returns integer
+language plpgsql
+as $$
+declare
+  v_table text;
+  v_price text;
+  v_rates jsonb;
+  v_count integer;
+begin
+  case p_marketplace
+    when 'oksid' then v_table := 'oksid_products'; v_price := 'coalesce(price_1, price_2)';
+    when 'bayinet' then v_table := 'bayinet_products'; v_price := 'price';
+    when 'denge' then v_table := 'denge_products'; v_price := 'coalesce(special_price, list_price)';
+    else raise exception 'apply_fx_snapshot: desteklenmeyen pazaryeri %', p_marketplace;
+  end case;
+
+  select rates into v_rates
+    from public.fx_snapshots
+   where p_snapshot_id is null or id = p_snapshot_id
+   order by captured_at desc
+   limit 1;
+  if v_rates is null then
+    return 0;
+  end if;
+
+  -- %2$s: ürünün fiyatının TL karşılığı
+  execute format($sql$
+    update public.%1$I
+       set price_try = %2$s,
+           price_usd = round(%2$s / ($1 ->> 'USD')::numeric, 2)
+     where (price_try, price_usd) is distinct from (%2$s, round(%2$s / ($1 ->> 'USD')::numeric, 2))
+  $sql$, v_table, format('public.fx_to_try((%s)::numeric, currency, $1)', v_price))
+  using v_rates;
+
+  get diagnostics v_count = row_count;
+  return v_count;
+end;
+$$;
@@ -0,0 +1,42 @@
+-- Model kodlarının ortasından yazılan aramalar için search_text'e sonek token'ları eklenir.
+--
+-- search_vector kelime öneki aradığından 'a400' → 'SA400S37/480G' ya da 'rtx4060' → 'RTX 4060'
+-- gibi eski ilike '%terim%' aramasının bulduğu sonuçlar kayboluyordu. Harf ve rakam içeren
+-- kelimelerin (en fazla 20 karakter) en az 3 karakterlik sonekleri de token olarak saklanır;
+-- frontend sorgu kelimelerini de harf/rakam sınırından böler ('rtx4060' → rtx4060:* | (rtx:* & 4060:*)).
+--
+-- public.product_search_text() scripts/shared/text.py::search_text ile aynı kalır; mevcut satırlar
+-- yeni kurala göre yeniden doldurulur (search_vector generated kolon olduğundan kendiliğinden güncellenir).
+create or replace function public.product_search_text(p_name text)
+returns text
+language sql
+immutable
+as $$
+  with folded as (
+    select translate(lower(translate(coalesce(p_name, ''), 'Iİ', 'ıi')), 'ışğüöçâîû', 'isguocaiu') as f
+  ),
+  words as (
+    select w[1] as word from folded, regexp_matches(f, '[a-z0-9]+', 'g') as w
+  ),
+  tokens as (
+    select word as token from words
+    union
+    select p[1] from words, regexp_matches(word, '[a-z]+|[0-9]+', 'g') as p
+    union
+    select substr(word, i)
+      from words, generate_series(2, length(word) - 2) as i
+     where length(word) <= 20 and word ~ '[a-z]' and word ~ '[0-9]'
+    union
+    select regexp_replace(c[1], '[-/.]', '', 'g')
+      from folded, regexp_matches(f, '[a-z0-9]+(?:[-/.][a-z0-9]+)+', 'g') as c
+     where c[1] ~ '[a-z]'
+  )
+  select coalesce(string_agg(token, ' ' order by token collate "C"), '') from tokens;
+$$;
+
+update public.oksid_products set search_text = public.product_search_text(name)
+ where search_text is distinct from public.product_search_text(name);
+update public.bayinet_products set search_text = public.product_search_text(name)
+ where search_text is distinct from public.product_search_text(name);
+update public.denge_products set search_text = public.product_search_text(name)
+ where search_text is distinct from public.product_search_text(name);
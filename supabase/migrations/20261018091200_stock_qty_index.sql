@@ -0,0 +1,4 @@
+-- "Stok ↓" sıralaması (stock_qty desc nulls last) indeksten karşılanır. Oksid stok adedi
+-- vermediğinden orada in_stock'a göre sıralanır; (in_stock, price_2) indeksi bunu karşılar.
+create index if not exists bayinet_products_stock_qty_idx on public.bayinet_products (stock_qty desc nulls last);
+create index if not exists denge_products_stock_qty_idx on public.denge_products (stock_qty desc nulls last);
@@ -0,0 +1,119 @@
+-- Kur güncellemeleri fiyat geçmişi trigger'ını tetiklemesin.
+--
+-- apply_fx_snapshot() her çalıştırma sonunda kuru değişen tüm satırların price_try /
+-- price_usd kolonlarını yazar; kur her gün oynadığından bu pazaryerinin neredeyse tamamıdır.
+-- *_price_history_upd trigger'ı bu satırlar için geçmiş satırı üretmez (fiyat, para birimi
+-- ve stok aynı) ama yine de old/new transition table'larının tamamını jsonb'ye çevirip
+-- karşılaştırır. Kolon listeli trigger (after update of price, currency, stock) transition
+-- table ile birlikte tanımlanamadığından ("transition tables cannot be specified for
+-- triggers with column lists") ve statement trigger'ının WHEN koşulu satırları göremediğinden,
+-- apply_fx_snapshot yalnızca kendi UPDATE'i süresince işlem-yerel bir bayrak koyar ve
+-- record_price_history bu bayrak açıkken hiçbir şey yapmadan döner.
+--
+-- price_try / price_usd okuma anında hesaplanmaz: fiyat sıralaması ve aralık filtresi bu
+-- kolonların indekslerinden karşılanır. Churn'ü sınırlayan, yalnızca değeri gerçekten
+-- değişen satırların yazılmasıdır (aşağıdaki is distinct from koşulu).
+
+-- TG_ARGV: marketplace, anahtar kolonu, fiyat kolonu, stok kolonu
+create or replace function public.record_price_history()
+returns trigger
+language plpgsql
+as $$
+declare
+  v_marketplace text := TG_ARGV[0];
+  v_key text := TG_ARGV[1];
+  v_price text := TG_ARGV[2];
+  v_stock text := TG_ARGV[3];
+  v_changes jsonb;
+begin
+  -- Yalnızca price_try / price_usd yazan kur güncellemesi (apply_fx_snapshot)
+  if TG_OP = 'UPDATE' and current_setting('comprosearch.fx_only_update', true) = 'on' then
+    return null;
+  end if;
+
+  if TG_OP = 'INSERT' then
+    select jsonb_agg(jsonb_build_object('product_key', n ->> v_key, 'price', n -> v_price, 'currency', n ->> 'currency', 'stock', n ->> v_stock))
+      into v_changes
+      from (select to_jsonb(r) as n from new_rows r) as inserted;
+  else
+    select jsonb_agg(jsonb_build_object('product_key', n ->> v_key, 'price', n -> v_price, 'currency', n ->> 'currency', 'stock', n ->> v_stock))
+      into v_changes
+      from (select to_jsonb(r) as n from new_rows r) as updated
+      join (select to_jsonb(r) as o from old_rows r) as previous on o ->> v_key = n ->> v_key
+     where (n ->> v_price, n ->> 'currency', n ->> v_stock)
+           is distinct from (o ->> v_price, o ->> 'currency', o ->> v_stock);
+  end if;
+
+  if v_changes is null then
+    return null;
+  end if;
+
+  with changes as (
+    select *
+      from jsonb_to_recordset(v_changes) as c(product_key text, price numeric, currency text, stock text)
+     where c.product_key is not null
+  ),
+  history as (
+    insert into public.price_history (marketplace, product_key, price, currency, stock)
+    select v_marketplace, product_key, price, currency, stock from changes
+  )
+  insert into public.price_history_daily as d
+         (marketplace, product_key, day, currency, open_price, close_price, min_price, max_price)
+  select v_marketplace, product_key, (now() at time zone 'Europe/Istanbul')::date, currency, price, price, price, price
+    from changes
+   where price is not null
+  on conflict (marketplace, product_key, day) do update
+     set close_price = excluded.close_price,
+         currency = excluded.currency,
+         min_price = least(d.min_price, excluded.min_price),
+         max_price = greatest(d.max_price, excluded.max_price),
+         changes = d.changes + 1;
+  return null;
+end;
+$$;
+
+-- Snapshot'ı (verilmezse en sonuncusunu) pazaryerinin tüm ürünlerine uygular; fiyat kolonları
+-- sync_engine'deki fx_price_columns ile aynıdır. Yalnızca değeri değişen satırlar yazılır,
+-- güncellenen satır sayısı döner.
+create or replace function public.apply_fx_snapshot(p_marketplace text, p_snapshot_id bigint default null)
+returns integer
+language plpgsql
+as $$
+declare
+  v_table text;
+  v_price text;
+  v_rates jsonb;
+  v_count integer;
+begin
+  case p_marketplace
+    when 'oksid' then v_table := 'oksid_products'; v_price := 'coalesce(price_1, price_2)';
+    when 'bayinet' then v_table := 'bayinet_products'; v_price := 'price';
+    when 'denge' then v_table := 'denge_products'; v_price := 'coalesce(special_price, list_price)';
+    else raise exception 'apply_fx_snapshot: desteklenmeyen pazaryeri %', p_marketplace;
+  end case;
+
+  select rates into v_rates
+    from public.fx_snapshots
+   where p_snapshot_id is null or id = p_snapshot_id
+   order by captured_at desc
+   limit 1;
+  if v_rates is null then
+    return 0;
+  end if;
+
+  -- Bayrak yalnızca bu UPDATE boyunca açık; aynı işlemdeki diğer yazmalar geçmişe düşmeye devam eder
+  perform set_config('comprosearch.fx_only_update', 'on', true);
+  -- %2$s: ürünün fiyatının TL karşılığı. Kuru değişmeyen (ya da fiyatı olmayan) satırlara dokunulmaz.
+  execute format($sql$
+    update public.%1$I
+       set price_try = %2$s,
+           price_usd = round(%2$s / ($1 ->> 'USD')::numeric, 2)
+     where (price_try, price_usd) is distinct from (%2$s, round(%2$s / ($1 ->> 'USD')::numeric, 2))
+  $sql$, v_table, format('public.fx_to_try((%s)::numeric, currency, $1)', v_price))
+  using v_rates;
+  get diagnostics v_count = row_count;
+  perform set_config('comprosearch.fx_only_update', 'off', true);
+
+  return v_count;
+end;
+$$;